@@ -38,16 +38,20 @@ def check_setup(data_dir: Path) -> None:
     log_dir = project_dir / "Logs"
     figures_dir = project_dir / "Figures"
     formatted_data_dir = project_dir / "Formatted_Data"
+    cache_dir = project_dir / "Cache"
     project_dir.mkdir(parents=True, exist_ok=True)
     data_dir.mkdir(parents=True, exist_ok=True)
     log_dir.mkdir(parents=True, exist_ok=True)
     figures_dir.mkdir(parents=True, exist_ok=True)
     formatted_data_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
 
 
 data_dir_env = os.getenv('DATADIR')
 
 DATA_DIR = Path(data_dir_env)
+CACHE_DIR = DATA_DIR / "ManagedData" / "Cache"
+METADATA_INDEX_FILE = CACHE_DIR / "metadata_index.pkl"
 CLIMATOLOGY = [1991, 2020]
 
 check_setup(DATA_DIR)
@@ -19,13 +19,74 @@ by the packages. The :class:`BaseMetadata` class contains much of the functional
 :class:`CollectionMetadata` and :class:`.DatasetMetadata` inheriting that functionality and
 differing chiefly in the schemas used to validate their contents. The :class:`CombinedMetadata`
 class comprises a :class:`CollectionMetadata` object and a :class:`.DatasetMetadata` object.
+
+Metadata objects can be forked cheaply with :meth:`BaseMetadata.fork` and :meth:`CombinedMetadata.fork`.
+A fork shares its dictionary of metadata with the original until one of them is changed, at which point
+the one being changed takes a copy. Histories are held in a :class:`History`, which links each fork
+to the history it was forked from rather than copying it.
 """
+import copy
 import json
+from collections.abc import Sequence
+from functools import lru_cache
 from pathlib import Path
-from jsonschema import validate, RefResolver
+from typing import Iterable, List, Optional
+from jsonschema import RefResolver
+from jsonschema.validators import validator_for
 from climind.definitions import ROOT_DIR
 
 
+@lru_cache(maxsize=None)
+def get_validator(schema_name: str):
+    """
+    Get a validator for one of the schemas in the data_manager directory. The schema is read
+    and the validator is built the first time it is requested, and the same validator is
+    returned on subsequent calls.
+
+    Parameters
+    ----------
+    schema_name: str
+        Filename of the schema, e.g. metadata_schema.json
+
+    Returns
+    -------
+    jsonschema.protocols.Validator
+        Validator for the schema
+    """
+    schema_path = Path(ROOT_DIR) / 'climind' / 'data_manager' / schema_name
+    with open(schema_path) as f:
+        schema = json.load(f)
+
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    resolver = RefResolver(schema_path.as_uri(), schema)
+
+    return validator_class(schema, resolver=resolver)
+
+
+def validate_metadata(metadata: dict, schema_name: str) -> None:
+    """
+    Validate metadata against one of the schemas in the data_manager directory.
+
+    Parameters
+    ----------
+    metadata: dict
+        Metadata to be validated
+    schema_name: str
+        Filename of the schema, e.g. metadata_schema.json
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    jsonschema.ValidationError
+        If the metadata are not valid
+    """
+    get_validator(schema_name).validate(metadata)
+
+
 def list_match(list_to_match: list, attribute: str) -> bool:
     """
     If attribute matches any item in list_to_match return True, otherwise False
@@ -45,6 +106,152 @@ def list_match(list_to_match: list, attribute: str) -> bool:
     return attribute in list_to_match
 
 
+class History(Sequence):
+    """
+    Append-only list of history messages. A history forked from another one refers back to the
+    messages in its parent rather than copying them, and messages added to either after the fork
+    are not seen by the other. Apart from that, a :class:`History` behaves like a list of strings.
+    """
+    __slots__ = ('_parent', '_parent_length', '_entries')
+
+    def __init__(self, entries: Optional[Iterable[str]] = None, parent: Optional['History'] = None):
+        """
+        Create a :class:`History`
+
+        Parameters
+        ----------
+        entries: Optional[Iterable[str]]
+            Messages in the history
+        parent: Optional[History]
+            History from which this one is forked. The messages in the parent at the time of the fork
+            come before entries.
+        """
+        self._parent = parent
+        self._parent_length = 0 if parent is None else len(parent)
+        self._entries = [] if entries is None else list(entries)
+
+    def __len__(self):
+        return self._parent_length + len(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('History index out of range')
+        node = self
+        while index < node._parent_length:
+            node = node._parent
+        return node._entries[index - node._parent_length]
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __eq__(self, other):
+        if isinstance(other, (History, list, tuple)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def __deepcopy__(self, memo):
+        return self.fork()
+
+    def __add__(self, other):
+        return self.to_list() + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self.to_list()
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def copy(self) -> 'History':
+        """
+        Copy the history. Messages added to the copy are not seen by this history, and vice versa.
+
+        Returns
+        -------
+        History
+        """
+        return self.fork()
+
+    def to_list(self) -> List[str]:
+        """
+        Get the messages in the history
+
+        Returns
+        -------
+        List[str]
+            List of the history messages, oldest first
+        """
+        chunks = []
+        node, length = self, len(self)
+        while node is not None:
+            chunks.append(node._entries[:length - node._parent_length])
+            node, length = node._parent, node._parent_length
+        return [entry for chunk in reversed(chunks) for entry in chunk]
+
+    def append(self, message: str) -> None:
+        """
+        Add a message to the end of the history
+
+        Parameters
+        ----------
+        message: str
+            Message to add
+
+        Returns
+        -------
+        None
+        """
+        self._entries.append(message)
+
+    def extend(self, messages: Iterable[str]) -> None:
+        """
+        Add messages to the end of the history
+
+        Parameters
+        ----------
+        messages: Iterable[str]
+            Messages to add
+
+        Returns
+        -------
+        None
+        """
+        self._entries.extend(messages)
+
+    def fork(self) -> 'History':
+        """
+        Fork the history. The fork contains all the messages currently in this history.
+
+        Returns
+        -------
+        History
+            New history linked to this one.
+        """
+        return History(parent=self)
+
+
+def _unshare(value):
+    """
+    Copy a metadata value that could be changed in place, so that the copy can be changed without
+    affecting the original. Histories are forked and other lists and dictionaries are deep copied, as
+    they may contain lists and dictionaries themselves.
+    """
+    if isinstance(value, History):
+        return value.fork()
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
+
+
 class BaseMetadata:
     """
     Simple class to store metadata and find matches. Metadata items can be set and recovered using a
@@ -73,26 +280,105 @@ class BaseMetadata:
         metadata: dict
             Contains the metadata information in key value pairs
         """
-        self.metadata = metadata
+        self._metadata = metadata
+        self._shared = False
+
+    @property
+    def metadata(self) -> dict:
+        """
+        Dictionary containing the metadata. The dictionary can be changed in place, so it stops being
+        shared with any forks when it is handed out, and the history is given as a plain list.
+
+        Returns
+        -------
+        dict
+        """
+        self._unshare()
+        history = self._metadata.get('history')
+        if isinstance(history, History):
+            self._metadata['history'] = history.to_list()
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, metadata: dict) -> None:
+        self._metadata = metadata
+        self._shared = False
+
+    def __setstate__(self, state):
+        # objects pickled before the metadata dictionary became a property store it as 'metadata'
+        if 'metadata' in state:
+            state['_metadata'] = state.pop('metadata')
+        self.__dict__.update(state)
 
     def __getitem__(self, key):
-        if key in self.metadata:
-            return self.metadata[key]
+        if key in self._metadata:
+            item = self._metadata[key]
+            # the caller could change a list in place, so stop sharing it
+            if getattr(self, '_shared', False) and isinstance(item, (History, list, dict)):
+                self._unshare()
+                item = self._metadata[key]
+            return item
         else:
             raise KeyError
 
     def __setitem__(self, key, item):
-        self.metadata[key] = item
+        self._unshare()
+        self._metadata[key] = item
+
+    def __deepcopy__(self, memo):
+        return self.fork()
+
+    def _unshare(self) -> None:
+        """
+        If the metadata dictionary is shared with a fork, replace it with a copy, so that it can be
+        changed without affecting the fork.
+
+        Returns
+        -------
+        None
+        """
+        if getattr(self, '_shared', False):
+            self._metadata = {key: _unshare(value) for key, value in self._metadata.items()}
+            self._shared = False
+
+    def fork(self):
+        """
+        Make a copy of the metadata which shares the metadata dictionary with this object until
+        either of them is changed. Making a fork is cheap regardless of how long the history is.
+
+        Returns
+        -------
+        BaseMetadata
+            Object of the same class as this one containing the same metadata.
+        """
+        history = self._metadata.get('history')
+        if isinstance(history, list):
+            self._metadata['history'] = History(history)
+
+        self._shared = True
+        return copy.copy(self)
+
+    def to_dict(self) -> dict:
+        """
+        Get the metadata as a dictionary of plain python types, suitable for writing out as json.
+
+        Returns
+        -------
+        dict
+            Dictionary containing the metadata
+        """
+        return {key: value.to_list() if isinstance(value, History) else value
+                for key, value in self._metadata.items()}
 
     def __contains__(self, key):
-        if key in self.metadata:
+        if key in self._metadata:
             return True
         else:
             return False
 
     def __str__(self):
         out_str = ''
-        for key in self.metadata:
+        for key in self._metadata:
             out_str += f"{key}: {str(self[key])}\n"
         return out_str
 
@@ -109,11 +395,11 @@ class BaseMetadata:
         """
         match = True
 
-        common_keys = metadata_to_match.keys() & self.metadata.keys()
+        common_keys = metadata_to_match.keys() & self._metadata.keys()
         for key in common_keys:
 
             mtm = metadata_to_match[key]
-            att = self.metadata[key]
+            att = self._metadata[key]
 
             if isinstance(mtm, list):
                 if not list_match(mtm, att):
@@ -140,17 +426,20 @@ class BaseMetadata:
         -------
         None
         """
-        for key in self.metadata:
-            item = self.metadata[key]
+        self._unshare()
+        for key in self._metadata:
+            item = self._metadata[key]
             if isinstance(item, str):
                 item = item.replace(string_to_replace, replacement)
-                self.metadata[key] = item
-            elif isinstance(item, list):
+                self._metadata[key] = item
+            elif isinstance(item, (list, History)):
                 replacement_list = []
                 for entry in item:
                     entry = entry.replace(string_to_replace, replacement)
                     replacement_list.append(entry)
-                self.metadata[key] = replacement_list
+                if isinstance(item, History):
+                    replacement_list = History(replacement_list)
+                self._metadata[key] = replacement_list
 
 
 class CollectionMetadata(BaseMetadata):
@@ -159,7 +448,7 @@ class CollectionMetadata(BaseMetadata):
     data sets in the collection.
     """
 
-    def __init__(self, metadata: dict):
+    def __init__(self, metadata: dict, validate: bool = True):
         """
         Create :class:`CollectionMetadata` from a dictionary containing metadata. Metadata are
         validated using the metadata_schema.json file.
@@ -168,12 +457,11 @@ class CollectionMetadata(BaseMetadata):
         ----------
         metadata: dict
             Dictionary containing metadata in key value pairs.
+        validate: bool
+            Set to False to skip validation of metadata that have already been validated.
         """
-        schema_path = Path(ROOT_DIR) / 'climind' / 'data_manager' / 'metadata_schema.json'
-        with open(schema_path) as f:
-            metadata_schema = json.load(f)
-        resolver = RefResolver(schema_path.as_uri(), metadata_schema)
-        validate(metadata, metadata_schema, resolver=resolver)
+        if validate:
+            validate_metadata(metadata, 'metadata_schema.json')
 
         super().__init__(metadata)
 
@@ -184,7 +472,7 @@ class DatasetMetadata(BaseMetadata):
     to a single data set.
     """
 
-    def __init__(self, metadata: dict):
+    def __init__(self, metadata: dict, validate: bool = True):
         """
         Create :class:`DatasetMetadata` from a dictionary containing metadata. Metadata are
         validated using the dataset_schema.json file.
@@ -193,11 +481,11 @@ class DatasetMetadata(BaseMetadata):
         ----------
         metadata: dict
             Dictionary containing metadata in key value pairs.
+        validate: bool
+            Set to False to skip validation of metadata that have already been validated.
         """
-        schema_path = Path(ROOT_DIR) / 'climind' / 'data_manager' / 'dataset_schema.json'
-        with open(schema_path) as f:
-            metadata_schema = json.load(f)
-        validate(metadata, metadata_schema)
+        if validate:
+            validate_metadata(metadata, 'dataset_schema.json')
 
         super().__init__(metadata)
 
@@ -209,11 +497,11 @@ class DatasetMetadata(BaseMetadata):
         -------
         None
         """
-        download_message = f"Data set created from file {self.metadata['filename']} " \
-                           f"downloaded from {self.metadata['url']} " \
-                           f"at {self.metadata['last_modified']}"
+        download_message = f"Data set created from file {self._metadata['filename']} " \
+                           f"downloaded from {self._metadata['url']} " \
+                           f"at {self._metadata['last_modified']}"
 
-        self.metadata['history'].append(download_message)
+        self['history'].append(download_message)
 
 
 class CombinedMetadata:
@@ -227,6 +515,36 @@ class CombinedMetadata:
         self.dataset = dataset
         self.collection = collection
 
+    def __deepcopy__(self, memo):
+        return self.fork()
+
+    def fork(self) -> 'CombinedMetadata':
+        """
+        Make a copy of the metadata which shares the dataset and collection metadata with this object
+        until either of them is changed. This is much cheaper than a deep copy and is used whenever a
+        new data set is derived from an existing one.
+
+        Returns
+        -------
+        CombinedMetadata
+            Copy of the metadata
+        """
+        return CombinedMetadata(self.dataset.fork(), self.collection.fork())
+
+    def to_dict(self) -> dict:
+        """
+        Get the combined metadata as a single dictionary of plain python types. Where the dataset and
+        collection metadata share a key, the dataset value is used, as it is by :meth:`__getitem__`.
+
+        Returns
+        -------
+        dict
+            Dictionary containing the metadata
+        """
+        combined = self.collection.to_dict()
+        combined.update(self.dataset.to_dict())
+        return combined
+
     def __getitem__(self, key):
         if key in self.dataset:
             return self.dataset[key]
@@ -295,14 +613,10 @@ class CombinedMetadata:
         None
         """
 
-        rebuilt = self.collection.metadata
-        rebuilt['datasets'] = [self.dataset.metadata]
+        rebuilt = self.collection.to_dict()
+        rebuilt['datasets'] = [self.dataset.to_dict()]
 
-        schema_path = Path(ROOT_DIR) / 'climind' / 'data_manager' / 'metadata_schema.json'
-        with open(schema_path) as f:
-            metadata_schema = json.load(f)
-        resolver = RefResolver(schema_path.as_uri(), metadata_schema)
-        validate(rebuilt, metadata_schema, resolver=resolver)
+        validate_metadata(rebuilt, 'metadata_schema.json')
 
         with open(filename, 'w') as out_json:
             json.dump(rebuilt, out_json, indent=4)
@@ -23,16 +23,66 @@ objects. Finally, a :class:`DataArchive` contains one or more :class:`DataCollec
 :class:`.DataSet` objects in a :class:`.DataCollection` will be the same variable. However, :class:`.DataCollection`
 objects in a :class:`.DataArchive` need not be the same variable.
 """
+import copy
 import json
+import hashlib
+import logging
+import pickle
+import sys
+import time
+from collections import OrderedDict
 from urllib.parse import parse_qs
 import os
 
-from jsonschema import validate, RefResolver
 from typing import Callable, List, Union
 from pathlib import Path
-from climind.data_manager.metadata import CollectionMetadata, DatasetMetadata, CombinedMetadata
+import pkg_resources
+import xarray as xa
+from climind.data_manager.metadata import CollectionMetadata, DatasetMetadata, CombinedMetadata, validate_metadata
 from climind.definitions import ROOT_DIR
 
+# Version of the layout of the persistent archive index. Increment this if the layout changes.
+INDEX_VERSION = 1
+
+# Default memory budget, in bytes, of the DatasetCache
+DEFAULT_CACHE_SIZE = 2 * 1024 ** 3
+
+# Default disk budget, in bytes, of the PersistentDatasetCache
+DEFAULT_PERSISTENT_CACHE_SIZE = 10 * 1024 ** 3
+
+
+def file_digest(filename: Path) -> str:
+    """
+    Calculate the SHA-256 hash of the contents of a file
+
+    Parameters
+    ----------
+    filename: Path
+        Path of the file
+
+    Returns
+    -------
+    str
+        Hexadecimal digest of the file contents
+    """
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_schema_signature() -> str:
+    """
+    Get a hash of the metadata schemas, so that a persistent index built with different schemas
+    can be recognised and discarded.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest of the schema files
+    """
+    schema_dir = Path(ROOT_DIR) / 'climind' / 'data_manager'
+    digests = [file_digest(schema_dir / name) for name in ['metadata_schema.json', 'dataset_schema.json']]
+    return hashlib.sha256(''.join(digests).encode('utf-8')).hexdigest()
+
 
 def get_function(module_path: str, script_name: str, function_name: str) -> Callable:
     """
@@ -62,6 +112,479 @@ def get_function(module_path: str, script_name: str, function_name: str) -> Call
     return chosen_fn
 
 
+def directory_fingerprint(directory: Path) -> list:
+    """
+    List the relative path, modification time and size of every file in a directory and its
+    subdirectories, so that changes to any of the files can be detected.
+
+    Parameters
+    ----------
+    directory: Path
+        Path of the directory
+
+    Returns
+    -------
+    list
+        Sorted list of (relative path, modification time in ns, size in bytes)
+    """
+    if not directory.is_dir():
+        return []
+
+    fingerprint = []
+    for filename in directory.rglob('*'):
+        if filename.is_file():
+            file_stat = filename.stat()
+            fingerprint.append((str(filename.relative_to(directory)), file_stat.st_mtime_ns, file_stat.st_size))
+
+    return sorted(fingerprint)
+
+
+def make_dataset_key(reader_name: str, directory: Path, metadata: CombinedMetadata, kwargs: dict) -> str:
+    """
+    Make the key that identifies a data set read by a particular reader from a particular directory.
+    The key depends on the reader, the directory, the metadata, the keyword arguments passed to the
+    reader and the modification times and sizes of the files in the directory.
+
+    Parameters
+    ----------
+    reader_name: str
+        Name of the reader
+    directory: Path
+        Directory from which the data set is read
+    metadata: CombinedMetadata
+        Metadata of the data set
+    kwargs: dict
+        Keyword arguments passed to the reader
+
+    Returns
+    -------
+    str
+        Hexadecimal digest identifying the data set
+    """
+    description = {
+        'reader': reader_name,
+        'directory': str(directory),
+        'collection': metadata.collection.to_dict(),
+        'dataset': metadata.dataset.to_dict(),
+        'kwargs': kwargs,
+        'files': directory_fingerprint(Path(directory))
+    }
+    description = json.dumps(description, sort_keys=True, default=str)
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def estimate_size(data) -> int:
+    """
+    Estimate the memory used by a data set, such as a :class:`.TimeSeriesMonthly` or :class:`.GridMonthly`.
+
+    Parameters
+    ----------
+    data
+        Data set whose size is to be estimated
+
+    Returns
+    -------
+    int
+        Estimated size in bytes
+    """
+    if hasattr(data, 'nbytes'):
+        return int(data.nbytes)
+    # look the dataframe up on the instance, so that data sets which build their dataframe on demand
+    # are not made to build it just to be measured
+    df = getattr(data, '__dict__', {}).get('df')
+    if hasattr(df, 'memory_usage'):
+        return int(df.memory_usage(deep=True).sum())
+    if hasattr(df, 'nbytes'):
+        return int(df.nbytes)
+    return sys.getsizeof(data)
+
+
+def share_dataset(data):
+    """
+    Make a copy of a data set, such as a :class:`.TimeSeriesMonthly` or :class:`.GridMonthly`, that can be
+    handed out by a cache. The metadata are forked, so changes to the metadata of the copy do not affect
+    the original. Time series are copied with their :meth:`~.TimeSeries.share` method and the xarray
+    Dataset of a grid is copied without copying the underlying arrays. The processing steps replace these
+    arrays rather than changing them in place. Anything else is deep-copied.
+
+    Parameters
+    ----------
+    data
+        Data set to be copied
+
+    Returns
+    -------
+    Copy of the data set
+    """
+    metadata = getattr(data, 'metadata', None)
+    if not hasattr(metadata, 'fork'):
+        return copy.deepcopy(data)
+
+    if callable(getattr(data, 'share', None)):
+        return data.share()
+
+    df = getattr(data, 'df', None)
+    if isinstance(df, xa.Dataset):
+        shared = copy.copy(data)
+        shared.df = df.copy(deep=False)
+        shared.metadata = metadata.fork()
+        return shared
+
+    return copy.deepcopy(data)
+
+
+class PersistentDatasetCache:
+    """
+    An on-disk cache of data sets that have been read in, so that the parsing and regridding done by
+    the readers can be skipped on later runs. Gridded data sets are stored as netCDF files and everything
+    else is pickled. Data sets are keyed in the same way as the :class:`DatasetCache` and the key also
+    includes the climind version, so that data sets read by a different version of the readers are
+    not used. When the files in the cache exceed the disk budget, the least recently used data sets
+    are removed, which also clears out data sets whose input files or metadata have since changed.
+    """
+
+    def __init__(self, cache_dir: Path, version: str = None, max_bytes: int = DEFAULT_PERSISTENT_CACHE_SIZE):
+        """
+        Create a :class:`PersistentDatasetCache` in a directory
+
+        Parameters
+        ----------
+        cache_dir: Path
+            Directory in which the data sets will be stored. It is created if it does not exist.
+        version: str
+            Version string included in the keys. Defaults to the installed climind version.
+        max_bytes: int
+            Disk budget of the cache in bytes
+
+        Attributes
+        ----------
+        cache_dir: Path
+            Directory in which the data sets are stored
+        version: str
+            Version string included in the keys
+        max_bytes: int
+            Disk budget of the cache in bytes
+        """
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if version is None:
+            version = pkg_resources.get_distribution("climind").version
+        self.version = version
+        self.max_bytes = max_bytes
+
+    def make_key(self, reader_name: str, directory: Path, metadata: CombinedMetadata, kwargs: dict) -> str:
+        """
+        Make the key that identifies a data set read by a particular reader from a particular directory
+        with this version of climind.
+
+        Parameters
+        ----------
+        reader_name: str
+            Name of the reader
+        directory: Path
+            Directory from which the data set is read
+        metadata: CombinedMetadata
+            Metadata of the data set
+        kwargs: dict
+            Keyword arguments passed to the reader
+
+        Returns
+        -------
+        str
+            Hexadecimal digest identifying the data set
+        """
+        key = make_dataset_key(reader_name, directory, metadata, kwargs)
+        return hashlib.sha256(f'{key}{self.version}'.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """
+        Read a data set from the cache
+
+        Parameters
+        ----------
+        key: str
+            Key of the data set
+
+        Returns
+        -------
+        The data set or None if the data set is not in the cache or could not be read
+        """
+        pickle_file = self.cache_dir / f'{key}.pkl'
+        netcdf_file = self.cache_dir / f'{key}.nc'
+
+        if not pickle_file.exists():
+            return None
+
+        try:
+            with open(pickle_file, 'rb') as f:
+                data = pickle.load(f)
+            if netcdf_file.exists():
+                data.df = xa.load_dataset(netcdf_file)
+            # record the use, so that the data set is not the next to be pruned
+            os.utime(pickle_file)
+        except Exception:
+            return None
+
+        return data
+
+    def put(self, key: str, data) -> None:
+        """
+        Write a data set to the cache and then prune the cache to the disk budget. If the data set
+        cannot be written, any files written for it are removed before the error is raised.
+
+        Parameters
+        ----------
+        key: str
+            Key of the data set
+        data
+            Data set to be cached
+
+        Returns
+        -------
+        None
+        """
+        pickle_file = self.cache_dir / f'{key}.pkl'
+        netcdf_file = self.cache_dir / f'{key}.nc'
+        written = []
+
+        try:
+            if isinstance(getattr(data, 'df', None), xa.Dataset):
+                temporary_file = self.cache_dir / f'{key}.nc.{os.getpid()}.tmp'
+                written.append(temporary_file)
+                data.df.to_netcdf(temporary_file)
+                os.replace(temporary_file, netcdf_file)
+                # the pickle file of an earlier entry would not match the new netCDF file
+                written += [netcdf_file, pickle_file]
+
+                # pickle everything except the grid, which is in the netCDF file
+                data = copy.copy(data)
+                data.df = None
+
+            temporary_file = self.cache_dir / f'{key}.pkl.{os.getpid()}.tmp'
+            written.append(temporary_file)
+            with open(temporary_file, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_file, pickle_file)
+        except Exception:
+            for filename in written:
+                filename.unlink(missing_ok=True)
+            raise
+
+        self.prune()
+
+    def prune(self) -> None:
+        """
+        Remove the least recently used data sets until the files in the cache fit in the disk budget.
+
+        Returns
+        -------
+        None
+        """
+        entries = {}
+        for filename in list(self.cache_dir.glob('*.pkl')) + list(self.cache_dir.glob('*.nc')):
+            try:
+                status = filename.stat()
+            except FileNotFoundError:
+                continue
+            files, size, last_used = entries.get(filename.stem, ([], 0, 0.0))
+            entries[filename.stem] = (files + [filename], size + status.st_size, max(last_used, status.st_mtime))
+
+        total_bytes = sum(size for _, size, _ in entries.values())
+        for files, size, _ in sorted(entries.values(), key=lambda entry: entry[2]):
+            if total_bytes <= self.max_bytes:
+                break
+            for filename in files:
+                filename.unlink(missing_ok=True)
+            total_bytes -= size
+
+    def clear(self) -> None:
+        """
+        Remove all data sets from the cache
+
+        Returns
+        -------
+        None
+        """
+        for filename in list(self.cache_dir.glob('*.pkl')) + list(self.cache_dir.glob('*.nc')):
+            filename.unlink()
+
+
+class DatasetCache:
+    """
+    An in-memory cache of data sets that have been read in, so that a data set used in many places,
+    for example on many pages of a dashboard, need only be read once. Data sets are keyed by the
+    reader, the metadata, the reader keyword arguments and the modification times and sizes of the
+    files in the data directory, so a data set is read again if any of those change. Copies of the
+    data sets made by :func:`share_dataset` are stored and handed out, so changes made to a data set
+    after it was read do not affect the cache, while the data arrays themselves are not copied. When
+    the data sets in the cache exceed the memory budget, the least recently used are discarded.
+    Optionally, a :class:`PersistentDatasetCache` can sit behind the in-memory cache so that data sets
+    are kept between runs.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_SIZE, persistent_cache: PersistentDatasetCache = None):
+        """
+        Create an empty :class:`DatasetCache`
+
+        Parameters
+        ----------
+        max_bytes: int
+            Memory budget of the cache in bytes
+        persistent_cache: PersistentDatasetCache
+            Optional on-disk cache which is checked when a data set is not in memory and to which
+            all data sets added to the cache are written
+
+        Attributes
+        ----------
+        max_bytes: int
+            Memory budget of the cache in bytes
+        persistent_cache: PersistentDatasetCache
+            On-disk cache, or None
+        total_bytes: int
+            Estimated size in bytes of all the data sets in the cache
+        memory_hits: int
+            Number of data sets found in memory
+        disk_hits: int
+            Number of data sets found in the persistent cache
+        misses: int
+            Number of data sets found in neither
+        """
+        self.max_bytes = max_bytes
+        self.persistent_cache = persistent_cache
+        self.total_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hits(self) -> int:
+        """
+        Number of data sets found in memory or in the persistent cache
+        """
+        return self.memory_hits + self.disk_hits
+
+    def make_key(self, reader_name: str, directory: Path, metadata: CombinedMetadata, kwargs: dict) -> str:
+        """
+        Make the key that identifies a data set read by a particular reader from a particular directory.
+        If there is a persistent cache, its key is used.
+
+        Parameters
+        ----------
+        reader_name: str
+            Name of the reader
+        directory: Path
+            Directory from which the data set is read
+        metadata: CombinedMetadata
+            Metadata of the data set
+        kwargs: dict
+            Keyword arguments passed to the reader
+
+        Returns
+        -------
+        str
+            Hexadecimal digest identifying the data set
+        """
+        if self.persistent_cache is not None:
+            return self.persistent_cache.make_key(reader_name, directory, metadata, kwargs)
+        return make_dataset_key(reader_name, directory, metadata, kwargs)
+
+    def get(self, key: str):
+        """
+        Get a copy of a data set from the cache
+
+        Parameters
+        ----------
+        key: str
+            Key of the data set
+
+        Returns
+        -------
+        Copy of the data set or None if the data set is not in the cache
+        """
+        if key in self._entries:
+            self.memory_hits += 1
+            self._entries.move_to_end(key)
+            return share_dataset(self._entries[key][0])
+
+        data = None
+        if self.persistent_cache is not None:
+            data = self.persistent_cache.get(key)
+
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._store(key, data)
+        return data
+
+    def put(self, key: str, data) -> None:
+        """
+        Add a copy of a data set to the cache, and to the persistent cache if there is one. Data sets
+        larger than the whole memory budget are not kept in memory.
+
+        Parameters
+        ----------
+        key: str
+            Key of the data set
+        data
+            Data set to be cached
+
+        Returns
+        -------
+        None
+        """
+        if self.persistent_cache is not None:
+            self.persistent_cache.put(key, data)
+
+        self._store(key, data)
+
+    def _store(self, key: str, data) -> None:
+        """
+        Add a copy of a data set to the in-memory cache, discarding the least recently used data sets if
+        the memory budget is exceeded.
+
+        Parameters
+        ----------
+        key: str
+            Key of the data set
+        data
+            Data set to be cached
+
+        Returns
+        -------
+        None
+        """
+        size = estimate_size(data)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self.total_bytes -= self._entries.pop(key)[1]
+
+        self._entries[key] = (share_dataset(data), size)
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes:
+            _, (_, removed_size) = self._entries.popitem(last=False)
+            self.total_bytes -= removed_size
+
+    def clear(self) -> None:
+        """
+        Remove all data sets from the in-memory cache
+
+        Returns
+        -------
+        None
+        """
+        self._entries.clear()
+        self.total_bytes = 0
+
+
 class DataSet:
     """
     A :class:`.DataSet` contains *metadata* for a single dataset (one that might be split across multiple
@@ -168,7 +691,7 @@ class DataSet:
 
         return reader_fn
 
-    def read_dataset(self, out_dir: Union[List[Path], Path], **kwargs):
+    def read_dataset(self, out_dir: Union[List[Path], Path], dataset_cache: DatasetCache = None, **kwargs):
         """
         Read in the dataset and output an object of the appropriate type.
 
@@ -176,6 +699,8 @@ class DataSet:
         ----------
         out_dir : Path
             Directory in which the data are to be found (dictated by the Collection)
+        dataset_cache : DatasetCache
+            Optional cache of data sets which have already been read
 
         Returns
         -------
@@ -190,7 +715,14 @@ class DataSet:
         success = False
         for dir in out_dir:
             try:
-                self.data = reader_fn(dir, self.metadata, **kwargs)
+                if dataset_cache is None:
+                    self.data = reader_fn(dir, self.metadata, **kwargs)
+                else:
+                    key = dataset_cache.make_key(self.metadata['reader'], dir, self.metadata, kwargs)
+                    self.data = dataset_cache.get(key)
+                    if self.data is None:
+                        self.data = reader_fn(dir, self.metadata, **kwargs)
+                        dataset_cache.put(key, self.data)
                 success = True
             except Exception as e:
                 exceptions.append(str(e))
@@ -209,13 +741,16 @@ class DataCollection:
     gridded data.
     """
 
-    def __init__(self, metadata: dict):
+    def __init__(self, metadata: dict, validate: bool = True):
         """
         Create :class:`.DataCollection` from a metadata dictionary.
 
         Parameters
         ----------
         metadata : dict
+            Dictionary containing the collection metadata and, optionally, a list of dataset metadata
+        validate: bool
+            Set to False to skip validation of metadata that have already been validated.
 
         Attributes
         ----------
@@ -233,14 +768,14 @@ class DataCollection:
         for key in metadata:
             if key != 'datasets':
                 global_attributes[key] = metadata[key]
-        self.global_attributes = CollectionMetadata(global_attributes)
+        self.global_attributes = CollectionMetadata(global_attributes, validate=validate)
 
         for key in metadata:
             if key == 'datasets':
                 # for each dataset in the datasets section create a DataSet
                 for item in metadata['datasets']:
                     # Combine global metadata with individual dataset metadata
-                    dataset_metadata = DatasetMetadata(item)
+                    dataset_metadata = DatasetMetadata(item, validate=validate)
                     self.add_dataset(DataSet(dataset_metadata, self.global_attributes))
 
     def __str__(self):
@@ -268,14 +803,11 @@ class DataCollection:
         with open(filename, 'r') as f:
             metadata_from_file = json.load(f)
 
-        schema_path = Path(ROOT_DIR) / 'climind' / 'data_manager' / 'metadata_schema.json'
-        with open(schema_path) as f:
-            metadata_schema = json.load(f)
+        # The whole file, including the datasets, is validated here so the parts
+        # do not need to be validated again when the collection is built
+        validate_metadata(metadata_from_file, 'metadata_schema.json')
 
-        resolver = RefResolver(schema_path.as_uri(), metadata_schema)
-        validate(metadata_from_file, metadata_schema, resolver=resolver)
-
-        return DataCollection(metadata_from_file)
+        return DataCollection(metadata_from_file, validate=False)
 
     def _rebuild_metadata(self) -> dict:
         """
@@ -286,16 +818,12 @@ class DataCollection:
         dict
             A dictionary containing all the metadata from the :class:`.DataCollection`.
         """
-        rebuilt = self.global_attributes.metadata
+        rebuilt = self.global_attributes.to_dict()
         rebuilt['datasets'] = []
         for key in self.datasets:
-            rebuilt['datasets'].append(key.metadata.dataset.metadata)
+            rebuilt['datasets'].append(key.metadata.dataset.to_dict())
 
-        schema_path = Path(ROOT_DIR) / 'climind' / 'data_manager' / 'metadata_schema.json'
-        with open(schema_path) as f:
-            metadata_schema = json.load(f)
-        resolver = RefResolver(schema_path.as_uri(), metadata_schema)
-        validate(rebuilt, metadata_schema, resolver=resolver)
+        validate_metadata(rebuilt, 'metadata_schema.json')
 
         return rebuilt
 
@@ -349,18 +877,33 @@ class DataCollection:
         if not self.global_attributes.match_metadata(metadata_to_match):
             return None
 
-        out_collection = DataCollection(self.global_attributes.metadata)
+        matched = [ds for ds in self.datasets if ds.match_metadata(metadata_to_match)]
 
-        at_least_one_match = False
+        if len(matched) == 0:
+            return None
 
-        for ds in self.datasets:
-            if ds.match_metadata(metadata_to_match):
-                out_collection.add_dataset(ds)
-                at_least_one_match = True
+        return self.view(matched)
 
-        if not at_least_one_match:
-            return None
+    def view(self, datasets: List[DataSet]):
+        """
+        Make a lightweight :class:`DataCollection` containing a subset of the data sets in this
+        collection. The collection metadata and the :class:`DataSet` objects are shared with this
+        collection rather than being copied and validated again. The collection metadata are forked,
+        so changes made to the metadata of the view do not affect this collection.
 
+        Parameters
+        ----------
+        datasets: List[DataSet]
+            Data sets from this collection that are to be included in the view
+
+        Returns
+        -------
+        DataCollection
+            :class:`DataCollection` containing the specified data sets
+        """
+        out_collection = DataCollection.__new__(DataCollection)
+        out_collection.global_attributes = self.global_attributes.fork()
+        out_collection.datasets = list(datasets)
         return out_collection
 
     def get_collection_dir(self, data_dir: Path) -> Path:
@@ -399,7 +942,33 @@ class DataCollection:
         for key in self.datasets:
             key.download(collection_dir)
 
-    def read_datasets(self, out_dir: Union[Path, List[Path]], **kwargs) -> list:
+    def dataset_keys(self, out_dir: Union[Path, List[Path]], **kwargs) -> List[str]:
+        """
+        Make the keys that identify each of the data sets in the :class:`DataCollection` as they would be
+        read from a directory, see :func:`make_dataset_key`. The keys change when any of the files in the
+        collection directory change, so they can be used to tell whether anything made from the data
+        sets is out of date without reading them.
+
+        Parameters
+        ----------
+        out_dir : Path
+            Directory in which the datasets are found
+        kwargs
+            Keyword arguments that would be passed to the readers
+
+        Returns
+        -------
+        List[str]
+            Keys for each data set in each of the directories
+        """
+        if type(out_dir) is not list:
+            out_dir = [out_dir]
+        collection_dirs = [x / self.global_attributes['name'] for x in out_dir]
+
+        return [make_dataset_key(dataset.metadata['reader'], collection_dir, dataset.metadata, kwargs)
+                for dataset in self.datasets for collection_dir in collection_dirs]
+
+    def read_datasets(self, out_dir: Union[Path, List[Path]], dataset_cache: DatasetCache = None, **kwargs) -> list:
         """
         Read all the datasets described by :class:`.DataSet` objects in the :class:`DataCollection`
 
@@ -407,6 +976,8 @@ class DataCollection:
         ----------
         out_dir : Path
             Directory in which the datasets are found
+        dataset_cache : DatasetCache
+            Optional cache of data sets which have already been read
 
         Returns
         -------
@@ -422,7 +993,7 @@ class DataCollection:
 
         for dataset in self.datasets:
             try:
-                read_in_dataset = dataset.read_dataset(collection_dir, **kwargs)
+                read_in_dataset = dataset.read_dataset(collection_dir, dataset_cache=dataset_cache, **kwargs)
             except Exception as e:
                 raise RuntimeError(f"Failed to read {dataset.metadata['name']} with error message {e}")
             else:
@@ -431,6 +1002,122 @@ class DataCollection:
         return all_datasets
 
 
+class MetadataIndex:
+    """
+    An inverted index of the metadata of the data sets in a :class:`DataArchive`. For every metadata
+    key, the index holds posting lists which map each value of that key to the identifiers of the
+    data sets that have that value. Selections are made by taking the union of the posting lists
+    for the requested values of each key and the intersection across keys.
+
+    Data sets that do not have a key are never rejected on that key, in keeping with
+    :meth:`.BaseMetadata.match_metadata`. Data sets whose value for a key cannot be indexed,
+    because it is a list or because the collection and data set metadata have different values,
+    are checked against the full metadata instead.
+    """
+
+    def __init__(self):
+        """
+        Create an empty :class:`MetadataIndex`
+
+        Attributes
+        ----------
+        entries: list
+            List of (collection name, position in collection) pairs. A data set's identifier is its
+            position in this list.
+        postings: dict
+            For each key, a dictionary mapping each value to the set of identifiers with that value
+        unindexed: dict
+            For each key, the set of identifiers whose value could not be indexed
+        with_key: dict
+            For each key, the set of identifiers of data sets which have that key
+        """
+        self.entries = []
+        self.postings = {}
+        self.unindexed = {}
+        self.with_key = {}
+
+    def add_collection(self, name: str, data_collection: DataCollection) -> None:
+        """
+        Add all the data sets in a :class:`DataCollection` to the index.
+
+        Parameters
+        ----------
+        name: str
+            Name of the collection
+        data_collection: DataCollection
+            Collection to be indexed
+
+        Returns
+        -------
+        None
+        """
+        for position, ds in enumerate(data_collection.datasets):
+            identifier = len(self.entries)
+            self.entries.append((name, position))
+
+            values = {}
+            for metadata in [ds.metadata.collection.metadata, ds.metadata.dataset.metadata]:
+                for key in metadata:
+                    values.setdefault(key, []).append(metadata[key])
+
+            for key in values:
+                self.with_key.setdefault(key, set()).add(identifier)
+
+                value = values[key][0]
+                indexable = all(v == value for v in values[key])
+                try:
+                    hash(value)
+                except TypeError:
+                    indexable = False
+
+                if indexable:
+                    self.postings.setdefault(key, {}).setdefault(value, set()).add(identifier)
+                else:
+                    self.unindexed.setdefault(key, set()).add(identifier)
+
+    def query(self, metadata_to_match: dict) -> tuple:
+        """
+        Find the data sets that match the metadata.
+
+        Parameters
+        ----------
+        metadata_to_match: dict
+            Metadata to be matched. For each requirement, there should be a key-value or key-list pair
+
+        Returns
+        -------
+        tuple
+            Set of identifiers of matching data sets and set of identifiers of data sets that must
+            still be checked against the full metadata
+        """
+        matches = set(range(len(self.entries)))
+        to_check = set()
+
+        for key in metadata_to_match:
+            if key not in self.with_key:
+                continue
+
+            requested = metadata_to_match[key]
+            if not isinstance(requested, list):
+                requested = [requested]
+
+            key_postings = self.postings.get(key, {})
+            unindexed = self.unindexed.get(key, set())
+
+            selected = matches - self.with_key[key]
+            for value in requested:
+                try:
+                    selected |= key_postings.get(value, set())
+                except TypeError:
+                    pass
+            selected |= unindexed
+
+            matches &= selected
+            to_check |= unindexed
+
+        return matches, to_check & matches
+
+
 class DataArchive:
     """
     A set of :class:`DataCollection` objects. A class:`DataArchive` is the starting point for
@@ -446,8 +1133,17 @@ class DataArchive:
         ----------
         collections : dict
             A dictionary containing the :class:`.DataCollection` objects in the archive
+        query_log : list
+            List of (metadata_to_match, number of data sets selected, time taken in seconds)
+            for each call to :meth:`select`
+        dataset_cache : DatasetCache
+            Optional cache of data sets which have already been read. Archives made by :meth:`select`
+            share the cache of the archive they were selected from.
         """
         self.collections = {}
+        self.query_log = []
+        self.dataset_cache = None
+        self._index = None
 
     def __str__(self):
         out_str = ''
@@ -471,11 +1167,28 @@ class DataArchive:
         None
         """
         self.collections[data_collection.global_attributes['name']] = data_collection
+        self._index = None
+
+    def get_index(self) -> MetadataIndex:
+        """
+        Get the :class:`MetadataIndex` of the archive, building it if the archive has changed
+        since it was last built.
+
+        Returns
+        -------
+        MetadataIndex
+        """
+        if self._index is None:
+            self._index = MetadataIndex()
+            for name in self.collections:
+                self._index.add_collection(name, self.collections[name])
+        return self._index
 
     def select(self, metadata_to_match: dict):
         """
         Select datasets from the :class:`DataArchive` that meet the metadata requirements specified
-        in the metadata_to_match dictionary.
+        in the metadata_to_match dictionary. The selected collections are views which share
+        their metadata and data sets with this archive.
 
         Parameters
         ----------
@@ -486,27 +1199,126 @@ class DataArchive:
         DataArchive
             Returns :class:`DataArchive` containing only data that match the metadata_to_match
         """
+        start = time.perf_counter()
+
+        index = self.get_index()
+        matches, to_check = index.query(metadata_to_match)
+
+        positions_by_collection = {}
+        for identifier in sorted(matches):
+            name, position = index.entries[identifier]
+            if identifier in to_check:
+                if not self.collections[name].datasets[position].match_metadata(metadata_to_match):
+                    continue
+            positions_by_collection.setdefault(name, []).append(position)
 
         out_arch = DataArchive()
+        out_arch.dataset_cache = self.dataset_cache
 
-        for c in self.collections:
-            selected_collection = self.collections[c].match_metadata(metadata_to_match)
-            if selected_collection is not None:
-                out_arch.add_collection(selected_collection)
+        for name in positions_by_collection:
+            collection = self.collections[name]
+            out_arch.add_collection(
+                collection.view([collection.datasets[position] for position in positions_by_collection[name]])
+            )
+
+        elapsed = time.perf_counter() - start
+        n_selected = sum(len(positions) for positions in positions_by_collection.values())
+        self.query_log.append((metadata_to_match, n_selected, elapsed))
+        logging.debug(f"Selected {n_selected} data sets in {elapsed:.6f}s matching {metadata_to_match}")
 
         return out_arch
 
+    def slowest_queries(self, number: int = 5) -> list:
+        """
+        Get the slowest selections made from this archive.
+
+        Parameters
+        ----------
+        number: int
+            Number of selections to return
+
+        Returns
+        -------
+        list
+            List of (metadata_to_match, number of data sets selected, time taken in seconds), slowest first
+        """
+        return sorted(self.query_log, key=lambda entry: entry[2], reverse=True)[0:number]
+
     @staticmethod
-    def from_directory(path_to_dir: Union[List[Path], Path]):
+    def load_index(index_file: Path) -> dict:
+        """
+        Load the persistent index of parsed metadata files. If the file does not exist, or was
+        written by a different version of the index or with different schemas, an empty index
+        is returned.
+
+        Parameters
+        ----------
+        index_file: Path
+            Path of the index file
+
+        Returns
+        -------
+        dict
+            Dictionary keyed by metadata file path. Each entry contains the modification time, size
+            and hash of the file along with the validated metadata it contains.
+        """
+        if index_file is None or not index_file.exists():
+            return {}
+
+        try:
+            with open(index_file, 'rb') as f:
+                index = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return {}
+
+        if index.get('version') != INDEX_VERSION or index.get('schema') != get_schema_signature():
+            return {}
+
+        return index['files']
+
+    @staticmethod
+    def save_index(index_file: Path, files: dict) -> None:
+        """
+        Save the persistent index of parsed metadata files.
+
+        Parameters
+        ----------
+        index_file: Path
+            Path of the index file
+        files: dict
+            Dictionary keyed by metadata file path as returned by :meth:`load_index`
+
+        Returns
+        -------
+        None
+        """
+        index = {'version': INDEX_VERSION, 'schema': get_schema_signature(), 'files': files}
+
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        temporary_file = index_file.with_name(f'{index_file.name}.{os.getpid()}.tmp')
+        with open(temporary_file, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file, index_file)
+
+    @staticmethod
+    def from_directory(path_to_dir: Union[List[Path], Path], index_file: Path = None):
         """
         Create a :class:`DataArchive` from a directory of metadata. The directory should contain a
         set of json files each of which contains a set of metadata describing a :class:`DataCollection`
 
+        If an index_file is given, the parsed and validated contents of each metadata file are
+        stored there, keyed by file path. On later calls, files whose modification time and size, or
+        contents, are unchanged are taken from the index rather than being parsed and validated again.
+        The same index file can be used for different sets of directories: entries for files outside
+        the directories being read are kept.
+
         Parameters
         ----------
         path_to_dir : Path or List[Path]
             Path to the directory containing the metadata files that will be used
             to populate the :class:`DataArchive` or a list of such Paths.
+        index_file : Path
+            Optional path of the persistent index file.
         Returns
         -------
         DataArchive
@@ -518,11 +1330,48 @@ class DataArchive:
         if type(path_to_dir) is not list:
             path_to_dir = [path_to_dir]
 
+        cached_files = DataArchive.load_index(index_file)
+        indexed_files = {}
+        index_changed = False
+
         for single_path in path_to_dir:
             for json_file in single_path.rglob('*.json', recurse_symlinks=True):
-                dc = DataCollection.from_file(json_file)
+
+                if index_file is None:
+                    dc = DataCollection.from_file(json_file)
+                    out_archive.add_collection(dc)
+                    continue
+
+                file_key = str(json_file.resolve())
+                file_stat = json_file.stat()
+                entry = cached_files.get(file_key)
+
+                if entry is None or entry['mtime'] != file_stat.st_mtime_ns or entry['size'] != file_stat.st_size:
+                    digest = file_digest(json_file)
+                    if entry is None or entry['hash'] != digest:
+                        with open(json_file, 'r') as f:
+                            metadata_from_file = json.load(f)
+                        validate_metadata(metadata_from_file, 'metadata_schema.json')
+                        entry = {'metadata': metadata_from_file}
+                    entry = {'mtime': file_stat.st_mtime_ns, 'size': file_stat.st_size,
+                             'hash': digest, 'metadata': entry['metadata']}
+                    index_changed = True
+
+                indexed_files[file_key] = entry
+
+                # the index holds its own copy of the metadata which must not be changed
+                dc = DataCollection(copy.deepcopy(entry['metadata']), validate=False)
                 out_archive.add_collection(dc)
 
+        if index_file is not None:
+            # keep the entries for other directories, dropping those for files that were not found here
+            scanned_dirs = [str(single_path.resolve()) + os.sep for single_path in path_to_dir]
+            merged_files = {file_key: entry for file_key, entry in cached_files.items()
+                            if not file_key.startswith(tuple(scanned_dirs))}
+            merged_files.update(indexed_files)
+            if index_changed or merged_files.keys() != cached_files.keys():
+                DataArchive.save_index(index_file, merged_files)
+
         return out_archive
 
     def download(self, out_dir: Path) -> None:
@@ -540,6 +1389,26 @@ class DataArchive:
         for key in self.collections:
             self.collections[key].download(out_dir)
 
+    def dataset_keys(self, out_dir: Path, **kwargs) -> List[str]:
+        """
+        Make the keys that identify each of the data sets in the :class:`DataArchive`, see
+        :meth:`DataCollection.dataset_keys`.
+
+        Parameters
+        ----------
+        out_dir : Path
+            Path of directory containing the data
+
+        Returns
+        -------
+        List[str]
+            Keys for all the data sets in the archive
+        """
+        all_keys = []
+        for key in sorted(self.collections):
+            all_keys.extend(self.collections[key].dataset_keys(out_dir, **kwargs))
+        return all_keys
+
     def read_datasets(self, out_dir: Path, **kwargs) -> list:
         """
         Read all the datasets in the :class:`DataArchive`.
@@ -556,7 +1425,7 @@ class DataArchive:
         all_datasets = []
 
         for key in self.collections:
-            these_datasets = self.collections[key].read_datasets(out_dir, **kwargs)
+            these_datasets = self.collections[key].read_datasets(out_dir, dataset_cache=self.dataset_cache, **kwargs)
             for ds in these_datasets:
                 all_datasets.append(ds)
 
@@ -15,18 +15,21 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import copy
+import hashlib
 
 import pandas as pd
 import pkg_resources
-import itertools
 import xarray as xa
 import numpy as np
 import logging
+import warnings
 import regionmask
+from scipy import sparse
+from scipy.stats import rankdata
 from pathlib import Path
 from datetime import datetime
 
-from typing import List, Tuple, Callable
+from typing import List, Tuple, Callable, Optional
 
 from climind.data_manager.metadata import CombinedMetadata
 import climind.data_types.timeseries as ts
@@ -109,26 +112,348 @@ def simple_regrid(ingrid: np.ndarray, lon0: float, lat0: float, dx: float, targe
     np.ndarray
         Returns regridded array.
     """
-    nlat = int(180 / target_dy)
-    nlon = int(360 / target_dy)
-    outgrid = np.zeros((nlat, nlon))
+    regridder = Regridder(lon0, lat0, dx, ingrid.shape, target_dy, periodic=False)
+    return regridder.apply(ingrid[np.newaxis, :, :])[0, :, :]
 
-    for xlon, ylat in itertools.product(range(nlon), range(nlat)):
-        # Longitudes
-        y0 = -180.0
-        transfer_lon, nlonsteps, lolon, hilon = get_1d_transfer(lon0, dx, y0, target_dy, xlon)
-        # Latitudes
-        y0 = -90.0
-        transfer_lat, nlatsteps, lolat, hilat = get_1d_transfer(lat0, dx, y0, target_dy, ylat)
 
-        transfer_lon = np.repeat(np.reshape(transfer_lon, (1, nlonsteps)), nlatsteps, 0)
-        transfer_lat = np.repeat(np.reshape(transfer_lat, (nlatsteps, 1)), nlonsteps, 1)
+class Regridder:
+    """
+    A :class:`Regridder` holds a precomputed sparse matrix of weights which maps a regular
+    latitude-longitude grid onto a regular global target grid. Each target grid cell is
+    the average of the original grid cells that fall within it, weighted by their overlap
+    as calculated by :func:`get_1d_transfer`. The matrix depends only on the description
+    of the two grids so it can be built once, optionally cached to disk, and then applied
+    to a whole stack of fields in a single sparse matrix multiplication.
+    """
+
+    def __init__(self, lon0: float, lat0: float, dx: float, source_shape: Tuple[int, int],
+                 target_dy: float, periodic: bool = True, cache_dir: Path = None):
+        """
+        Create a :class:`Regridder` from a description of the original and target grids
+
+        Parameters
+        ----------
+        lon0: float
+            Longitude of the western edge of the zero-indexed grid cell in the original grid
+        lat0: float
+            Latitude of the southern edge of the zero-indexed grid cell in the original grid
+        dx: float
+            Grid spacing of the original grid in degrees
+        source_shape: Tuple[int, int]
+            Number of latitudes and longitudes in the original grid
+        target_dy: float
+            Grid spacing of the target grid in degrees. The target grid is global starting at
+            -180 longitude and -90 latitude.
+        periodic: bool
+            If True, original grid cells beyond the last longitude wrap around to the first.
+        cache_dir: Path
+            If set, the weight matrix is read from, or written to, this directory
+        """
+        self.lon0 = lon0
+        self.lat0 = lat0
+        self.dx = dx
+        self.source_shape = (int(source_shape[0]), int(source_shape[1]))
+        self.target_dy = target_dy
+        self.periodic = periodic
+        self.target_shape = (int(180 / target_dy), int(360 / target_dy))
+
+        self.weights = None
+
+        cache_file = None
+        if cache_dir is not None:
+            cache_file = Path(cache_dir) / f'regridder_{self.get_signature()}.npz'
+            if cache_file.exists():
+                self.weights = sparse.load_npz(cache_file).tocsr()
+
+        if self.weights is None:
+            self.weights = self.build_weights()
+            if cache_file is not None:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                sparse.save_npz(cache_file, self.weights)
+
+        self.weight_sum = np.asarray(self.weights.sum(axis=1))
+
+    def get_signature(self) -> str:
+        """
+        Get a short hash that uniquely identifies the combination of original and target grids
+
+        Returns
+        -------
+        str
+            Hexadecimal hash of the grid descriptions
+        """
+        description = (f'{self.lon0!r} {self.lat0!r} {self.dx!r} {self.source_shape!r} '
+                       f'{self.target_dy!r} {self.periodic!r}')
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()[0:16]
+
+    @staticmethod
+    def transfer_matrix(zero_point_original: float, grid_space_original: float, number_original: int,
+                        zero_point_target: float, grid_space_target: float, number_target: int,
+                        periodic: bool) -> sparse.csr_matrix:
+        """
+        Build the one-dimensional transfer matrix of shape (number_target, number_original)
+        in which each row contains the overlaps of the original grid cells with one
+        target grid cell.
+
+        Parameters
+        ----------
+        zero_point_original: float
+            longitude or latitude of the zero-indexed grid cell
+        grid_space_original: float
+            grid spacing in degrees
+        number_original: int
+            number of grid cells in the original grid
+        zero_point_target: float
+            longitude or latitude of the zero-indexed grid cells in the target grid
+        grid_space_target: float
+            grid spacing in degrees of the target grid
+        number_target: int
+            number of grid cells in the target grid
+        periodic: bool
+            If True, indices beyond the end of the original grid wrap around to the start
+
+        Returns
+        -------
+        sparse.csr_matrix
+            Sparse transfer matrix
+        """
+        rows = []
+        columns = []
+        values = []
+        for index in range(number_target):
+            transfer, nsteps, low_index, high_index = get_1d_transfer(
+                zero_point_original, grid_space_original, zero_point_target, grid_space_target, index
+            )
+            indices = np.arange(low_index, high_index + 1)
+            if periodic:
+                indices = indices % number_original
+            elif indices[0] < 0 or indices[-1] >= number_original:
+                raise ValueError(f'Target grid cell {index} extends beyond the edge of the original grid')
+
+            rows.extend([index] * nsteps)
+            columns.extend(indices.tolist())
+            values.extend(transfer.tolist())
+
+        matrix = sparse.csr_matrix((values, (rows, columns)), shape=(number_target, number_original))
+        matrix.eliminate_zeros()
+
+        return matrix
+
+    def build_weights(self) -> sparse.csr_matrix:
+        """
+        Build the two-dimensional weight matrix, which maps the flattened original grid onto
+        the flattened target grid, from the outer product of the latitude and longitude
+        transfer matrices.
+
+        Returns
+        -------
+        sparse.csr_matrix
+            Sparse weight matrix of shape (number of target cells, number of original cells). The
+            weights are not normalised.
+        """
+        transfer_lat = self.transfer_matrix(self.lat0, self.dx, self.source_shape[0],
+                                            -90.0, self.target_dy, self.target_shape[0], False)
+        transfer_lon = self.transfer_matrix(self.lon0, self.dx, self.source_shape[1],
+                                            -180.0, self.target_dy, self.target_shape[1], self.periodic)
+        return sparse.kron(transfer_lat, transfer_lon, format='csr')
+
+    def apply(self, ingrid: np.ndarray, skipna: bool = False) -> np.ndarray:
+        """
+        Regrid a stack of fields
+
+        Parameters
+        ----------
+        ingrid: np.ndarray
+            Array of shape (ntime, nlat, nlon) on the original grid
+        skipna: bool
+            If False, any missing data in a target grid cell will give a missing value. If True,
+            the weights are renormalised to cover only the available data, and target grid cells
+            with no data are set to missing.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (ntime, target nlat, target nlon)
+        """
+        number_of_times = ingrid.shape[0]
+        if tuple(ingrid.shape[1:]) != self.source_shape:
+            raise ValueError(f'Grid of shape {ingrid.shape[1:]} does not match regridder '
+                             f'shape {self.source_shape}')
+
+        flat = np.asarray(ingrid, dtype=float).reshape(number_of_times, -1).T
+
+        if skipna:
+            valid = ~np.isnan(flat)
+            total = self.weights @ np.where(valid, flat, 0.0)
+            weight_sum = self.weights @ valid.astype(float)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                outgrid = np.where(weight_sum > 0, total / weight_sum, np.nan)
+        else:
+            outgrid = (self.weights @ flat) / self.weight_sum
+
+        return outgrid.T.reshape((number_of_times,) + self.target_shape)
+
+
+def block_transfer_weights(block_size: int) -> np.ndarray:
+    """
+    Get the one-dimensional weights of the transfer stencil used to regrid a grid whose grid-cell
+    centres lie on the boundaries of the target grid cells. There are block_size + 1 points
+    spanning each target grid cell and the two end points, which are shared with the neighbouring
+    target grid cells, get half weight.
+
+    Parameters
+    ----------
+    block_size: int
+        Number of original grid cells spanning one target grid cell
+
+    Returns
+    -------
+    np.ndarray
+        Array of weights of length block_size + 1
+    """
+    weights = np.ones(block_size + 1)
+    weights[0] = 0.5
+    weights[block_size] = 0.5
+    return weights
+
+
+def weighted_block_sum(in_array: np.ndarray, block_size: int, weights: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Calculate the weighted sum over overlapping blocks of block_size + 1 points along one axis of an
+    array. Consecutive blocks share their end points. The length of the axis should be a multiple of
+    block_size plus one.
+
+    Parameters
+    ----------
+    in_array: np.ndarray
+        Array to be summed
+    block_size: int
+        Step between the first points of consecutive blocks
+    weights: np.ndarray
+        Weights of length block_size + 1 to be applied to the points in each block
+    axis: int
+        Axis along which the blocks are summed
+
+    Returns
+    -------
+    np.ndarray
+        Array of weighted sums with the chosen axis reduced to (length - 1) / block_size
+    """
+    in_array = np.moveaxis(in_array, axis, -1)
+    number_of_blocks = (in_array.shape[-1] - 1) // block_size
+
+    main_blocks = in_array[..., 0:number_of_blocks * block_size]
+    main_blocks = main_blocks.reshape(in_array.shape[:-1] + (number_of_blocks, block_size))
+    block_sum = main_blocks @ weights[0:block_size]
+    block_sum += in_array[..., block_size::block_size] * weights[block_size]
+
+    return np.moveaxis(block_sum, -1, axis)
 
-        transfer = transfer_lat * transfer_lon
 
-        outgrid[ylat, xlon] = np.sum(ingrid[lolat:hilat + 1, lolon:hilon + 1] * transfer) / np.sum(transfer)
+def block_regrid(ingrid: np.ndarray, block_size: int, time_chunk: int = 12) -> np.ndarray:
+    """
+    Regrid a stack of fields to a coarser grid using a weighted average of the grid cells from the
+    original grid that fall within each target grid cell. The original grid is assumed to have
+    grid-cell centres that lie on the boundaries of the target grid cells, so that the first and
+    last latitudes are at the poles, as they are for ERA5 and JRA-55, and longitudes are assumed
+    to be periodic. Points on the boundaries are shared between neighbouring target grid cells and
+    get half weight. Any missing data in the stencil will give a missing value in the target grid cell.
+
+    The stencil is separable, so the regridding is done as two passes of weighted block sums, one
+    along each axis, applied to all time steps at once. Time steps are processed in chunks to
+    limit the memory required.
+
+    Parameters
+    ----------
+    ingrid: np.ndarray
+        Array of shape (ntime, nlat, nlon) to be regridded. nlat should be a multiple of block_size
+        plus one and nlon should be a multiple of block_size.
+    block_size: int
+        Number of original grid cells spanning one target grid cell
+    time_chunk: int
+        Number of time steps to regrid at one time
+
+    Returns
+    -------
+    np.ndarray
+        Regridded array of shape (ntime, (nlat - 1) / block_size, nlon / block_size)
+    """
+    number_of_times, number_of_lats, number_of_lons = ingrid.shape
+
+    if (number_of_lats - 1) % block_size != 0 or number_of_lons % block_size != 0:
+        raise ValueError(f'Grid of shape {number_of_lats}x{number_of_lons} cannot be regridded '
+                         f'in blocks of {block_size}')
+
+    weights = block_transfer_weights(block_size)
+    transfer_sum = np.sum(weights) ** 2
+
+    target_grid = np.zeros((number_of_times,
+                            (number_of_lats - 1) // block_size,
+                            number_of_lons // block_size))
+
+    for start in range(0, number_of_times, time_chunk):
+        end = min(start + time_chunk, number_of_times)
+
+        # add a column at the end that wraps around to the first longitude
+        enlarged_array = np.zeros((end - start, number_of_lats, number_of_lons + 1))
+        enlarged_array[:, :, 0:number_of_lons] = ingrid[start:end, :, :]
+        enlarged_array[:, :, number_of_lons] = ingrid[start:end, :, 0]
+
+        lat_sum = weighted_block_sum(enlarged_array, block_size, weights, axis=1)
+        target_grid[start:end, :, :] = weighted_block_sum(lat_sum, block_size, weights, axis=2) / transfer_sum
+
+    return target_grid
+
+
+def stencil_average(ingrid: np.ndarray, transfer: np.ndarray, lat_indices: np.ndarray,
+                    lon_indices: np.ndarray, time_chunk: int = 120) -> np.ndarray:
+    """
+    Regrid a stack of fields using a precomputed weighting stencil for each target grid cell,
+    ignoring missing data. Each target grid cell is the weighted average of the available data in
+    a small window of the original grid. Windows can overlap. Where no data are available in a
+    window the target grid cell is set to missing.
+
+    Parameters
+    ----------
+    ingrid: np.ndarray
+        Array of shape (ntime, nlat, nlon) to be regridded
+    transfer: np.ndarray
+        Array of weights of shape (target nlat, target nlon, window nlat, window nlon)
+    lat_indices: np.ndarray
+        Array of length target nlat giving the first latitude index of the window for each row
+        of the target grid
+    lon_indices: np.ndarray
+        Array of length target nlon giving the first longitude index of the window for each
+        column of the target grid
+    time_chunk: int
+        Number of time steps to regrid at one time
+
+    Returns
+    -------
+    np.ndarray
+        Regridded array of shape (ntime, target nlat, target nlon)
+    """
+    number_of_times = ingrid.shape[0]
+    window_shape = transfer.shape[2:]
+
+    target_grid = np.zeros((number_of_times, len(lat_indices), len(lon_indices)))
 
-    return outgrid
+    for start in range(0, number_of_times, time_chunk):
+        end = min(start + time_chunk, number_of_times)
+
+        windows = np.lib.stride_tricks.sliding_window_view(
+            np.asarray(ingrid[start:end], dtype=float), window_shape, axis=(1, 2)
+        )
+        windows = windows[:, lat_indices[:, np.newaxis], lon_indices[np.newaxis, :], :, :]
+
+        valid = ~np.isnan(windows)
+        total = np.sum(np.where(valid, windows, 0.0) * transfer, axis=(3, 4))
+        weight_sum = np.sum(valid * transfer, axis=(3, 4))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            target_grid[start:end] = np.where(weight_sum > 0, total / weight_sum, np.nan)
+
+    return target_grid
 
 
 def make_xarray(target_grid, times, latitudes, longitudes, variable: str = 'tas_mean') -> xa.Dataset:
@@ -199,27 +524,255 @@ def make_standard_grid(out_grid: np.ndarray, start_date: datetime, freq: str, nu
     return dataset
 
 
-def rank_array(in_array: np.ndarray) -> int:
+def rank_array(in_array: np.ndarray, method: str = 'min', ascending: bool = False) -> np.ndarray:
     """
-    Rank array
+    Rank array along its first axis. By default, the highest value is ranked 1. Missing data are
+    ignored when ranking and have a rank of NaN. The input array is not modified.
 
     Parameters
     ----------
     in_array: np.ndarray
         Array to be ranked
+    method: str
+        Method used to assign ranks to tied values. One of 'min', 'max', 'average', 'dense' or
+        'ordinal', as in scipy.stats.rankdata. Default is 'min', so that tied values share the
+        highest rank, as for the time series ranks.
+    ascending: bool
+        If True, the lowest value is ranked 1.
 
     Returns
     -------
-    int
+    np.ndarray
+        Array of the same shape as in_array containing the ranks
     """
-    in_array[np.isnan(in_array)] = -9999.9999
+    if ascending:
+        values = np.asarray(in_array, dtype=float)
+    else:
+        values = -np.asarray(in_array, dtype=float)
+
+    return rankdata(values, method=method, axis=0, nan_policy='omit')
 
-    ntime = len(in_array)
-    temp = in_array.argsort()
-    ranks = np.empty_like(temp)
-    ranks[temp] = np.arange(ntime)
-    rank = ntime - ranks
-    return rank
+
+def get_mask_signature(description: str, latitudes: np.ndarray, longitudes: np.ndarray) -> str:
+    """
+    Get a short hash that uniquely identifies a mask from a description of the shapes being
+    rasterised and the latitudes and longitudes of the grid
+
+    Parameters
+    ----------
+    description: str
+        Description of the shapes and how they are rasterised
+    latitudes: np.ndarray
+        Array of latitudes, shape (nlat)
+    longitudes: np.ndarray
+        Array of longitudes, shape (nlon)
+
+    Returns
+    -------
+    str
+        Hexadecimal hash
+    """
+    signature = hashlib.sha256(description.encode('utf-8'))
+    signature.update(np.ascontiguousarray(latitudes, dtype=np.float64).tobytes())
+    signature.update(np.ascontiguousarray(longitudes, dtype=np.float64).tobytes())
+    return signature.hexdigest()[0:16]
+
+
+def cached_mask(name: str, signature: str, builder: Callable, cache_dir: Path = None) -> np.ndarray:
+    """
+    Get a mask from the cache directory or, if it is not there, build it and write it to the
+    cache directory. Masks are stored as .npy files and memory-mapped when they are read.
+
+    Parameters
+    ----------
+    name: str
+        Name of the type of mask, used as the start of the filename
+    signature: str
+        Hash identifying the mask, as returned by :func:`get_mask_signature`
+    builder: Callable
+        Function, taking no arguments, which builds the mask
+    cache_dir: Path
+        If set, the mask is read from, or written to, this directory
+
+    Returns
+    -------
+    np.ndarray
+        The mask
+    """
+    if cache_dir is None:
+        return builder()
+
+    cache_file = Path(cache_dir) / f'{name}_{signature}.npy'
+    if cache_file.exists():
+        return np.load(cache_file, mmap_mode='r')
+
+    mask = builder()
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    temporary_file = cache_file.with_suffix('.npy.tmp')
+    with open(temporary_file, 'wb') as f:
+        np.save(f, mask)
+    temporary_file.replace(cache_file)
+
+    return mask
+
+
+def region_masks(regions, latitudes: np.ndarray, longitudes: np.ndarray, overlap: bool = True,
+                 cache_dir: Path = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rasterise regions onto a regular latitude-longitude grid. If a cache directory is given, the
+    masks are only calculated the first time they are needed for a particular set of shapes and grid.
+
+    Parameters
+    ----------
+    regions: Geodataframe
+        geopandas Geodataframe specifying the regions
+    latitudes: np.ndarray
+        Array of latitudes, shape (nlat)
+    longitudes: np.ndarray
+        Array of longitudes, shape (nlon)
+    overlap: bool
+        Set to True if the regions can overlap
+    cache_dir: Path
+        If set, the masks are read from, or written to, this directory
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Region numbers, which are the index of the Geodataframe, and boolean array of shape
+        (n_regions, nlat, nlon) which is True inside each region
+    """
+    latitudes = np.asarray(latitudes)
+    longitudes = np.asarray(longitudes)
+    region_numbers = np.asarray(regions.index)
+
+    description = hashlib.sha256()
+    for geometry in regions.geometry.to_wkb():
+        description.update(geometry)
+    description = f'{description.hexdigest()} {region_numbers.tolist()!r} {regions.crs} {overlap!r}'
+
+    def builder():
+        mask = regionmask.mask_3D_geopandas(regions, longitudes, latitudes, drop=False, overlap=overlap)
+        return mask.values
+
+    mask = cached_mask('regions', get_mask_signature(description, latitudes, longitudes), builder, cache_dir)
+
+    return region_numbers, mask
+
+
+def land_mask(latitudes: np.ndarray, longitudes: np.ndarray, cache_dir: Path = None) -> np.ndarray:
+    """
+    Get a land mask for a regular latitude-longitude grid from the Natural Earth 1:110m land polygons.
+    If a cache directory is given, the mask is only calculated the first time it is needed for a grid.
+
+    Parameters
+    ----------
+    latitudes: np.ndarray
+        Array of latitudes, shape (nlat)
+    longitudes: np.ndarray
+        Array of longitudes, shape (nlon)
+    cache_dir: Path
+        If set, the mask is read from, or written to, this directory
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array of shape (nlat, nlon), True over land
+    """
+    latitudes = np.asarray(latitudes)
+    longitudes = np.asarray(longitudes)
+
+    def builder():
+        land_110 = regionmask.defined_regions.natural_earth_v5_0_0.land_110
+        mask = land_110.mask_3D(longitudes, latitudes)
+        return mask.sel(region=0).values
+
+    signature = get_mask_signature('natural_earth_v5_0_0 land_110', latitudes, longitudes)
+
+    return cached_mask('land', signature, builder, cache_dir)
+
+
+class RegionalAverager:
+    """
+    A :class:`RegionalAverager` holds the area weights for a set of regions on a regular latitude-longitude
+    grid as an array of shape (n_regions, nlat, nlon). Each weight is the cosine of the latitude times the
+    region mask, times the land (or ocean) mask if required. The regions are rasterised once when the
+    :class:`RegionalAverager` is created, and the averages for all regions and all time steps are then
+    calculated in a single matrix multiplication.
+    """
+
+    def __init__(self, regions, latitudes: np.ndarray, longitudes: np.ndarray,
+                 land_only: bool = True, ocean_only: bool = False, cache_dir: Path = None):
+        """
+        Create a :class:`RegionalAverager` for a set of regions and a grid
+
+        Parameters
+        ----------
+        regions: Geodataframe
+            geopandas Geodataframe specifying the regions
+        latitudes: np.ndarray
+            Array of latitudes, shape (nlat)
+        longitudes: np.ndarray
+            Array of longitudes, shape (nlon)
+        land_only: bool
+            Set to True to average over land areas only
+        ocean_only: bool
+            Set to True to average over ocean areas only
+        cache_dir: Path
+            If set, the region and land masks are read from, or written to, this directory
+        """
+        if land_only and ocean_only:
+            raise RuntimeError('Selected both land_only and ocean_only. This combination is not allowed.')
+
+        latitudes = np.asarray(latitudes)
+        longitudes = np.asarray(longitudes)
+
+        self.region_numbers, mask = region_masks(regions, latitudes, longitudes, cache_dir=cache_dir)
+
+        weights = mask.astype(float) * np.cos(np.deg2rad(latitudes))[np.newaxis, :, np.newaxis]
+        if land_only or ocean_only:
+            land = land_mask(latitudes, longitudes, cache_dir=cache_dir)
+            weights = weights * (land if land_only else ~land)
+
+        self.shape = (len(latitudes), len(longitudes))
+        self.weights = weights
+        self.weight_sum = weights.reshape(len(self.region_numbers), -1).sum(axis=1)
+
+    def apply(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the area average and the fraction of the area covered by data in each region for
+        each time step. Missing data should be set to np.nan.
+
+        Parameters
+        ----------
+        data: np.ndarray
+            Array of shape (ntime, nlat, nlon)
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Area averages and coverage fractions, each of shape (n_regions, ntime). Where there are no
+            data in a region, the average is np.nan.
+        """
+        data = np.asarray(data, dtype=float)
+        if data.shape[1:] != self.shape:
+            raise ValueError(f'Data shape {data.shape[1:]} does not match the grid shape {self.shape}')
+
+        # flatten the grids so that the sums over all grid cells are matrix multiplications
+        data = data.reshape(data.shape[0], -1)
+        weights = self.weights.reshape(len(self.region_numbers), -1)
+
+        present = ~np.isnan(data)
+        sums = weights @ np.where(present, data, 0.0).T
+        covered = weights @ present.astype(float).T
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            averages = sums / covered
+            coverage = covered / self.weight_sum[:, np.newaxis]
+
+        averages[covered == 0] = np.nan
+
+        return averages, coverage
 
 
 class GridMonthly:
@@ -422,7 +975,8 @@ class GridMonthly:
 
         return output_grid
 
-    def calculate_regional_average(self, regions, region_number, land_only=True) -> ts.TimeSeriesMonthly:
+    def calculate_regional_average(self, regions, region_number, land_only=True,
+                                   cache_dir: Path = None) -> ts.TimeSeriesMonthly:
         """
         Calculate a regional average from the grid. The region is specified by a geopandas
         Geodataframe and the index (region_number) of the chosen shape. By default, the output
@@ -437,41 +991,21 @@ class GridMonthly:
         land_only: bool
             By defauly output is masked to land areas only, to calculate a full area average set
             land_only to False
+        cache_dir: Path
+            If set, the region and land masks are read from, or written to, this directory
 
         Returns
         -------
         ts.TimeSeriesMonthly
             Returns time series of area averages.
         """
-        mask = regionmask.mask_3D_geopandas(regions,
-                                            self.df.longitude,
-                                            self.df.latitude, drop=False, overlap=True)
-        r1 = mask.sel(region=region_number)
-        selected_variable = self.df.tas_mean.where(r1)
-
-        if land_only:
-            land_110 = regionmask.defined_regions.natural_earth_v5_0_0.land_110
-            land_mask = land_110.mask_3D(self.df.longitude, self.df.latitude)
-            land_mask = land_mask.sel(region=0)
-            selected_variable = selected_variable.where(land_mask)
-
-        weights = np.cos(np.deg2rad(selected_variable.latitude))
-        regional_ts = selected_variable.weighted(weights).mean(dim=("latitude", "longitude"))
-
-        # It's such a struggle extracting time information from these blasted xarrays
-        years = regional_ts.time.dt.year.data.tolist()
-        months = regional_ts.time.dt.month.data.tolist()
-        data = regional_ts.values.tolist()
-
-        timeseries_metadata = copy.deepcopy(self.metadata)
-        timeseries_metadata['type'] = 'timeseries'
-        timeseries_metadata['history'].append('Calculated area-average')
-        out_series = ts.TimeSeriesMonthly(years, months, data, timeseries_metadata)
-
-        return out_series
+        averager = RegionalAverager(regions.loc[[region_number]], self.df.latitude, self.df.longitude,
+                                    land_only=land_only, cache_dir=cache_dir)
+        return self.calculate_regional_averages(averager, variable='tas_mean', threshold=None)[0]
 
     def calculate_regional_average_missing(self, regions, region_number, threshold=0.3,
-                                           land_only=True, ocean_only=False) -> ts.TimeSeriesMonthly:
+                                           land_only=True, ocean_only=False,
+                                           cache_dir: Path = None) -> ts.TimeSeriesMonthly:
         """
         Calculate a regional average from the grid. The region is specified by a geopandas
         Geodataframe and the index (region_number) of the chosen shape. By default, the output
@@ -488,63 +1022,63 @@ class GridMonthly:
         land_only: bool
             By defauly output is masked to land areas only, to calculate a full area average set
             land_only to False
+        ocean_only: bool
+            Set to True to mask the output to ocean areas only
+        cache_dir: Path
+            If set, the region and land masks are read from, or written to, this directory
 
         Returns
         -------
         ts.TimeSeriesMonthly
             Returns time series of area averages.
         """
-        if land_only and ocean_only:
-            raise RuntimeError('Selected both land_only and ocean_only. This combination is not allowed.')
+        averager = RegionalAverager(regions.loc[[region_number]], self.df.latitude, self.df.longitude,
+                                    land_only=land_only, ocean_only=ocean_only, cache_dir=cache_dir)
+        return self.calculate_regional_averages(averager, threshold=threshold)[0]
 
-        main_variable_list = list(self.df.keys())
-        main_variable = main_variable_list[0]
+    def calculate_regional_averages(self, averager: RegionalAverager, variable: str = None,
+                                    threshold: Optional[float] = 0.3) -> List[ts.TimeSeriesMonthly]:
+        """
+        Calculate area averages from the grid for all the regions in a :class:`RegionalAverager`. The
+        same :class:`RegionalAverager` can be reused for any grids on the same latitudes and longitudes.
 
-        mask = regionmask.mask_3D_geopandas(regions,
-                                            self.df.longitude,
-                                            self.df.latitude, drop=False, overlap=True)
-        r1 = mask.sel(region=region_number)
-        selected_variable = self.df[main_variable].where(r1)
-
-        # copy the variable array, set values to one and missing data to zero then mask that
-        missing = copy.deepcopy(self.df[main_variable])
-        replacer = (np.isnan(missing.data))
-        missing.data[:, :, :] = 1.0
-        missing.data[replacer] = 0.0
-        missing = missing.where(r1)
-
-        if land_only:
-            land_110 = regionmask.defined_regions.natural_earth_v5_0_0.land_110
-            land_mask = land_110.mask_3D(self.df.longitude, self.df.latitude)
-            land_mask = land_mask.sel(region=0)
-            selected_variable = selected_variable.where(land_mask)
-            missing = missing.where(land_mask)
-
-        if ocean_only:
-            land_110 = regionmask.defined_regions.natural_earth_v5_0_0.land_110
-            land_mask = land_110.mask_3D(self.df.longitude, self.df.latitude)
-            land_mask = land_mask.sel(region=0)
-            land_mask.data = ~land_mask.data
-            selected_variable = selected_variable.where(land_mask)
-            missing = missing.where(land_mask)
-
-        # Calculate the area weighted average
-        weights = np.cos(np.deg2rad(selected_variable.latitude))
-        regional_ts = selected_variable.weighted(weights).mean(dim=("latitude", "longitude"))
-        missing_ts = missing.weighted(weights).mean(dim=("latitude", "longitude"))
-        regional_ts[missing_ts < threshold] = np.nan
+        Parameters
+        ----------
+        averager: RegionalAverager
+            :class:`RegionalAverager` containing the regions to be averaged over
+        variable: str
+            Name of the variable to average. Defaults to the first variable in the grid.
+        threshold: Optional[float]
+            If the area covered by data in the region drops below this threshold then NaN is returned. Set
+            to None to return an average whenever there are any data in the region.
+
+        Returns
+        -------
+        List[ts.TimeSeriesMonthly]
+            Time series of area averages, one for each region in the :class:`RegionalAverager`
+        """
+        if variable is None:
+            variable = list(self.df.keys())[0]
+
+        field = self.df[variable].transpose('time', 'latitude', 'longitude')
+        averages, coverage = averager.apply(field.values)
+        if threshold is not None:
+            averages[coverage < threshold] = np.nan
 
         # It's such a struggle extracting time information from these blasted xarrays
-        years = regional_ts.time.dt.year.data.tolist()
-        months = regional_ts.time.dt.month.data.tolist()
-        data = regional_ts.values.tolist()
+        years = field.time.dt.year.data
+        months = field.time.dt.month.data
 
-        timeseries_metadata = copy.deepcopy(self.metadata)
-        timeseries_metadata['type'] = 'timeseries'
-        timeseries_metadata['history'].append('Calculated area-average')
-        out_series = ts.TimeSeriesMonthly(years, months, data, timeseries_metadata)
+        all_series = []
+        for region_average in averages:
+            timeseries_metadata = self.metadata.fork()
+            timeseries_metadata['type'] = 'timeseries'
+            timeseries_metadata['history'].append('Calculated area-average')
+            all_series.append(
+                ts.TimeSeriesMonthly.from_arrays(years, months, region_average, metadata=timeseries_metadata)
+            )
 
-        return out_series
+        return all_series
 
     def update_history(self, message: str) -> None:
         """
@@ -679,9 +1213,18 @@ class GridAnnual:
 
         return out
 
-    def rank(self):
+    def rank(self, method: str = 'min', ascending: bool = False):
         """
-        Return a data set where the values are the ranks of each grid cell value.
+        Return a data set where the values are the ranks of each grid cell value. Each grid cell
+        is ranked independently along the time axis. Missing data are not ranked.
+
+        Parameters
+        ----------
+        method: str
+            Method used to assign ranks to tied values. One of 'min', 'max', 'average', 'dense'
+            or 'ordinal'
+        ascending: bool
+            If True, rank from lowest (1) to highest
 
         Returns
         -------
@@ -689,12 +1232,7 @@ class GridAnnual:
             Return a :class:`GridAnnual` containing the values as ranks from highest (1) to lowest.
         """
         output = copy.deepcopy(self)
-        out_grid = np.zeros(output.df['tas_mean'].data.shape)
-        for xx, yy in itertools.product(range(72), range(36)):
-            selection = output.df['tas_mean'].data[:, yy, xx]
-            rank = rank_array(selection)
-            out_grid[:, yy, xx] = rank
-        output.df['tas_mean'].data = out_grid
+        output.df['tas_mean'].data = rank_array(output.df['tas_mean'].data, method=method, ascending=ascending)
         return output
 
     def get_start_year(self) -> int:
@@ -762,49 +1300,84 @@ def get_start_and_end_year(all_datasets: List[GridAnnual]) -> Tuple[int, int]:
     return start_date, end_date
 
 
-def process_datasets(all_datasets: List[GridAnnual], grid_type: str) -> GridAnnual:
+def stack_datasets(all_datasets: List[GridAnnual], start_year: int, end_year: int) -> np.ndarray:
     """
-    Calculate the median or range (depending on selected type) of a list of :class:`GridAnnual` data sets.
-    Medians are calculated on a grid cell by grid cell basis based on all available data in the
-    list of data sets.
+    Align a list of :class:`GridAnnual` data sets onto a common time axis running from start_year to
+    end_year and stack them into a single array. Years not covered by a data set are set to missing.
+
+    Parameters
+    ----------
+    all_datasets: List[GridAnnual]
+        List of :class:`GridAnnual` data sets, which must all be on the same grid
+    start_year: int
+        First year of the common time axis
+    end_year: int
+        Last year of the common time axis
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (number of data sets, number of years, nlat, nlon)
+    """
+    grid_shape = all_datasets[0].df['tas_mean'].data.shape[1:]
+    number_of_years = end_year - start_year + 1
+
+    stack = np.full((len(all_datasets), number_of_years) + grid_shape, np.nan)
+
+    for i, ds in enumerate(all_datasets):
+        if ds.df['tas_mean'].data.shape[1:] != grid_shape:
+            raise ValueError(f'Data set {i} is on a {ds.df["tas_mean"].data.shape[1:]} grid, '
+                             f'not {grid_shape}')
+        years = np.asarray(ds.df['year'].data, dtype=int)
+        in_range = (years >= start_year) & (years <= end_year)
+        stack[i, years[in_range] - start_year] = ds.df['tas_mean'].data[in_range]
+
+    return stack
+
+
+def process_datasets(all_datasets: List[GridAnnual], grid_type: str, percentile: float = None) -> GridAnnual:
+    """
+    Calculate the median, range or a percentile (depending on selected type) of a list of :class:`GridAnnual`
+    data sets. Statistics are calculated on a grid cell by grid cell basis based on all available data in the
+    list of data sets. The data sets can be on any grid as long as they are all on the same grid.
 
     Parameters
     ----------
     all_datasets: List[GridAnnual]
         list of GridAnnual data sets
     grid_type: str
-        Either 'median' or 'range'
+        Either 'median', 'range' or 'percentile'
+    percentile: float
+        Percentile, between 0 and 100, to calculate if grid_type is 'percentile'
     Returns
     -------
     GridAnnual
-        Data set containing the median (or half-range) values from all the data sets supplied
+        Data set containing the median (or half-range, or percentile) values from all the data sets supplied
     """
     start_date, end_date = get_start_and_end_year(all_datasets)
     number_of_years = end_date - start_date + 1
 
-    # create a dataset from the earliest start date to the latest end date
-    out_grid = np.zeros((number_of_years, 36, 72))
-
-    # for each time step calculate the median of available data sets.
-    for year in range(start_date, start_date + number_of_years):
-        n_data_sets = len(all_datasets)
-        stack = np.zeros((n_data_sets, 36, 72))
-        for i, ds in enumerate(all_datasets):
-            temp_df = ds.get_year_range(year, year)
-            if temp_df.df['tas_mean'].data.shape[0] != 0:
-                stack[i, :, :] = temp_df.df['tas_mean'].data[0, :, :]
-            else:
-                stack[i, :, :] = np.nan
-
-        for xx, yy in itertools.product(range(72), range(36)):
-            select = stack[:, yy, xx]
-            if grid_type == 'median':
-                out_grid[year - start_date, yy, xx] = np.median(select[~np.isnan(select)])
-            elif grid_type == 'range':
-                full_range = np.max(select[~np.isnan(select)]) - np.min(select[~np.isnan(select)])
-                out_grid[year - start_date, yy, xx] = full_range / 2.
-
-    dataset = make_standard_grid(out_grid, str(start_date), '1YS', number_of_years)
+    stack = stack_datasets(all_datasets, start_date, end_date)
+
+    # Grid cells with no data in any data set give all-NaN slices, which should be missing in the output
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        if grid_type == 'median':
+            out_grid = np.nanmedian(stack, axis=0)
+        elif grid_type == 'range':
+            out_grid = (np.nanmax(stack, axis=0) - np.nanmin(stack, axis=0)) / 2.
+        elif grid_type == 'percentile':
+            if percentile is None:
+                raise ValueError('A percentile must be specified')
+            out_grid = np.nanpercentile(stack, percentile, axis=0)
+        else:
+            raise ValueError(f'Unknown grid type {grid_type}')
+
+    times = pd.date_range(start=str(start_date), freq='1YS', periods=number_of_years)
+    latitudes = all_datasets[0].df.latitude.data
+    longitudes = all_datasets[0].df.longitude.data
+
+    dataset = make_xarray(out_grid, times, latitudes, longitudes)
     dataset = dataset.groupby('time.year').mean(dim='time')
     dataset = GridAnnual(dataset, all_datasets[0].metadata)
 
@@ -839,3 +1412,20 @@ def range_of_datasets(all_datasets: List[GridAnnual]) -> GridAnnual:
     GridAnnual
     """
     return process_datasets(all_datasets, 'range')
+
+
+def percentile_of_datasets(all_datasets: List[GridAnnual], percentile: float) -> GridAnnual:
+    """
+    Calculate a percentile of a list of :class:`GridAnnual` data sets
+
+    Parameters
+    ----------
+    all_datasets: List[GridAnnual]
+        List of :class:`GridAnnual` datasets from which the percentiles will be calculated.
+    percentile: float
+        Percentile to calculate, between 0 and 100
+    Returns
+    -------
+    GridAnnual
+    """
+    return process_datasets(all_datasets, 'percentile', percentile=percentile)
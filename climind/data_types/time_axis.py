@@ -0,0 +1,119 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Dates and CF-encoded times for time series, calculated arithmetically from integer years, months and
+days rather than by building and parsing date strings.
+"""
+import re
+import numpy as np
+import pandas as pd
+import cftime as cf
+
+# Length of each time unit in seconds
+UNIT_SECONDS = {
+    'days': 86400, 'day': 86400, 'd': 86400,
+    'hours': 3600, 'hour': 3600, 'h': 3600,
+    'minutes': 60, 'minute': 60, 'min': 60,
+    'seconds': 1, 'second': 1, 's': 1,
+}
+
+# Dates before this are in the Julian calendar in the standard calendar, but numpy and pandas use
+# the proleptic Gregorian calendar throughout
+FIRST_GREGORIAN_DATE = np.datetime64('1582-10-15', 'ns')
+
+
+def make_datetimes(years, months=None, days=None) -> np.ndarray:
+    """
+    Calculate the dates of the start of each year, month or day.
+
+    Parameters
+    ----------
+    years: array-like
+        Years
+    months: Optional[array-like]
+        Months (1-12). If not given, the date is the first of January.
+    days: Optional[array-like]
+        Days of the month. If not given, the date is the first of the month.
+
+    Returns
+    -------
+    np.ndarray
+        Array of np.datetime64[ns]
+
+    Raises
+    ------
+    ValueError
+        If any of the days does not exist in its month
+    """
+    years = np.asarray(years).astype(np.int64)
+    if months is None:
+        months = np.ones(years.shape, dtype=np.int64)
+    months = np.asarray(months).astype(np.int64)
+
+    dates = ((years - 1970) * 12 + months - 1).astype('datetime64[M]').astype('datetime64[D]')
+
+    if days is not None:
+        days = np.asarray(days).astype(np.int64)
+        month_starts = dates
+        dates = month_starts + (days - 1)
+        invalid = (days < 1) | (dates.astype('datetime64[M]') != month_starts.astype('datetime64[M]'))
+        if np.any(invalid):
+            raise ValueError(f"Days out of range for month: {days[invalid][0]}")
+
+    return dates.astype('datetime64[ns]')
+
+
+def encode_times(dates: np.ndarray, time_units: str, calendar: str = 'standard') -> np.ndarray:
+    """
+    Convert dates to numbers in CF time units such as "days since 1800-01-01 00:00:00.0". Times are
+    integers if they are all whole numbers of the unit, floats otherwise, as with cftime.date2num. Dates
+    in the standard calendar are calculated arithmetically, anything else is passed to cftime.
+
+    Parameters
+    ----------
+    dates: np.ndarray
+        Array of np.datetime64
+    time_units: str
+        CF time units
+    calendar: str
+        CF calendar
+
+    Returns
+    -------
+    np.ndarray
+        Times in the specified units
+    """
+    dates = np.asarray(dates).astype('datetime64[ns]')
+
+    match = re.fullmatch(r'\s*(\w+)\s+since\s+(.+?)\s*', time_units)
+    reference = None
+    if match is not None and match.group(1) in UNIT_SECONDS and calendar in ['standard', 'gregorian']:
+        try:
+            reference = np.datetime64(pd.Timestamp(match.group(2)).tz_localize(None), 'ns')
+        except (ValueError, TypeError):
+            reference = None
+
+    if reference is None or reference < FIRST_GREGORIAN_DATE or \
+            (len(dates) > 0 and dates.min() < FIRST_GREGORIAN_DATE):
+        return cf.date2num(pd.DatetimeIndex(dates).to_pydatetime().tolist(), units=time_units,
+                           has_year_zero=False, calendar=calendar)
+
+    nanoseconds = (dates - reference).astype(np.int64)
+    unit_nanoseconds = UNIT_SECONDS[match.group(1)] * 1_000_000_000
+
+    if np.all(nanoseconds % unit_nanoseconds == 0):
+        return nanoseconds // unit_nanoseconds
+    return nanoseconds / unit_nanoseconds
@@ -16,6 +16,8 @@
 
 from typing import Optional, Tuple, List, Callable, Union
 import warnings
+import hashlib
+import json
 import pandas as pd
 import numpy as np
 import logging
@@ -23,13 +25,16 @@ import copy
 import pkg_resources
 from abc import ABC, abstractmethod
 from pathlib import Path
-from functools import reduce
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from datetime import datetime
-import cftime as cf
 from climind.data_manager.metadata import CombinedMetadata
 from climind.definitions import ROOT_DIR
+from climind.data_types.time_axis import make_datetimes, encode_times
 from statsmodels.nonparametric.smoothers_lowess import lowess
+from scipy.stats import rankdata
+from climind.stats.trends import rolling_ols
+from climind.stats.smoothing import expanding_lowess
+from climind.stats.records import record_statistics
 
 
 def log_activity(in_function: Callable) -> Callable:
@@ -69,6 +74,77 @@ def log_activity(in_function: Callable) -> Callable:
     return wrapper
 
 
+def rank_values(values: np.ndarray, ascending: bool = False) -> np.ndarray:
+    """
+    Rank an array of values. Ties are given the same rank, which is the lowest rank of the group, and
+    missing values are given a rank of NaN.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Values to be ranked
+    ascending: bool
+        Set to True to rank low (1st) to high (nth) rather than high (1st) to low (nth)
+
+    Returns
+    -------
+    np.ndarray
+        Array of ranks
+    """
+    values = np.asarray(values, dtype=float)
+    if not ascending:
+        values = -values
+    return rankdata(values, method='min', nan_policy='omit').astype(float)
+
+
+def as_time_array(values) -> np.ndarray:
+    """
+    Convert a sequence of times (years, months or days) to a numpy array. Lists of whole numbers are
+    stored as 32-bit integers, integer arrays are used without copying, and anything else is stored as
+    64-bit floats.
+
+    Parameters
+    ----------
+    values: array-like
+        Years, months or days
+
+    Returns
+    -------
+    np.ndarray
+        Array of times
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in 'iu':
+        # integer arrays that are handed over are used as they are, without copying
+        if isinstance(values, (list, tuple)):
+            return array.astype(np.int32)
+        return array
+
+    array = array.astype(np.float64, copy=False)
+    if np.all(np.isfinite(array)) and np.all(np.mod(array, 1) == 0):
+        return array.astype(np.int32)
+
+    return array
+
+
+def as_value_array(values) -> np.ndarray:
+    """
+    Convert a sequence of data values to a numpy array of 64-bit floats. Missing values (None) become NaN.
+    Arrays which are already 64-bit floats are used without copying.
+
+    Parameters
+    ----------
+    values: array-like
+        Data values
+
+    Returns
+    -------
+    np.ndarray
+        Array of data values
+    """
+    return np.asarray(values, dtype=np.float64)
+
+
 class TimeSeries(ABC):
     """
     A base class for representing time series data sets. Note that this class should not generally be used
@@ -76,13 +152,509 @@ class TimeSeries(ABC):
     should be used. This class contains shared functionality from these classes but does not work on its own.
     """
 
+    __slots__ = ('metadata', '_df', '_columns', '_indices', '_version')
+
+    #: Columns which give the time of each data point
+    time_columns = ('year',)
+
     def __init__(self, metadata: CombinedMetadata = None):
-        self.df = None
+        self._df = None
+        self._columns = None
+        self._indices = {}
+        self._version = 0
         if metadata is None:
             self.metadata = {"name": "", "history": []}
         else:
             self.metadata = metadata
 
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        Pandas dataframe containing the time and data information. A new time series holds its data in
+        numpy arrays and the dataframe is only built when it is first needed. Reading the dataframe keeps
+        any indices calculated from the time series. If the times or data in the dataframe are changed in
+        place, the indices are rebuilt when they are next used.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        if self._df is None and self._columns is not None:
+            self._df = self._build_df()
+            # the arrays are not changed by building the dataframe, so they record what the indices were built from
+            self._indices['dataframe'] = (self._version, self._dataframe_columns(self._columns))
+            self._columns = None
+        return self._df
+
+    @df.setter
+    def df(self, df: pd.DataFrame) -> None:
+        self._df = df
+        self._columns = None
+        self._changed()
+
+    @classmethod
+    def from_arrays(cls, *arrays, metadata: CombinedMetadata = None, uncertainty=None):
+        """
+        Create a time series from numpy arrays of times and data, given in the same order as for the class
+        constructor, e.g. years, months and data for a :class:`TimeSeriesMonthly`. Integer time arrays and
+        float64 data arrays are used as they are, without copying, so they should not be changed afterwards.
+
+        Parameters
+        ----------
+        arrays: np.ndarray
+            Arrays of times followed by the array of data values
+        metadata: CombinedMetadata
+            CombinedMetadata object holding the metadata for the dataset
+        uncertainty: Optional[np.ndarray]
+            Array of uncertainties
+
+        Returns
+        -------
+        TimeSeries
+            Time series of the same class as that on which the method was called
+        """
+        return cls(*arrays, metadata=metadata, uncertainty=uncertainty)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, metadata: CombinedMetadata = None, copy: bool = True):
+        """
+        Create a time series from the time columns ('year', and 'month' and 'day' as appropriate), the
+        'data' column and, if present, the 'uncertainty' column of a dataframe.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Dataframe containing the time and data columns
+        metadata: CombinedMetadata
+            CombinedMetadata object holding the metadata for the dataset
+        copy: bool
+            Set to False to share the memory of the dataframe columns where possible instead of copying
+            them. The dataframe should then not be changed afterwards.
+
+        Returns
+        -------
+        TimeSeries
+            Time series of the same class as that on which the method was called
+        """
+        arrays = [df[column].to_numpy(copy=copy) for column in cls.time_columns]
+        arrays.append(df['data'].to_numpy(copy=copy))
+
+        uncertainty = None
+        if 'uncertainty' in df.columns:
+            uncertainty = df['uncertainty'].to_numpy(copy=copy)
+
+        return cls.from_arrays(*arrays, metadata=metadata, uncertainty=uncertainty)
+
+    def share(self):
+        """
+        Make a copy of the time series which shares its time, data and uncertainty arrays with this one and
+        has forked metadata, so that changes to the metadata of either do not affect the other. This makes
+        copying cheap however long the time series is. If this time series holds a dataframe, which can be
+        changed in place, its columns are copied instead.
+
+        Returns
+        -------
+        TimeSeries
+            Time series of the same class as this one
+        """
+        data = self._column('data')
+        if self._columns is None:
+            data = data.copy()
+        return self._derived_series(data)
+
+    def _derived_series(self, data: np.ndarray):
+        """
+        Make a new time series of the same class with the same times and uncertainties as this one, new data
+        values and forked metadata. If this time series holds its data in numpy arrays, the time and uncertainty
+        arrays are shared rather than copied. A dataframe can be changed in place, so its columns are copied.
+
+        Parameters
+        ----------
+        data: np.ndarray
+            Data values of the new time series
+
+        Returns
+        -------
+        TimeSeries
+            Time series of the same class as this one
+        """
+        share = self._columns is not None
+        arrays = [self._column(name) if share else self._column(name).copy() for name in self.time_columns]
+        arrays.append(np.asarray(data, dtype=np.float64))
+
+        uncertainty = None
+        if self._has_column('uncertainty'):
+            uncertainty = self._column('uncertainty') if share else self._column('uncertainty').copy()
+
+        if hasattr(self.metadata, 'fork'):
+            metadata = self.metadata.fork()
+        else:
+            metadata = copy.deepcopy(self.metadata)
+
+        return type(self).from_arrays(*arrays, metadata=metadata, uncertainty=uncertainty)
+
+    def _centre_times(self, run_length: int) -> None:
+        """
+        Replace the years with the mean of the years in each run of run_length time steps, so that each value
+        of a running statistic is placed in the middle of its run, and drop the rows with missing values. The
+        rows keep their positions in the original series as labels.
+
+        Parameters
+        ----------
+        run_length: int
+            Length of the run
+
+        Returns
+        -------
+        None
+        """
+        df = self.df
+        df['year'] = df['year'].rolling(run_length).mean()
+        self.df = df.dropna(how='any')
+
+    def _set_columns(self, columns: dict) -> None:
+        """
+        Store the time and data information as a dictionary of numpy arrays, replacing any dataframe.
+
+        Parameters
+        ----------
+        columns: dict
+            Dictionary of column name and numpy array pairs. All arrays must be the same length.
+
+        Returns
+        -------
+        None
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All arrays must be of the same length")
+        self._columns = columns
+        self._df = None
+        self._changed()
+
+    def _changed(self) -> None:
+        """
+        Record that the time and data information may have changed. The version number is increased
+        and the indices calculated from the old version are dropped.
+
+        Returns
+        -------
+        None
+        """
+        self._version = getattr(self, '_version', 0) + 1
+        self._indices = {}
+
+    def _build_df(self) -> pd.DataFrame:
+        """
+        Build the dataframe from the numpy arrays. Integer time columns are 64-bit in the dataframe.
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        dico = {}
+        for name, values in self._columns.items():
+            if name in self.time_columns and values.dtype.kind in 'iu':
+                values = values.astype(np.int64)
+            dico[name] = values
+        return pd.DataFrame(dico)
+
+    def _has_column(self, name: str) -> bool:
+        """
+        Check whether the time series has a particular column
+
+        Parameters
+        ----------
+        name: str
+            Name of the column
+
+        Returns
+        -------
+        bool
+        """
+        if self._columns is not None:
+            return name in self._columns
+        return self._df is not None and name in self._df.columns
+
+    def _column(self, name: str) -> np.ndarray:
+        """
+        Get a column as a numpy array without building the dataframe. The array should not be modified.
+
+        Parameters
+        ----------
+        name: str
+            Name of the column
+
+        Returns
+        -------
+        np.ndarray
+        """
+        if self._columns is not None:
+            return self._columns[name]
+        return self._df[name].to_numpy()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Number of bytes used by the data in the time series, without building the dataframe if it
+        has not been built.
+        """
+        if self._columns is not None:
+            return int(sum(values.nbytes for values in self._columns.values()))
+        return int(self._df.memory_usage(deep=True).sum())
+
+    def fingerprint(self) -> str:
+        """
+        Get a hash of the contents of the time series: the times, data, uncertainties and metadata. Two
+        time series with the same fingerprint will give the same results when processed.
+
+        Returns
+        -------
+        str
+            Hexadecimal digest
+        """
+        digest = hashlib.sha256(type(self).__name__.encode('utf-8'))
+        for column in self.time_columns + ('data', 'uncertainty'):
+            if self._has_column(column):
+                dtype = np.int64 if column in self.time_columns else np.float64
+                digest.update(column.encode('utf-8'))
+                digest.update(np.ascontiguousarray(self._column(column), dtype=dtype).tobytes())
+
+        if isinstance(self.metadata, CombinedMetadata):
+            description = [self.metadata.dataset.to_dict(), self.metadata.collection.to_dict()]
+        else:
+            description = self.metadata
+        digest.update(json.dumps(description, sort_keys=True, default=str).encode('utf-8'))
+
+        return digest.hexdigest()
+
+    def _get_index(self, name: str, builder: Callable):
+        """
+        Get an index calculated from the time series. The index is built the first time it is requested and
+        rebuilt if the time series has changed since, as recorded by its version number. Builders should read
+        the data with :meth:`_column` rather than through the dataframe.
+
+        Parameters
+        ----------
+        name: str
+            Name of the index
+        builder: Callable
+            Function, taking no arguments, which builds the index
+
+        Returns
+        -------
+        The index returned by the builder
+        """
+        if getattr(self, '_indices', None) is None:
+            self._indices = {}
+        self._check_dataframe()
+
+        entry = self._indices.get(name)
+        if entry is None or entry[0] != getattr(self, '_version', 0):
+            index = builder()
+            entry = (getattr(self, '_version', 0), index)
+            self._indices[name] = entry
+
+        return entry[1]
+
+    def _check_dataframe(self) -> None:
+        """
+        The dataframe can be changed in place, so, if there is one, compare its times and data with those
+        from which the indices were built and drop the indices if they differ. The comparison is much
+        quicker than rebuilding the indices.
+
+        Returns
+        -------
+        None
+        """
+        if self._columns is not None or self._df is None:
+            return
+
+        current = self._dataframe_columns(self._df)
+        entry = self._indices.get('dataframe')
+        if entry is not None and entry[0] == getattr(self, '_version', 0) and len(entry[1]) == len(current):
+            if all(np.array_equal(old, new, equal_nan=new.dtype.kind == 'f') for old, new in zip(entry[1], current)):
+                return
+
+        # indices which cannot be checked against the dataframe are dropped too
+        if self._indices:
+            self._changed()
+        self._indices['dataframe'] = (self._version, [values.copy() for values in current])
+
+    def _dataframe_columns(self, columns) -> List[np.ndarray]:
+        """
+        Get the time and data columns, which the indices are calculated from, as numpy arrays
+
+        Parameters
+        ----------
+        columns: Union[dict, pd.DataFrame]
+            Dictionary of numpy arrays or dataframe holding the columns
+
+        Returns
+        -------
+        List[np.ndarray]
+        """
+        return [np.asarray(columns[name]) for name in self.time_columns + ('data',) if name in columns]
+
+    def _datetimes(self) -> np.ndarray:
+        """
+        Calculate the date of the start of each time step
+
+        Returns
+        -------
+        np.ndarray
+            Array of np.datetime64
+        """
+        return make_datetimes(*[self._column(column) for column in self.time_columns])
+
+    def get_datetimes(self) -> np.ndarray:
+        """
+        Get the date of the start of each time step. The dates are calculated once and reused until the
+        time series changes.
+
+        Returns
+        -------
+        np.ndarray
+            Array of np.datetime64
+        """
+        return self._get_index('datetimes', self._datetimes).copy()
+
+    def generate_dates(self, time_units: str) -> np.ndarray:
+        """
+        Given a string specifying the required time units (something like days since 1800-01-01 00:00:00.0),
+        generate a list of times from the time series corresponding to those units. The times are
+        calculated once for each set of units and reused until the time series changes.
+
+        Parameters
+        ----------
+        time_units: str
+            String specifying the units to use for generating the times e.g. "days since 1800-01-01 00:00:00.0"
+
+        Returns
+        -------
+        np.ndarray
+        """
+        dates = self._get_index(
+            f'dates {time_units}',
+            lambda: encode_times(self._get_index('datetimes', self._datetimes), time_units)
+        )
+        return dates.copy()
+
+    @abstractmethod
+    def _time_keys(self) -> np.ndarray:
+        """
+        Get a key for each time in the dataframe, which is used to look up values by time. Only rows whose
+        key is a whole number can be looked up.
+
+        Returns
+        -------
+        np.ndarray
+            Array of time keys
+        """
+
+    def _build_time_index(self) -> dict:
+        """
+        Build the index used to look up the position in the dataframe of a particular time. The
+        index is an array covering every key from the first to the last, holding the position of
+        the first row with that key, or -1 if there is no such row.
+
+        Returns
+        -------
+        dict
+            Dictionary containing 'first_key', the smallest key, 'positions', the position of each key,
+            and 'counts', the number of rows with each key
+        """
+        keys = np.asarray(self._time_keys())
+        rows = np.arange(len(keys))
+
+        # times which are not whole numbers, such as the years of a centred running mean, match no key
+        if keys.dtype.kind == 'f':
+            whole = np.isfinite(keys) & (keys == np.round(keys))
+            rows = rows[whole]
+            keys = keys[whole].astype(np.int64)
+
+        if len(keys) == 0:
+            return {'first_key': 0, 'positions': np.zeros(0, dtype=int), 'counts': np.zeros(0, dtype=int)}
+
+        first_key = int(keys.min())
+        offsets = keys - first_key
+
+        # assign in reverse so that the first row with each key is the one that is kept
+        positions = np.full(int(offsets.max()) + 1, -1, dtype=int)
+        positions[offsets[::-1]] = rows[::-1]
+
+        counts = np.bincount(offsets, minlength=len(positions))
+
+        return {'first_key': first_key, 'positions': positions, 'counts': counts}
+
+    def _find_positions(self, keys, unique: bool = False) -> np.ndarray:
+        """
+        Find the positions in the dataframe of the rows with the specified time keys.
+
+        Parameters
+        ----------
+        keys: array-like
+            Time keys
+        unique: bool
+            If set, raise a KeyError if any of the keys matches more than one row
+
+        Returns
+        -------
+        np.ndarray
+            Position of the first row matching each key, or -1 if there is no such row
+        """
+        time_index = self._get_index('time', self._build_time_index)
+
+        keys = np.asarray(keys)
+        whole = keys == np.round(keys) if keys.dtype.kind == 'f' else np.ones(keys.shape, dtype=bool)
+
+        offsets = np.where(whole, keys, 0).astype(int) - time_index['first_key']
+        valid = whole & (offsets >= 0) & (offsets < len(time_index['positions']))
+
+        positions = np.full(offsets.shape, -1, dtype=int)
+        positions[valid] = time_index['positions'][offsets[valid]]
+
+        if unique:
+            duplicated = time_index['counts'][offsets[valid]] > 1
+            if np.any(duplicated):
+                raise KeyError(f"Selection is not unique {keys[valid][duplicated]}")
+
+        # keys which are not whole numbers are not in the index, so they are matched exactly against every row
+        if not np.all(whole):
+            all_keys = np.asarray(self._time_keys())
+            for i in np.flatnonzero(~whole):
+                matches = np.flatnonzero(all_keys == keys[i])
+                if unique and len(matches) > 1:
+                    raise KeyError(f"Selection is not unique {keys[i]}")
+                if len(matches) > 0:
+                    positions[i] = matches[0]
+
+        return positions
+
+    def _get_column_values(self, column: str, keys, unique: bool = False) -> np.ndarray:
+        """
+        Get values from a column of the dataframe for the rows with the specified time keys.
+
+        Parameters
+        ----------
+        column: str
+            Name of the column
+        keys: array-like
+            Integer time keys
+        unique: bool
+            If set, raise a KeyError if any of the keys matches more than one row
+
+        Returns
+        -------
+        np.ndarray
+            Values for each of the keys, NaN where there is no matching row
+        """
+        positions = self._find_positions(keys, unique=unique)
+        values = np.full(positions.shape, np.nan)
+        found = positions >= 0
+        values[found] = self._column(column)[positions[found]]
+        return values
+
     def select_year_range(self, start_year: int, end_year: int):
         """
         Select consecutive years in the specified range and throw away the rest.
@@ -99,12 +671,85 @@ class TimeSeries(ABC):
         TimeSeries
             Return time series which only contains years in the specified range
         """
-        self.df = self.df[self.df['year'] >= start_year]
-        self.df = self.df[self.df['year'] <= end_year]
-        self.df = self.df.reset_index()
+        if self._columns is not None:
+            years = self._columns['year']
+            selected = np.flatnonzero((years >= start_year) & (years <= end_year))
+            # a contiguous selection is taken as a view of the existing arrays
+            if len(selected) > 0 and selected[-1] - selected[0] + 1 == len(selected):
+                selected = slice(selected[0], selected[-1] + 1)
+            self._set_columns({name: values[selected] for name, values in self._columns.items()})
+        else:
+            self.df = self.df[self.df['year'] >= start_year]
+            self.df = self.df[self.df['year'] <= end_year]
+            self.df = self.df.reset_index()
         self.update_history(f'Selected years within the range {start_year} to {end_year}.')
         return self
 
+    def running_ols(self, run_length: int, min_points: Optional[int] = None,
+                    standard_error: bool = False) -> pd.DataFrame:
+        """
+        Fit a straight line to the data in each window of run_length consecutive time steps, ending at
+        each time step in turn. Times are the decimal years from :meth:`get_year_axis`, so trends are in
+        units per year.
+
+        Parameters
+        ----------
+        run_length: int
+            Number of time steps in each window
+        min_points: Optional[int]
+            Minimum number of non-missing values needed in a window for a fit to be made. Defaults to
+            run_length, so that windows with any missing data are not fitted.
+        standard_error: bool
+            Set to True to also calculate the standard error of the trend
+
+        Returns
+        -------
+        pd.DataFrame
+            Dataframe with the same rows as the time series containing the 'trend', 'intercept',
+            'end_value' and 'count' (and optionally 'standard_error') of the fit for the window ending at
+            each time step. Where there are too few data points, the fit values are NaN.
+        """
+        if min_points is None:
+            min_points = run_length
+
+        fit = rolling_ols(self.get_year_axis(), self._column('data'), run_length,
+                          min_points=min_points, standard_error=standard_error)
+
+        time_columns = [column for column in ['year', 'month', 'day'] if column in self.df.columns]
+        out_df = self.df[time_columns].copy()
+        for key in fit:
+            out_df[key] = fit[key]
+
+        return out_df
+
+    def record_statistics(self) -> pd.DataFrame:
+        """
+        Calculate running highs and lows, record flags, margins over the previous record and the number
+        of time steps since the last record. Monthly series are compared month by month, so that
+        January is compared with other Januaries, and daily series day by day.
+
+        Returns
+        -------
+        pd.DataFrame
+            Dataframe with the same rows as the time series containing the record statistics described
+            in :func:`climind.stats.records.record_statistics`
+        """
+        time_columns = [column for column in ['year', 'month', 'day'] if column in self.df.columns]
+
+        groups = None
+        if 'day' in self.df.columns:
+            groups = self.df['month'].to_numpy() * 100 + self.df['day'].to_numpy()
+        elif 'month' in self.df.columns:
+            groups = self.df['month'].to_numpy()
+
+        statistics = record_statistics(self.df['data'], groups=groups)
+
+        out_df = self.df[time_columns].copy()
+        for key in statistics:
+            out_df[key] = statistics[key]
+
+        return out_df
+
     def manually_set_baseline(self, baseline_start_year: int, baseline_end_year: int) -> None:
         """
         Manually set baseline. This changes the baseline in the metadata, but does not change the
@@ -137,8 +782,9 @@ class TimeSeries(ABC):
         Tuple[int, int]
             first and last year
         """
-        first_year = self.df['year'].tolist()[0]
-        last_year = self.df['year'].tolist()[-1]
+        years = self._column('year')
+        first_year = years[0].item()
+        last_year = years[-1].item()
         return first_year, last_year
 
     def update_history(self, message: str) -> None:
@@ -170,7 +816,11 @@ class TimeSeries(ABC):
         None
         """
 
-        self.df['data'] = self.df['data'] + offset
+        if self._columns is not None:
+            self._set_columns({**self._columns, 'data': self._columns['data'] + offset})
+        else:
+            self.df['data'] = self.df['data'] + offset
+            self._changed()
         self.metadata['derived'] = True
         self.update_history(f'Added offset of {offset} to all data values.')
 
@@ -254,6 +904,9 @@ class TimeSeriesIrregular(TimeSeries):
     5-day averages.
     """
 
+    __slots__ = ()
+    time_columns = ('year', 'month', 'day')
+
     def __init__(self, years: List[int], months: List[int], days: List[int], data: List[float],
                  metadata: CombinedMetadata = None,
                  uncertainty: Optional[List[float]] = None):
@@ -277,22 +930,84 @@ class TimeSeriesIrregular(TimeSeries):
         """
         super().__init__(metadata)
 
-        dico = {'year': years, 'month': months, 'day': days, 'data': data}
-        if uncertainty is not None:
-            dico['uncertainty'] = uncertainty
-        self.df = pd.DataFrame(dico)
-
-        self.df['date'] = pd.to_datetime(
-            dict(
-                year=self.df['year'],
-                month=self.df['month'],
-                day=self.df['day']
-            )
-        )
+        columns = {'year': as_time_array(years), 'month': as_time_array(months), 'day': as_time_array(days),
+                   'data': as_value_array(data)}
+        if uncertainty is not None:
+            columns['uncertainty'] = as_value_array(uncertainty)
+        self._set_columns(columns)
+
+    def _build_df(self) -> pd.DataFrame:
+        df = super()._build_df()
+        df['date'] = self.get_datetimes()
+        return df
+
+    def __str__(self) -> str:
+        out_str = f'TimeSeriesIrregular: {self.metadata["name"]}'
+        return out_str
+
+    def _time_keys(self) -> np.ndarray:
+        """
+        Get the time key, which is the number of days since 1970-01-01, for each row of the dataframe
+
+        Returns
+        -------
+        np.ndarray
+            Array of integer time keys
+        """
+        dates = self._get_index('datetimes', self._datetimes)
+        return dates.astype('datetime64[D]').astype(np.int64)
+
+    def get_value(self, year: int, month: int, day: int) -> Optional[float]:
+        """
+        Get the data value for a particular date
+
+        Parameters
+        ----------
+        year: int
+            Year of the date
+        month: int
+            Month of the date
+        day: int
+            Day of the date
+
+        Returns
+        -------
+        Optional[float]
+            Value for the date or None if there is no data point for that date
+        """
+        position = self._find_positions(self._date_keys([year], [month], [day]))[0]
+        if position < 0:
+            return None
+        return self._column('data')[position]
+
+    def get_values(self, years, months, days) -> np.ndarray:
+        """
+        Get the data values for a set of dates
+
+        Parameters
+        ----------
+        years: array-like
+            Years of the dates
+        months: array-like
+            Months of the dates
+        days: array-like
+            Days of the dates
+
+        Returns
+        -------
+        np.ndarray
+            Values for each date, NaN where there is no data point for the date
+        """
+        return self._get_column_values('data', self._date_keys(years, months, days))
 
-    def __str__(self) -> str:
-        out_str = f'TimeSeriesIrregular: {self.metadata["name"]}'
-        return out_str
+    @staticmethod
+    def _date_keys(years, months, days) -> np.ndarray:
+        """
+        Get the time keys for a set of dates, see :meth:`_time_keys`
+        """
+        dates = make_datetimes(np.asarray(years, dtype=int), np.asarray(months, dtype=int),
+                               np.asarray(days, dtype=int))
+        return dates.astype('datetime64[D]').astype(np.int64)
 
     def fill_daily(self) -> None:
         """
@@ -377,36 +1092,12 @@ class TimeSeriesIrregular(TimeSeries):
         -------
         Tuple[datetime, datetime]
         """
-        time_str = self.df.year.astype(str) + \
-                   self.df.month.map('{:02d}'.format) + \
-                   self.df.day.map('{:02d}'.format)
-        self.df['time'] = pd.to_datetime(time_str, format='%Y%m%d')
-
-        n_time = len(self.df['time'])
-
-        start_date = self.df['time'].iloc[0]
-        end_date = self.df['time'].iloc[n_time - 1]
-
-        return start_date, end_date
-
-    def generate_dates(self, time_units: str) -> List[int]:
-        """
-        Given a string specifying the required time units (something like days since 1800-01-01 00:00:00.0),
-        generate a list of times from the time series corresponding to those units.
-
-        Parameters
-        ----------
-        time_units: str
-            String specifying the units to use for generating the times e.g. "days since 1800-01-01 00:00:00.0"
+        dates = self._get_index('datetimes', self._datetimes)
+        if self._columns is None:
+            # adding the time column leaves the times and data unchanged, so the indices are kept
+            self._df['time'] = dates.copy()
 
-        Returns
-        -------
-        List[int]
-        """
-        time_str = self.df.year.astype(str) + self.df.month.map('{:02d}'.format) + self.df.day.map('{:02d}'.format)
-        self.df['time'] = pd.to_datetime(time_str, format='%Y%m%d')
-        dates = cf.date2num(self.df['time'].tolist(), units=time_units, has_year_zero=False, calendar='standard')
-        return dates
+        return pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
 
     def write_csv(self, filename: Path, metadata_filename: Path = None) -> None:
         """
@@ -501,6 +1192,7 @@ class TimeSeriesIrregular(TimeSeries):
         df_copy = df_copy.reset_index()
 
         self.df['data'] = df_copy['data']
+        self._changed()
 
         # update attributes
         self.metadata['climatology_start'] = baseline_start_year
@@ -526,9 +1218,7 @@ class TimeSeriesIrregular(TimeSeries):
         -------
 
         """
-        moving_average = copy.deepcopy(self)
-
-        snippet = self.df.data[:]
+        snippet = self._column('data')
         time = self.get_year_axis()[:]
 
         fraction_of_data = number_of_points / len(snippet)
@@ -540,7 +1230,7 @@ class TimeSeriesIrregular(TimeSeries):
         # fit[0: int(number_of_points / 2)] = np.nan
         # fit[-1 * int(number_of_points / 2):] = np.nan
 
-        moving_average.df.data = fit
+        moving_average = self._derived_series(fit)
 
         moving_average.update_history(
             f'Calculated lowess smoothed series with {fraction_of_data} of data used for each fit')
@@ -556,6 +1246,9 @@ class TimeSeriesMonthly(TimeSeries):
     metadata in one object. It represents monthly averages of data.
     """
 
+    __slots__ = ()
+    time_columns = ('year', 'month')
+
     def __init__(self, years: List[int], months: List[int], data: List[float], metadata: CombinedMetadata = None,
                  uncertainty: Optional[List[float]] = None):
         """
@@ -583,15 +1276,20 @@ class TimeSeriesMonthly(TimeSeries):
 
         super().__init__(metadata)
 
-        dico = {'year': years, 'month': months, 'data': data}
+        columns = {'year': as_time_array(years), 'month': as_time_array(months), 'data': as_value_array(data)}
         if uncertainty is not None:
-            dico['uncertainty'] = uncertainty
-        self.df = pd.DataFrame(dico)
+            columns['uncertainty'] = as_value_array(uncertainty)
+        self._set_columns(columns)
 
         if self.metadata is not None:
             _, end_date = self.get_start_and_end_dates()
             self.metadata.dataset['last_month'] = str(end_date)
 
+    def _build_df(self) -> pd.DataFrame:
+        df = super()._build_df()
+        df['time'] = self.get_datetimes()
+        return df
+
     def __str__(self) -> str:
         out_str = f'TimeSeriesMonthly: {self.metadata["name"]}'
         return out_str
@@ -613,17 +1311,14 @@ class TimeSeriesMonthly(TimeSeries):
         TimeSeriesMonthly
             :class:`TimeSeriesMonthly` built from input components.
         """
-        years = df['year'].tolist()
-        months = df['month'].tolist()
-        data = df['data'].tolist()
-        if 'uncertainty' in df.columns:
-            uncertainty = df['uncertainty'].tolist()
-            return TimeSeriesMonthly(years, months, data, metadata, uncertainty=uncertainty)
-        else:
-            return TimeSeriesMonthly(years, months, data, metadata)
+        return TimeSeriesMonthly.from_frame(df, metadata)
 
     def change_end_month(self, year, month):
-        self.df = self.df[self.df.year * 100 + self.df.month < year * 100 + month + 1]
+        if self._columns is not None:
+            keep = self._columns['year'] * 100 + self._columns['month'] < year * 100 + month + 1
+            self._set_columns({name: values[keep] for name, values in self._columns.items()})
+        else:
+            self.df = self.df[self.df.year * 100 + self.df.month < year * 100 + month + 1]
         _, end_date = self.get_start_and_end_dates()
         self.metadata.dataset['last_month'] = str(end_date)
 
@@ -642,14 +1337,17 @@ class TimeSeriesMonthly(TimeSeries):
         TimeSeriesAnnual
             Return a :class:`TimeSeriesAnnual` object containing the annual averages.
         """
-        if cumulative:
-            grouped = self.df.groupby(['year'])['data'].sum().reset_index()
+        if self._columns is not None:
+            annual_series = self._make_annual_from_arrays(cumulative)
         else:
-            if 'uncertainty' in self.df.columns:
-                grouped = self.df.groupby(['year'])[['data', 'uncertainty']].mean().reset_index()
+            if cumulative:
+                grouped = self.df.groupby(['year'])['data'].sum().reset_index()
             else:
-                grouped = self.df.groupby(['year'])['data'].mean().reset_index()
-        annual_series = TimeSeriesAnnual.make_from_df(grouped, self.metadata)
+                if 'uncertainty' in self.df.columns:
+                    grouped = self.df.groupby(['year'])[['data', 'uncertainty']].mean().reset_index()
+                else:
+                    grouped = self.df.groupby(['year'])['data'].mean().reset_index()
+            annual_series = TimeSeriesAnnual.from_frame(grouped, self.metadata, copy=False)
 
         if cumulative:
             annual_series.update_history('Calculated annual value from monthly values by summing')
@@ -662,6 +1360,42 @@ class TimeSeriesMonthly(TimeSeries):
 
         return annual_series
 
+    def _make_annual_from_arrays(self, cumulative: bool):
+        """
+        Calculate annual sums or means of the data (and uncertainty) arrays, ignoring missing values.
+        Years with no data have a mean of NaN and a sum of zero.
+
+        Parameters
+        ----------
+        cumulative : bool
+            Set to true to sum rather than average the monthly values
+
+        Returns
+        -------
+        TimeSeriesAnnual
+        """
+        years, group = np.unique(self._columns['year'], return_inverse=True)
+
+        def group_sums(values):
+            present = ~np.isnan(values)
+            sums = np.bincount(group, weights=np.where(present, values, 0.0), minlength=len(years))
+            counts = np.bincount(group, weights=present, minlength=len(years))
+            return sums, counts
+
+        def group_means(values):
+            sums, counts = group_sums(values)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(counts > 0, sums / counts, np.nan)
+
+        if cumulative:
+            return TimeSeriesAnnual(years, group_sums(self._columns['data'])[0], self.metadata)
+
+        uncertainty = None
+        if 'uncertainty' in self._columns:
+            uncertainty = group_means(self._columns['uncertainty'])
+
+        return TimeSeriesAnnual(years, group_means(self._columns['data']), self.metadata, uncertainty=uncertainty)
+
     def make_annual_by_selecting_month(self, month: int):
         """
         Calculate a :class:`TimeSeriesAnnual` from the :class:`TimeSeriesMonthly`. The annual value is
@@ -676,7 +1410,7 @@ class TimeSeriesMonthly(TimeSeries):
                        'July', 'August', 'September', 'October', 'November', 'December']
 
         grouped = self.df[self.df['month'] == month].reset_index()
-        annual_series = TimeSeriesAnnual.make_from_df(grouped, self.metadata)
+        annual_series = TimeSeriesAnnual.from_frame(grouped, self.metadata, copy=False)
         annual_series.metadata['history'].append(
             f'Calculated annual series by extracting {month_names[month - 1]} from each year'
         )
@@ -728,6 +1462,7 @@ class TimeSeriesMonthly(TimeSeries):
 
         # subtract climatology
         self.df['data'] = self.df['data'] - self.df['climatology']
+        self._changed()
 
         # update attributes
         self.metadata['climatology_start'] = baseline_start_year
@@ -756,15 +1491,40 @@ class TimeSeriesMonthly(TimeSeries):
         Optional[float]
             Value for the specified year and month or None if it does not exist
         """
-        selection = self.df[(self.df['year'] == year) & (self.df['month'] == month)]
-        if len(selection) == 0:
-            out_value = None
-        elif len(selection) == 1:
-            out_value = selection['data'].values[0]
-        else:
-            raise KeyError(f"Selection is not unique {year} {month}")
+        position = self._find_positions([year * 12 + month - 1], unique=True)[0]
+        if position < 0:
+            return None
+        return self._column('data')[position]
+
+    def get_values(self, years, months) -> np.ndarray:
+        """
+        Get the current values for a set of years and months
+
+        Parameters
+        ----------
+        years: array-like
+            Years for which the values are required.
+        months: array-like
+            Months for which the values are required.
+
+        Returns
+        -------
+        np.ndarray
+            Values for each year and month, NaN where the year and month do not exist
+        """
+        keys = np.asarray(years, dtype=int) * 12 + np.asarray(months, dtype=int) - 1
+        return self._get_column_values('data', keys, unique=True)
+
+    def _time_keys(self) -> np.ndarray:
+        """
+        Get the time key, year * 12 + month - 1, for each row of the dataframe
 
-        return out_value
+        Returns
+        -------
+        np.ndarray
+            Array of time keys
+        """
+        return self._column('year') * 12 + self._column('month') - 1
 
     def get_uncertainty(self, year: int, month: int) -> Optional[float]:
         """
@@ -783,17 +1543,12 @@ class TimeSeriesMonthly(TimeSeries):
             Value for the specified year and month or None if it does not exist
         """
 
-        if 'uncertainty' not in self.df.columns:
+        if not self._has_column('uncertainty'):
             return None
-        selection = self.df[(self.df['year'] == year) & (self.df['month'] == month)]
-        if len(selection) == 0:
-            out_value = None
-        elif len(selection) == 1:
-            out_value = selection['uncertainty'].values[0]
-        else:
-            raise KeyError(f"Selection is not unique {year} {month}")
-
-        return out_value
+        position = self._find_positions([year * 12 + month - 1], unique=True)[0]
+        if position < 0:
+            return None
+        return self._column('uncertainty')[position]
 
     def zero_on_month(self, year: int, month: int) -> None:
         """
@@ -820,7 +1575,8 @@ class TimeSeriesMonthly(TimeSeries):
         self.add_offset(zero_value)
         self.manually_set_baseline(year, year)
 
-    def get_rank_from_year_and_month(self, year: int, month: int, versus_all_months=False) -> Optional[int]:
+    def get_rank_from_year_and_month(self, year: int, month: int, versus_all_months=False,
+                                     ascending: bool = False) -> Optional[int]:
         """
         Given a year and month, extract the rank of the data for that month. Ties are given the
         same rank, which is the lowest rank of the group. Default behaviour is to rank the month
@@ -835,6 +1591,8 @@ class TimeSeriesMonthly(TimeSeries):
             Month of year-month pair for which we want the rank
         versus_all_months : bool
             If set then the ranking is done for the monthly value relative to all other months.
+        ascending: bool
+            Set to True to rank low (1st) to high (nth) rather than high (1st) to low (nth)
 
         Returns
         -------
@@ -843,39 +1601,42 @@ class TimeSeriesMonthly(TimeSeries):
             all other years. If "versus_all_months" is set then returns rank of the anomaly for a particular year
             and month ranked against all other years and months.
         """
-        if versus_all_months:
-            month_select = self.df
-        else:
-            month_select = self.df[self.df['month'] == month]
-        ranked = month_select.rank(method='min', ascending=False)
-        rank = ranked[(month_select['year'] == year) & (month_select['month'] == month)]['data']
+        rank_index = self._get_index('rank', self._build_rank_index)
 
-        if len(rank) > 0:
-            return int(rank.iloc[0])
-        else:
+        position = self._find_positions([year * 12 + month - 1])[0]
+        if position < 0:
             return None
 
-    def generate_dates(self, time_units: str) -> List[int]:
-        """
-        Given a string specifying the required time units (something like days since 1800-01-01 00:00:00.0),
-        generate a list of times from the time series corresponding to those units.
+        direction = 'ascending' if ascending else 'descending'
+        if versus_all_months:
+            return int(rank_index['all_months'][direction][position])
+        return int(rank_index['by_month'][direction][position])
 
-        Parameters
-        ----------
-        time_units: str
-            String specifying the units to use for generating the times e.g. "days since 1800-01-01 00:00:00.0"
+    def _build_rank_index(self) -> dict:
+        """
+        Build the index used to look up ranks.
 
         Returns
         -------
-        List[int]
+        dict
+            Dictionary containing 'by_month', the rank of each month relative to the same month in
+            other years, and 'all_months', the rank of each month relative to all other months. Each
+            holds 'descending' and 'ascending' ranks, from high to low and from low to high.
         """
-        time_str = self.df.year.astype(str) + self.df.month.astype(str)
-        self.df['time'] = pd.to_datetime(time_str, format='%Y%m')
-        dates = cf.date2num(self.df['time'].tolist(),
-                            units=time_units,
-                            has_year_zero=False,
-                            calendar='standard')
-        return dates
+        months = self._column('month')
+        data = self._column('data')
+
+        rank_index = {}
+        for direction, ascending in [('descending', False), ('ascending', True)]:
+            by_month = np.full(len(data), np.nan)
+            for month in np.unique(months):
+                selection = (months == month)
+                by_month[selection] = rank_values(data[selection], ascending=ascending)
+
+            rank_index.setdefault('by_month', {})[direction] = by_month
+            rank_index.setdefault('all_months', {})[direction] = rank_values(data, ascending=ascending)
+
+        return rank_index
 
     def write_csv(self, filename: Path, metadata_filename: Path = None) -> None:
         """
@@ -909,15 +1670,12 @@ class TimeSeriesMonthly(TimeSeries):
         Tuple[datetime, datetime]
             Start and end dates.
         """
-        time_str = self.df.year.astype(int).astype(str) + self.df.month.astype(int).astype(str)
-        self.df['time'] = pd.to_datetime(time_str, format='%Y%m')
-
-        n_time = len(self.df['time'])
-
-        start_date = self.df['time'][0]
-        end_date = self.df['time'][n_time - 1]
+        dates = self._get_index('datetimes', self._datetimes)
+        if self._columns is None:
+            # adding the time column leaves the times and data unchanged, so the indices are kept
+            self._df['time'] = dates.copy()
 
-        return start_date, end_date
+        return pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
 
     def get_year_axis(self) -> List[float]:
         """
@@ -964,11 +1722,9 @@ class TimeSeriesMonthly(TimeSeries):
             :class:`TimeSeriesMonthly` containing running averages of length run_length. Where there are too few
             years to calculate a running average, np.nan appears in the data column of the data frame
         """
-        moving_average = copy.deepcopy(self)
-        moving_average.df['data'] = moving_average.df['data'].rolling(run_length).mean()
+        moving_average = self._derived_series(pd.Series(self._column('data')).rolling(run_length).mean())
         if centred:
-            moving_average.df['year'] = moving_average.df['year'].rolling(run_length).mean()
-            moving_average.df.dropna(how='any', inplace=True)
+            moving_average._centre_times(run_length)
 
         if centred:
             moving_average.update_history(
@@ -980,6 +1736,33 @@ class TimeSeriesMonthly(TimeSeries):
 
         return moving_average
 
+    def running_trend(self, run_length: int, min_points: Optional[int] = None):
+        """
+        Calculate a smoothed series by fitting a straight line to the past run_length months of data and
+        taking the final point as the data value instead
+
+        Parameters
+        ----------
+        run_length: int
+            Number of months for which the trend should be calculated
+        min_points: Optional[int]
+            Minimum number of non-missing months needed to calculate a trend. Defaults to run_length.
+
+        Returns
+        -------
+        TimeSeriesMonthly
+            :class:`TimeSeriesMonthly` containing the end point of trends of length run_length. Where there are
+            too few months to calculate a trend, np.nan appears in the data column of the data frame
+        """
+        moving_average = self._derived_series(
+            self.running_ols(run_length, min_points=min_points)['end_value'].to_numpy()
+        )
+
+        moving_average.update_history(f'Calculated smoothed series with {run_length}-month trends')
+        moving_average.metadata['derived'] = True
+
+        return moving_average
+
     def lowess(self, number_of_points: int = 60):
         """
         Lowess smooth the series
@@ -993,9 +1776,7 @@ class TimeSeriesMonthly(TimeSeries):
         -------
 
         """
-        moving_average = copy.deepcopy(self)
-
-        snippet = self.df.data[:]
+        snippet = self._column('data')
         time = self.get_year_axis()[:]
 
         fraction_of_data = number_of_points / len(snippet)
@@ -1007,7 +1788,7 @@ class TimeSeriesMonthly(TimeSeries):
         # fit[0: int(number_of_points / 2)] = np.nan
         # fit[-1 * int(number_of_points / 2):] = np.nan
 
-        moving_average.df.data = fit
+        moving_average = self._derived_series(fit)
 
         moving_average.update_history(
             f'Calculated lowess smoothed series with {fraction_of_data} of data used for each fit')
@@ -1022,6 +1803,8 @@ class TimeSeriesAnnual(TimeSeries):
     metadata in one object. It represents annual averages of data.
     """
 
+    __slots__ = ()
+
     def __init__(self, years: list, data: list, metadata=None, uncertainty: Optional[list] = None):
         """
         Create :class:`TimeSeriesAnnual` object from its components.
@@ -1045,10 +1828,10 @@ class TimeSeriesAnnual(TimeSeries):
 
         super().__init__(metadata)
 
-        dico = {'year': years, 'data': data}
+        columns = {'year': as_time_array(years), 'data': as_value_array(data)}
         if uncertainty is not None:
-            dico['uncertainty'] = uncertainty
-        self.df = pd.DataFrame(dico)
+            columns['uncertainty'] = as_value_array(uncertainty)
+        self._set_columns(columns)
 
     def __str__(self):
         out_str = f'TimeSeriesAnnual: {self.metadata["name"]}'
@@ -1071,13 +1854,7 @@ class TimeSeriesAnnual(TimeSeries):
         TimeSeriesAnnual
             :class:`TimeSeriesAnnual` created from the elements in the dataframe and metadata.
         """
-        years = df['year'].tolist()
-        data = df['data'].tolist()
-        if 'uncertainty' in df.columns:
-            uncertainty = df['uncertainty'].tolist()
-            return TimeSeriesAnnual(years, data, metadata, uncertainty=uncertainty)
-        else:
-            return TimeSeriesAnnual(years, data, metadata)
+        return TimeSeriesAnnual.from_frame(df, metadata)
 
     def rebaseline(self, baseline_start_year: int, baseline_end_year: int) -> None:
         """
@@ -1103,6 +1880,7 @@ class TimeSeriesAnnual(TimeSeries):
 
         # subtract climatology
         self.df['data'] = self.df['data'] - climatology
+        self._changed()
 
         # update attributes
         self.metadata['climatology_start'] = baseline_start_year
@@ -1119,7 +1897,30 @@ class TimeSeriesAnnual(TimeSeries):
         climatology = climatology_part['data'].mean()
         return climatology
 
-    def get_rank_from_year(self, year: int) -> Optional[int]:
+    def _build_rank_index(self) -> dict:
+        """
+        Build the index used to look up ranks.
+
+        Returns
+        -------
+        dict
+            Dictionary containing 'descending' and 'ascending', the ranks of each year from high to low
+            and from low to high, and 'years_by_rank', which maps each rank (high to low) to a list of
+            years with that rank.
+        """
+        years = self._column('year').tolist()
+        data = self._column('data')
+
+        descending = rank_values(data)
+
+        years_by_rank = {}
+        for year, rank in zip(years, descending.tolist()):
+            years_by_rank.setdefault(rank, []).append(year)
+
+        return {'descending': descending, 'ascending': rank_values(data, ascending=True),
+                'years_by_rank': years_by_rank}
+
+    def get_rank_from_year(self, year: int, ascending: bool = False) -> Optional[int]:
         """
         Given a year, extract the rank of the data for that year. Ties are given the
         same rank, which is the lowest rank of the group.
@@ -1128,17 +1929,23 @@ class TimeSeriesAnnual(TimeSeries):
         ----------
         year : int
             Year for which we want the rank
+        ascending: bool
+            Set to True to rank low (1st) to high (nth) rather than high (1st) to low (nth)
 
         Returns
         -------
         Optional[int]
             Rank of specified year or None if year is not available.
         """
-        ranked = self.df.rank(method='min', ascending=False)
-        rank = ranked[self.df['year'] == year]['data']
-        if len(rank) == 0:
+        rank_index = self._get_index('rank', self._build_rank_index)
+
+        position = self._find_positions([year])[0]
+        if position < 0:
             return None
-        return int(rank.iloc[0])
+
+        if ascending:
+            return int(rank_index['ascending'][position])
+        return int(rank_index['descending'][position])
 
     def get_value_from_year(self, year: int) -> Optional[float]:
         """
@@ -1154,10 +1961,37 @@ class TimeSeriesAnnual(TimeSeries):
         Optional[float]
             Value for the year, or None if year is not in the data set
         """
-        val = self.df[self.df['year'] == year]['data']
-        if len(val) == 0:
+        position = self._find_positions([year])[0]
+        if position < 0:
             return None
-        return val.iloc[0]
+        return self._column('data')[position]
+
+    def get_values(self, years) -> np.ndarray:
+        """
+        Get the data values for a set of years.
+
+        Parameters
+        ----------
+        years : array-like
+            Years for which values are desired
+
+        Returns
+        -------
+        np.ndarray
+            Values for each year, NaN where the year is not in the data set
+        """
+        return self._get_column_values('data', years)
+
+    def _time_keys(self) -> np.ndarray:
+        """
+        Get the time key, which is the year, for each row of the dataframe
+
+        Returns
+        -------
+        np.ndarray
+            Array of time keys
+        """
+        return self._column('year')
 
     def get_uncertainty_from_year(self, year: int) -> Optional[float]:
         """
@@ -1173,12 +2007,12 @@ class TimeSeriesAnnual(TimeSeries):
         Optional[float]
             Uncertainty for the year, or None if year is not in the data set
         """
-        if 'uncertainty' not in self.df.columns:
+        if not self._has_column('uncertainty'):
             return None
-        val = self.df[self.df['year'] == year]['uncertainty']
-        if len(val) == 0:
+        position = self._find_positions([year])[0]
+        if position < 0:
             return None
-        return val.iloc[0]
+        return self._column('uncertainty')[position]
 
     def get_year_from_rank(self, rank: int) -> List[int]:
         """
@@ -1196,9 +2030,8 @@ class TimeSeriesAnnual(TimeSeries):
         List[int]
             List of years that have the specified rank
         """
-        ranked = self.df.rank(method='min', ascending=False)
-        years = self.df[ranked['data'] == rank]['year'].tolist()
-        return years
+        rank_index = self._get_index('rank', self._build_rank_index)
+        return list(rank_index['years_by_rank'].get(rank, []))
 
     def running_mean(self, run_length: int, centred: bool = False):
         """
@@ -1218,11 +2051,9 @@ class TimeSeriesAnnual(TimeSeries):
             :class:`TimeSeriesAnnual` containing running averages of length run_length. Where there are too few
             years to calculate a running average, np.nan appears in the data column of the data frame
         """
-        moving_average = copy.deepcopy(self)
-        moving_average.df['data'] = moving_average.df['data'].rolling(run_length).mean()
+        moving_average = self._derived_series(pd.Series(self._column('data')).rolling(run_length).mean())
         if centred:
-            moving_average.df['year'] = moving_average.df['year'].rolling(run_length).mean()
-            moving_average.df.dropna(how='any', inplace=True)
+            moving_average._centre_times(run_length)
 
         if centred:
             moving_average.update_history(
@@ -1234,15 +2065,17 @@ class TimeSeriesAnnual(TimeSeries):
 
         return moving_average
 
-    def running_trend(self, run_length: int):
+    def running_trend(self, run_length: int, min_points: Optional[int] = None):
         """
-        Calculate a smoothed series by fitting a straight line to the past 30 years of data and
+        Calculate a smoothed series by fitting a straight line to the past run_length years of data and
         taking the final point as the data value instead
 
         Parameters
         ----------
         run_length: int
             Number of years for which the trend should be calculated
+        min_points: Optional[int]
+            Minimum number of non-missing years needed to calculate a trend. Defaults to run_length.
 
         Returns
         -------
@@ -1250,47 +2083,38 @@ class TimeSeriesAnnual(TimeSeries):
             :class:`TimeSeriesAnnual` containing the end point of trends of length run_length. Where there are too few
             years to calculate a trend, np.nan appears in the data column of the data frame
         """
-        moving_average = copy.deepcopy(self)
-        moving_average.df.data[0:run_length] = np.nan
-
-        for i in range(run_length - 1, len(self.df.data)):
-            snippet = self.df.data[i - run_length + 1:i + 1]
-            time = self.get_year_axis()[i - run_length + 1:i + 1]
-
-            m, b = np.polyfit(time, snippet, 1)
-            moving_average.df.data[i] = b + m * time.values[-1]
+        moving_average = self._derived_series(
+            self.running_ols(run_length, min_points=min_points)['end_value'].to_numpy()
+        )
 
         moving_average.update_history(f'Calculated smoothed series with {run_length}-year trends')
         moving_average.metadata['derived'] = True
 
         return moving_average
 
-    def running_lowess(self, number_of_points: int = 10):
+    def running_lowess(self, number_of_points: int = 10, iterations: int = 3):
         """
         Lowess smooth time point t by running a lowess smoother from t=0 to t=t. For a regular lowess
-        smoother see method lowess.
+        smoother see method lowess. The fits for all time points are calculated together, giving the
+        same results as running the statsmodels lowess smoother separately for each time point.
 
         Parameters
         ----------
         number_of_points: int
             Number of points to use in the lowess smoother
+        iterations: int
+            Number of robustifying iterations to use in the lowess smoother
 
         Returns
         -------
 
         """
-        moving_average = copy.deepcopy(self)
-        moving_average.df.data[0:number_of_points] = np.nan
-
-        for i in range(number_of_points, len(self.df.data)):
-            snippet = self.df.data[0:i + 1]
-            time = self.get_year_axis()[0:i + 1]
-
-            fraction_of_data = number_of_points / len(snippet)
-
-            fit = lowess(snippet, time, fraction_of_data)
-            moving_average.df.data[i] = fit[i, 1]
+        smoothed = expanding_lowess(self.get_year_axis(), self._column('data'), number_of_points,
+                                    iterations=iterations)
+        smoothed[0:number_of_points] = np.nan
+        moving_average = self._derived_series(smoothed)
 
+        fraction_of_data = number_of_points / len(smoothed)
         moving_average.update_history(
             f'Calculated lowess smoothed series with {fraction_of_data} of data used for each fit')
         moving_average.metadata['derived'] = True
@@ -1309,15 +2133,13 @@ class TimeSeriesAnnual(TimeSeries):
         -------
 
         """
-        moving_average = copy.deepcopy(self)
-
-        snippet = self.df.data[:]
+        snippet = self._column('data')
         time = self.get_year_axis()[:]
 
         fraction_of_data = number_of_points / len(snippet)
 
         fit = lowess(snippet, time, fraction_of_data)
-        moving_average.df.data[:] = fit[:, 1]
+        moving_average = self._derived_series(fit[:, 1])
 
         moving_average.update_history(
             f'Calculated lowess smoothed series with {fraction_of_data} of data used for each fit')
@@ -1342,11 +2164,9 @@ class TimeSeriesAnnual(TimeSeries):
             :class:`TimeSeriesAnnual` containing running standard deviation of length run_length. Where there are too few
             years to calculate a running average, np.nan appears in the data column of the data frame
         """
-        moving_average = copy.deepcopy(self)
-        moving_average.df['data'] = moving_average.df['data'].rolling(run_length).std()
+        moving_average = self._derived_series(pd.Series(self._column('data')).rolling(run_length).std())
         if centred:
-            moving_average.df['year'] = moving_average.df['year'].rolling(run_length).mean()
-            moving_average.df.dropna(how='any', inplace=True)
+            moving_average._centre_times(run_length)
 
         if centred:
             moving_average.update_history(
@@ -1359,21 +2179,18 @@ class TimeSeriesAnnual(TimeSeries):
         return moving_average
 
     def record_margins(self):
+        """
+        Calculate the margin by which each year beat the previous high or low record. Years that are
+        not records, and the first year, are set to NaN.
 
-        n_years = len(self.df)
-
-        out_series = copy.deepcopy(self)
-        out_series.df.loc[0, "data"] = np.nan
-
-        for i in range(1, n_years):
-            over_margin = self.df.data[i] - np.max(self.df.data[0:i])
-            under_margin = self.df.data[i] - np.min(self.df.data[0:i])
-            if over_margin > 0:
-                out_series.df.loc[i, "data"] = over_margin
-            elif under_margin < 0:
-                out_series.df.loc[i, "data"] = under_margin
-            else:
-                out_series.df.loc[i, "data"] = np.nan
+        Returns
+        -------
+        TimeSeriesAnnual
+            :class:`TimeSeriesAnnual` containing the record margins
+        """
+        margins = record_statistics(self._column('data'))['record_margin']
+        margins[0] = np.nan
+        out_series = self._derived_series(margins)
 
         return out_series
 
@@ -1399,25 +2216,6 @@ class TimeSeriesAnnual(TimeSeries):
         self.update_history(f'Selected years ending in {end_year}')
         return self
 
-    def generate_dates(self, time_units: str) -> List[datetime]:
-        """
-        Given a string specifying the required time units (something like days since 1800-01-01 00:00:00.0),
-        generate a list of times from the time series corresponding to those units.
-
-        Parameters
-        ----------
-        time_units: str
-            String specifying the units to use for generating the times e.g. "days since 1800-01-01 00:00:00.0"
-
-        Returns
-        -------
-        List[datetime]
-            List of dates
-        """
-        self.df['time'] = pd.to_datetime(self.df.year, format='%Y')
-        dates = cf.date2num(self.df['time'].tolist(), units=time_units, has_year_zero=False, calendar='standard')
-        return dates
-
     def write_csv(self, filename, metadata_filename=None):
         """
         Write the timeseries to a csv file with the specified filename. The format used for writing is given
@@ -1529,6 +2327,176 @@ def get_start_and_end_year(all_datasets: List[TimeSeriesAnnual]) -> Tuple[Option
     return min(first_years), max(last_years)
 
 
+class AlignedStack:
+    """
+    A list of time series put onto a shared time axis. The data and uncertainty for all the time
+    series are held in arrays with shape (n_datasets, n_times), with NaN where a data set has no value
+    at that time, so that statistics across data sets can be calculated for all times at once.
+    """
+
+    def __init__(self, all_datasets: List[Union[TimeSeriesAnnual, TimeSeriesMonthly, TimeSeriesIrregular]]):
+        """
+        Create an :class:`AlignedStack` from a list of time series. The time series should all be of the
+        same type. The shared time axis contains every time that appears in any of the data sets, in
+        time order.
+
+        Parameters
+        ----------
+        all_datasets: List[Union[TimeSeriesAnnual, TimeSeriesMonthly, TimeSeriesIrregular]]
+            List of time series to be aligned
+
+        Attributes
+        ----------
+        names: List[str]
+            Names of the data sets
+        time_columns: List[str]
+            Columns that identify each time: year, and month and day as appropriate
+        times: pd.DataFrame
+            Dataframe with one row for each time on the shared time axis. Includes a 'time' column
+            if all the data sets have one.
+        data: np.ndarray
+            Data values, shape (n_datasets, n_times)
+        uncertainty: np.ndarray
+            Uncertainties, shape (n_datasets, n_times), NaN for data sets without uncertainties
+        """
+        self.names = [ds.metadata['name'] for ds in all_datasets]
+
+        if isinstance(all_datasets[0], TimeSeriesIrregular):
+            self.time_columns = ['year', 'month', 'day']
+        elif isinstance(all_datasets[0], TimeSeriesMonthly):
+            self.time_columns = ['year', 'month']
+        else:
+            self.time_columns = ['year']
+
+        dataframes = [ds.df for ds in all_datasets]
+
+        # Concatenate the times from all the data sets and find where each one goes on the shared axis
+        all_times = np.concatenate([df[self.time_columns].to_numpy(dtype=np.int64) for df in dataframes])
+        unique_times, first, inverse = np.unique(all_times, axis=0, return_index=True, return_inverse=True)
+        self._positions = inverse.reshape(-1)
+        self._dataset_index = np.repeat(np.arange(len(dataframes)), [len(df) for df in dataframes])
+
+        self.times = pd.DataFrame(unique_times, columns=self.time_columns)
+        if all('time' in df.columns for df in dataframes):
+            self.times['time'] = np.concatenate([df['time'].to_numpy() for df in dataframes])[first]
+
+        self.data = self._stack(dataframes, 'data')
+        self.uncertainty = self._stack(dataframes, 'uncertainty')
+
+    def _stack(self, dataframes: List[pd.DataFrame], column: str) -> np.ndarray:
+        """
+        Put one column from each of the dataframes onto the shared time axis
+
+        Parameters
+        ----------
+        dataframes: List[pd.DataFrame]
+            Dataframes of the data sets
+        column: str
+            Name of the column
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_datasets, n_times) with NaN where a data set has no value
+        """
+        values = np.concatenate([
+            df[column].to_numpy(dtype=float) if column in df.columns else np.full(len(df), np.nan)
+            for df in dataframes
+        ])
+        stacked = np.full((len(dataframes), len(self.times)), np.nan)
+        stacked[self._dataset_index, self._positions] = values
+        return stacked
+
+    def to_dataframe(self, uncertainty: bool = False, include_time: bool = True) -> pd.DataFrame:
+        """
+        Write the stack out as a dataframe with the time columns followed by a column for each data set,
+        named with the data set name.
+
+        Parameters
+        ----------
+        uncertainty: bool
+            Set to True to add a column of uncertainties, named "<name>_uncertainty", after each data column
+        include_time: bool
+            Set to False to leave out the 'time' column
+
+        Returns
+        -------
+        pd.DataFrame
+            Dataframe with one row for each time on the shared time axis
+        """
+        times = self.times
+        if not include_time and 'time' in times.columns:
+            times = times.drop(columns=['time'])
+
+        column_names = []
+        columns = []
+        for i, name in enumerate(self.names):
+            column_names.append(name)
+            columns.append(self.data[i])
+            if uncertainty:
+                column_names.append(f"{name}_uncertainty")
+                columns.append(self.uncertainty[i])
+
+        values = pd.DataFrame(np.array(columns).reshape(len(columns), len(times)).T, columns=column_names)
+
+        return pd.concat([times, values], axis=1)
+
+    def count(self) -> np.ndarray:
+        """
+        Number of data sets with data at each time
+
+        Returns
+        -------
+        np.ndarray
+            Number of data sets, shape (n_times,)
+        """
+        return np.sum(~np.isnan(self.data), axis=0)
+
+    def mean(self) -> np.ndarray:
+        """
+        Mean of the available data sets at each time
+
+        Returns
+        -------
+        np.ndarray
+            Mean, shape (n_times,), NaN where there are no data
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            return np.nanmean(self.data, axis=0)
+
+    def standard_deviation(self, ddof: int = 1) -> np.ndarray:
+        """
+        Standard deviation of the available data sets at each time
+
+        Parameters
+        ----------
+        ddof: int
+            Delta degrees of freedom. The default of 1 gives the sample standard deviation
+
+        Returns
+        -------
+        np.ndarray
+            Standard deviation, shape (n_times,), NaN where there are too few data sets
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            return np.nanstd(self.data, axis=0, ddof=ddof)
+
+    def max_uncertainty(self) -> np.ndarray:
+        """
+        Largest uncertainty of the available data sets at each time
+
+        Returns
+        -------
+        np.ndarray
+            Maximum uncertainty, shape (n_times,), NaN where there are no uncertainties
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            return np.nanmax(self.uncertainty, axis=0)
+
+
 def make_combined_series(all_datasets: List[TimeSeriesAnnual], augmented_uncertainty=True) -> TimeSeriesAnnual:
     """
     Combine a list of datasets into a single :class:`TimeSeriesAnnual` by taking the arithmetic mean
@@ -1545,8 +2513,7 @@ def make_combined_series(all_datasets: List[TimeSeriesAnnual], augmented_uncerta
     TimeSeriesAnnual
         :class:`TimeSeriesAnnual` which is the mean of all availabale datasets in each year.
     """
-    data_frames = []
-    metadata = copy.deepcopy(all_datasets[0].metadata)
+    metadata = all_datasets[0].metadata.fork()
     metadata['name'] = 'Combined'
     metadata['display_name'] = 'Combined series'
     metadata['version'] = ''
@@ -1554,57 +2521,27 @@ def make_combined_series(all_datasets: List[TimeSeriesAnnual], augmented_uncerta
     metadata['zpos'] = 0
 
     list_attributes = ['citation', 'citation_url', 'data_citation', 'url', 'filename', 'history']
-    for i, ds in enumerate(all_datasets):
-        dfi = copy.deepcopy(ds.df)
-        dfi = dfi.rename(columns={'data': f'data_{ds.metadata["name"]}'})
-        if 'index' in dfi.columns:
-            dfi = dfi.drop(columns=['index'])
-        if 'time' in dfi.columns:
-            dfi = dfi.drop(columns=['time'])
-        data_frames.append(dfi)
-        if i > 0:
-            for att in list_attributes:
-                metadata[att].extend(ds.metadata[att])
-
-    df_merged = reduce(lambda left, right: pd.merge(left, right, on=['year'], how='outer', validate='m:m'),
-                       data_frames, )
-
-    columns = []
-    for col in df_merged.columns:
-        if 'data' in col:
-            columns.append(col)
-
-    unc_columns = []
-    for col in df_merged.columns:
-        if 'uncertainty' in col:
-            unc_columns.append(col)
-
-    df_merged['combined'] = df_merged[columns].mean(axis=1)
-    df_merged['uncertainty_a'] = df_merged[columns].std(axis=1)
-    if len(columns) == 1:
-        df_merged['uncertainty_a'] = 0.0
-    df_merged['uncertainty_a'] = df_merged['uncertainty_a'] * 1.645
+    for ds in all_datasets[1:]:
+        for att in list_attributes:
+            metadata[att].extend(ds.metadata[att])
 
-    if augmented_uncertainty:
-        df_merged['uncertainty'] = np.sqrt(df_merged['uncertainty_a'] ** 2 + 0.12 ** 2)
-    else:
-        df_merged['uncertainty_b'] = df_merged[unc_columns].max(axis=1)
-        df_merged['uncertainty'] = np.sqrt(df_merged['uncertainty_a'] ** 2 + df_merged['uncertainty_b'] ** 2)
+    stack = AlignedStack(all_datasets)
 
-    df_merged = df_merged.drop(columns=columns)
-    df_merged = df_merged.rename(columns={'combined': 'data'})
-
-    df_merged = df_merged.sort_values(by='year', ascending=True)
-    df_merged = df_merged.reset_index()
+    if len(all_datasets) == 1:
+        uncertainty_a = np.zeros(len(stack.times))
+    else:
+        uncertainty_a = stack.standard_deviation() * 1.645
 
-    to_drop = []
-    for col in df_merged.columns:
-        if 'index_' in col or 'time_' in col or 'level_' in col:
-            to_drop.append(col)
+    if augmented_uncertainty:
+        uncertainty = np.sqrt(uncertainty_a ** 2 + 0.12 ** 2)
+    else:
+        uncertainty = np.sqrt(uncertainty_a ** 2 + stack.max_uncertainty() ** 2)
 
-    df_merged = df_merged.drop(columns=to_drop)
+    combined_df = stack.times[['year']].copy()
+    combined_df['data'] = stack.mean()
+    combined_df['uncertainty'] = uncertainty
 
-    return TimeSeriesAnnual.make_from_df(df_merged, metadata)
+    return TimeSeriesAnnual.from_frame(combined_df, metadata, copy=False)
 
 
 def get_list_of_unique_variables(all_datasets: List[TimeSeriesAnnual]) -> List[str]:
@@ -1661,38 +2598,17 @@ def write_dataset_summary_file(all_datasets, csv_filename):
     if len(all_datasets) == 0:
         return None
 
-    dataframes = []
-    dataset_names = []
-    for ds in all_datasets:
-        dataframes.append(ds.df)
-        dataset_names.append(ds.metadata['name'])
-
     ds = all_datasets[0]
-
-    # Find the first and last years from all the dataframes
-    min_year = min(df['year'].min() for df in dataframes)
-    max_year = max(df['year'].max() for df in dataframes)
-
-    # Create a new dataframe that covers the whole date range
-    if isinstance(ds, TimeSeriesAnnual):
-        combined_df = pd.DataFrame({'year': range(min_year, max_year + 1)})
-    elif isinstance(ds, TimeSeriesMonthly):
-        # build a dataframe from all the unique year-month pairs in the input datasets
-        combined_df = pd.concat([df[['year', 'month']] for df in dataframes]).drop_duplicates()
-    else:
+    if not isinstance(ds, (TimeSeriesAnnual, TimeSeriesMonthly)):
         return None
 
-    # Add columns for "data" from each dataframe and rename to the display_name
-    for df, col_name in zip(dataframes, dataset_names):
-        if 'data' in df.columns:
-            if isinstance(ds, TimeSeriesAnnual):
-                merged_df = pd.merge(combined_df, df[['year', 'data']], on='year', how='left', validate='m:m')
-            if isinstance(ds, TimeSeriesMonthly):
-                merged_df = pd.merge(combined_df, df[['year', 'month', 'data']], on=['year', 'month'], how='left',
-                                     validate='m:m')
+    # Put all the data sets onto a common time axis with one column per data set
+    combined_df = AlignedStack(all_datasets).to_dataframe(include_time=False)
 
-            merged_df.rename(columns={'data': col_name}, inplace=True)
-            combined_df = merged_df
+    # Annual summaries cover every year in the range, even where none of the data sets have data
+    if isinstance(ds, TimeSeriesAnnual):
+        all_years = pd.DataFrame({'year': range(combined_df['year'].min(), combined_df['year'].max() + 1)})
+        combined_df = pd.merge(all_years, combined_df, on='year', how='left')
 
     # Write the combined DataFrame to the specified output path as a CSV file
     combined_df.to_csv(csv_filename, index=False, float_format='%.4f')
@@ -1708,7 +2624,8 @@ def create_common_dataframe(
 ) -> pd.DataFrame:
     """
     Given a list of dataframes make a single dataframe which has rows corresponding to all time steps in the
-    input dataframes
+    input dataframes. Within climind, time series are put on a common time axis with :class:`AlignedStack`;
+    this function is kept for callers that work with dataframes directly.
 
     Parameters
     ----------
@@ -1758,6 +2675,8 @@ def equalise_datasets(
         List of time series datasets whose data is to be combined in a single data frame. The data column from
         each data set will be combined into a single data from with each data column becoming a column identified
         by the "name" of the data set from its metadata.
+    uncertainty: bool
+        Set to True to also include the uncertainty column from each data set, named "<name>_uncertainty"
 
     Returns
     -------
@@ -1767,43 +2686,7 @@ def equalise_datasets(
     if len(all_datasets) <= 1:
         return all_datasets[0].df
 
-    dataframes = []
-    for ds in all_datasets:
-        if 'data' in ds.df.columns:
-            dataframes.append(ds.df)
-
-    ds = all_datasets[0]
-    monthly = isinstance(ds, TimeSeriesMonthly)
-    annual = isinstance(ds, TimeSeriesAnnual)
-    irregular = isinstance(ds, TimeSeriesIrregular)
-
-    combined_df = create_common_dataframe(dataframes, monthly=monthly, annual=annual, irregular=irregular)
-
-    added_columns = ['data']
-    if uncertainty:
-        added_columns.append('uncertainty')
-
-    on_columns = ['year']
-    if monthly:
-        on_columns = ['year', 'month']
-    if irregular:
-        on_columns = ['year', 'month', 'day']
-    columns = [*on_columns, *added_columns]
-
-    # for each dataset in the list, merge it with the combined dataframe, rename the data column and
-    # update the combined dataframe
-    for ds in all_datasets:
-        merged_df = pd.merge(combined_df, ds.df[columns], on=on_columns, how='left', validate='m:m')
-        merged_df.rename(columns={'data': ds.metadata['name']}, inplace=True)
-        if uncertainty:
-            merged_df.rename(columns={'uncertainty': f"{ds.metadata['name']}_uncertainty"}, inplace=True)
-        combined_df = merged_df
-        columns = [*on_columns, *added_columns]
-
-    combined_df = combined_df.sort_values(by=on_columns, ascending=True)
-    combined_df = combined_df.reset_index(drop=True)
-
-    return combined_df
+    return AlignedStack(all_datasets).to_dataframe(uncertainty=uncertainty)
 
 
 def write_dataset_summary_file_with_metadata(
@@ -1834,7 +2717,7 @@ def write_dataset_summary_file_with_metadata(
     ds = all_datasets[0]
 
     # To print out the datasets together, it's necessary to put them on the same time axis
-    common_datasets = equalise_datasets(all_datasets)
+    common_datasets = AlignedStack(all_datasets).to_dataframe()
 
     # populate template to make webpage
     env = Environment(
@@ -1737,11 +1737,13 @@ def rank_by_dataset(out_dir: Path, all_datasets: List[TimeSeriesMonthly], image_
     first_year = None
 
     for j, ds in enumerate(all_datasets):
-        n_time = len(ds.df.data)
+        years = ds.df['year'].to_numpy()
+        months = ds.df['month'].to_numpy()
+        n_time = len(years)
         for i in range(n_time_x - n_months, n_time):
 
-            year = ds.df.year[i]
-            month = ds.df.month[i]
+            year = years[i]
+            month = months[i]
 
             rank = ds.get_rank_from_year_and_month(year, month)
 
@@ -21,6 +21,7 @@ from numpy import ndarray
 import climind.stats.paragraphs as pg
 from climind.data_types.timeseries import TimeSeriesMonthly, TimeSeriesAnnual
 from climind.data_types.grid import GridAnnual
+from climind.stats.trends import rolling_ols
 
 
 def calculate_trends(all_datasets: List[TimeSeriesAnnual], trend_start_year: int, trend_end_year: int) -> Tuple[
@@ -43,15 +44,15 @@ def calculate_trends(all_datasets: List[TimeSeriesAnnual], trend_start_year: int
     Tuple[float, float, float]
         returns the mean trend, minimum trend and maximum trend from the input datasets in units/decade
     """
+    # fit all the data sets at once, using a single window covering the trend period
+    years = np.arange(trend_start_year, trend_end_year + 1)
     all_trends = []
 
-    for ds in all_datasets:
-        subset = ds.df.loc[
-            (ds.df['year'] >= trend_start_year) & (ds.df['year'] <= trend_end_year) & (~ds.df['data'].isnull())]
-
-        if len(subset) > 25:
-            trends = np.polyfit(subset['year'], subset['data'], 1)
-            all_trends.append(trends[0] * 10.)
+    if len(years) > 0 and len(all_datasets) > 0:
+        all_data = np.array([ds.get_values(years) for ds in all_datasets])
+        fit = rolling_ols(years, all_data, len(years), min_points=26)
+        trends = fit['trend'][:, -1]
+        all_trends = trends[~np.isnan(trends)] * 10.
 
     # calculate the mean trend and max and min trends
     mean_trend = float(np.mean(all_trends))
@@ -82,10 +83,8 @@ def calculate_ranks(all_datasets: List[TimeSeriesAnnual], year: int, ascending:
     all_ranks = []
 
     for ds in all_datasets:
-        ranked = ds.df.rank(method='min', ascending=ascending)
-        subrank = ranked[ds.df['year'] == year]['data']
-        if len(subrank) != 0:
-            rank = int(subrank.iloc[0])
+        rank = ds.get_rank_from_year(year, ascending=ascending)
+        if rank is not None:
             all_ranks.append(rank)
 
     if len(all_ranks) == 0:
@@ -117,9 +116,9 @@ def calculate_values(all_datasets: List[TimeSeriesAnnual], year: int) -> Tuple[f
     all_values = []
 
     for ds in all_datasets:
-        value = ds.df[ds.df['year'] == year]['data']
-        if len(value) > 0:
-            all_values.append(value.values[0])
+        value = ds.get_value_from_year(year)
+        if value is not None:
+            all_values.append(value)
 
     # calculate the mean trend and max and min trends
     mean_value = float(np.mean(all_values))
@@ -148,9 +147,9 @@ def calculate_values_ipcc_style(all_datasets: List[TimeSeriesAnnual], year: int)
     all_values = []
 
     for ds in all_datasets:
-        value = ds.df[ds.df['year'] == year]['data']
-        if len(value) > 0:
-            all_values.append(value.values[0])
+        value = ds.get_value_from_year(year)
+        if value is not None:
+            all_values.append(value)
 
     # calculate the mean trend and max and min trends
     mean_value = float(np.mean(all_values))
@@ -17,7 +17,6 @@
 from pathlib import Path
 from datetime import datetime
 from typing import Union, Optional
-import copy
 from climind.data_manager.metadata import CombinedMetadata
 from climind.data_types.timeseries import TimeSeriesAnnual, TimeSeriesMonthly
 from climind.data_types.grid import GridMonthly
@@ -132,7 +131,7 @@ def read_ts(out_dir: Path, metadata: CombinedMetadata, **kwargs) -> Union[
         filename.append(file)
         last_modified_times.append(get_last_modified_time(file))
 
-    construction_metadata = copy.deepcopy(metadata)
+    construction_metadata = metadata.fork()
     construction_metadata.dataset['last_modified'] = last_modified_times
 
     chosen_reader_script = get_reader_script_name(metadata, **kwargs)
@@ -47,10 +47,10 @@ def read_ts(out_dir: Path, metadata: CombinedMetadata, **kwargs):
 def read_annual_ts(filename: Path, metadata: CombinedMetadata) -> ts.TimeSeriesAnnual:
     df = xa.open_dataset(filename)
 
-    data = df.ph.values.tolist()
-    uncertainty = df.ph_uncertainty.data.tolist()
-    years = df.time.dt.year.data.tolist()
+    data = df.ph.values
+    uncertainty = df.ph_uncertainty.data
+    years = df.time.dt.year.data
 
     metadata.creation_message()
 
-    return ts.TimeSeriesAnnual(years, data, metadata=metadata, uncertainty=uncertainty)
+    return ts.TimeSeriesAnnual.from_arrays(years, data, metadata=metadata, uncertainty=uncertainty)
@@ -29,13 +29,14 @@ from scipy.signal import savgol_filter
 def read_monthly_ts(filename: List[Path], metadata: CombinedMetadata) -> ts.TimeSeriesIrregular:
     ds = xa.open_dataset(filename[0])
 
-    anomalies = (10 * ds.MSL_filtered_GIA_corrected_adjusted.values).tolist()
-    uncertainty = (10 * ds.uncertainty_envelop.values).tolist()
-    years = ds.time.dt.year.values.tolist()
-    months = ds.time.dt.month.values.tolist()
-    days = ds.time.dt.day.values.tolist()
+    anomalies = 10 * ds.MSL_filtered_GIA_corrected_adjusted.values
+    uncertainty = 10 * ds.uncertainty_envelop.values
+    years = ds.time.dt.year.values
+    months = ds.time.dt.month.values
+    days = ds.time.dt.day.values
 
     metadata.creation_message()
-    outseries = ts.TimeSeriesIrregular(years, months, days, anomalies, metadata=metadata, uncertainty=uncertainty)
+    outseries = ts.TimeSeriesIrregular.from_arrays(years, months, days, anomalies, metadata=metadata,
+                                                   uncertainty=uncertainty)
 
     return outseries
@@ -47,13 +47,13 @@ def read_ts(out_dir: Path, metadata: CombinedMetadata, **kwargs):
 def read_monthly_ts(filename: Path, metadata: CombinedMetadata) -> ts.TimeSeriesMonthly:
     df = xa.open_dataset(filename)
 
-    data = df.sst_anomaly.values.tolist()
-    years = df.time.dt.year.data.tolist()
-    months = df.time.dt.month.data.tolist()
+    data = df.sst_anomaly.values
+    years = df.time.dt.year.data
+    months = df.time.dt.month.data
 
     metadata.creation_message()
 
-    return ts.TimeSeriesMonthly(years, months, data, metadata=metadata)
+    return ts.TimeSeriesMonthly.from_arrays(years, months, data, metadata=metadata)
 
 def read_annual_ts(filename: Path, metadata: CombinedMetadata) -> ts.TimeSeriesAnnual:
     return read_monthly_ts(filename, metadata).make_annual()
\ No newline at end of file
@@ -73,19 +73,16 @@ def read_monthly_ts(filename: List[Path], metadata: CombinedMetadata) -> ts.Time
     years = time.astype('datetime64[Y]').astype(int) + 1970
     months = time.astype('datetime64[M]').astype(int) % 12 + 1
 
-    years = years.tolist()
-    months = months.tolist()
-
     if metadata['variable'] == 'tas':
-        anomalies = area_average.temperature.data.tolist()
+        anomalies = area_average.temperature.data
     elif metadata['variable'] == 'sst':
-        anomalies = area_average.sst.data.tolist()
+        anomalies = area_average.sst.data
     elif metadata['variable'] == 'lsat':
-        anomalies = area_average.lsat.data.tolist()
+        anomalies = area_average.lsat.data
 
     metadata.creation_message()
 
-    return ts.TimeSeriesMonthly(years, months, anomalies, metadata=metadata)
+    return ts.TimeSeriesMonthly.from_arrays(years, months, anomalies, metadata=metadata)
 
 
 def read_annual_ts(filename: List[Path], metadata: CombinedMetadata) -> ts.TimeSeriesAnnual:
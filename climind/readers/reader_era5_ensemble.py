@@ -16,13 +16,13 @@
 
 from pathlib import Path
 from typing import Tuple, List
-import itertools
 import xarray as xa
 import numpy as np
 import climind.data_types.grid as gd
 import climind.data_types.timeseries as ts
 import copy
 from climind.readers.generic_reader import get_last_modified_time
+from climind.readers.reader_era5 import select_expver
 from climind.data_manager.metadata import CombinedMetadata
 
 
@@ -113,45 +113,10 @@ def read_ts(out_dir: Path, metadata: CombinedMetadata, **kwargs):
 def read_monthly_5x5_grid(filename, metadata) -> gd.GridMonthly:
     combo = read_grid(filename)
 
-    number_of_months = combo.t2m.data.shape[0]
-
-    # transfer matrix for regridding, there are 20 quarter degree grid
-    # cells in a 5 degree grid cell, however, the ERA5 grid is offset half a
+    # regrid in blocks of 20 quarter degree grid cells, however, the ERA5 grid is offset half a
     # grid cell because the first grid cell centre is at the North Pole and
-    # the last is at the South Pole
-    transfer = np.zeros((21, 21)) + 1
-    transfer[0, :] = transfer[0, :] * 0.5
-    transfer[20, :] = transfer[20, :] * 0.5
-    transfer[:, 0] = transfer[:, 0] * 0.5
-    transfer[:, 20] = transfer[:, 20] * 0.5
-
-    transfer_sum = np.sum(transfer)
-
-    enlarged_array = np.zeros((721, 1441))
-
-    target_grid = np.zeros((number_of_months, 36, 72))
-
-    for m in range(number_of_months):
-
-        if len(combo.t2m.data.shape) == 3:
-            enlarged_array[:, 0:1440] = combo.t2m.data[m, :, :]
-            enlarged_array[:, 1440] = combo.t2m.data[m, :, 0]
-        else:
-            if np.isnan(combo.t2m.data[m, 0, 0, 0]):
-                enlarged_array[:, 0:1440] = combo.t2m.data[m, :, :, 1]
-                enlarged_array[:, 1440] = combo.t2m.data[m, :, 0, 1]
-            else:
-                enlarged_array[:, 0:1440] = combo.t2m.data[m, :, :, 0]
-                enlarged_array[:, 1440] = combo.t2m.data[m, :, 0, 0]
-
-        for xx, yy in itertools.product(range(72), range(36)):
-            lox = xx * 20
-            hix = (xx + 1) * 20
-            loy = yy * 20
-            hiy = (yy + 1) * 20
-            weighted = transfer * enlarged_array[loy:hiy + 1, lox:hix + 1]
-            grid_mean = np.sum(weighted) / transfer_sum
-            target_grid[m, yy, xx] = grid_mean
+    # the last is at the South Pole, so the edges of each block get half weight
+    target_grid = gd.block_regrid(select_expver(combo.t2m.data), 20)
 
     # flip and shift target_grid to match HadCRUT-like coords lat -90 to 90 and lon -180 to 180
     target_grid = np.flip(target_grid, 1)
@@ -177,45 +142,10 @@ def read_monthly_5x5_grid(filename, metadata) -> gd.GridMonthly:
 def read_monthly_1x1_grid(filename, metadata) -> gd.GridMonthly:
     combo = read_grid(filename)
 
-    number_of_months = combo.t2m.data.shape[0]
-
-    # transfer matrix for regridding, there are 4 quarter degree grid
-    # cells in a 1 degree grid cell, however, the ERA5 grid is offset half a
+    # regrid in blocks of 4 quarter degree grid cells, however, the ERA5 grid is offset half a
     # grid cell because the first grid cell centre is at the North Pole and
-    # the last is at the South Pole
-    transfer = np.zeros((5, 5)) + 1
-    transfer[0, :] = transfer[0, :] * 0.5
-    transfer[4, :] = transfer[4, :] * 0.5
-    transfer[:, 0] = transfer[:, 0] * 0.5
-    transfer[:, 4] = transfer[:, 4] * 0.5
-
-    transfer_sum = np.sum(transfer)
-
-    enlarged_array = np.zeros((721, 1441))
-
-    target_grid = np.zeros((number_of_months, 180, 360))
-
-    for m in range(number_of_months):
-
-        if len(combo.t2m.data.shape) == 3:
-            enlarged_array[:, 0:1440] = combo.t2m.data[m, :, :]
-            enlarged_array[:, 1440] = combo.t2m.data[m, :, 0]
-        else:
-            if np.isnan(combo.t2m.data[m, 0, 0, 0]):
-                enlarged_array[:, 0:1440] = combo.t2m.data[m, :, :, 1]
-                enlarged_array[:, 1440] = combo.t2m.data[m, :, 0, 1]
-            else:
-                enlarged_array[:, 0:1440] = combo.t2m.data[m, :, :, 0]
-                enlarged_array[:, 1440] = combo.t2m.data[m, :, 0, 0]
-
-        for xx, yy in itertools.product(range(360), range(180)):
-            lox = xx * 4
-            hix = (xx + 1) * 4
-            loy = yy * 4
-            hiy = (yy + 1) * 4
-            weighted = transfer * enlarged_array[loy:hiy + 1, lox:hix + 1]
-            grid_mean = np.sum(weighted) / transfer_sum
-            target_grid[m, yy, xx] = grid_mean
+    # the last is at the South Pole, so the edges of each block get half weight
+    target_grid = gd.block_regrid(select_expver(combo.t2m.data), 4)
 
     # flip and shift target_grid to match HadCRUT-like coords lat -90 to 90 and lon -180 to 180
     target_grid = np.flip(target_grid, 1)
@@ -66,6 +66,47 @@ def build_transfer(xx: int, yy: int):
     return transfer, lox, hix, loy, hiy
 
 
+def build_stencils():
+    """
+    Build the transfer matrices for all the 5x5 grid cells at once, along with the
+    index of the first 2x2 grid cell in each window.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Array of transfer matrices with shape (36, 72, 3, 3), the first latitude index of
+        each row and the first longitude index of each column of the 5x5 grid
+    """
+    transfer = np.zeros((36, 72, 3, 3))
+    lat_indices = np.zeros(36, dtype=int)
+    lon_indices = np.zeros(72, dtype=int)
+
+    for xx, yy in itertools.product(range(72), range(36)):
+        transfer[yy, xx], lon_indices[xx], _, lat_indices[yy], _ = build_transfer(xx, yy)
+
+    return transfer, lat_indices, lon_indices
+
+
+def regrid_to_5x5(grid: np.ndarray) -> np.ndarray:
+    """
+    Regrid an array of 2x2 fields to 5x5 using a weighted average of the available data in
+    each 5x5 grid cell. 2x2 grid cells that straddle the boundary between two 5x5 grid cells
+    get half weight in each.
+
+    Parameters
+    ----------
+    grid: np.ndarray
+        Array of shape (ntime, 90, 180)
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (ntime, 36, 72)
+    """
+    transfer, lat_indices, lon_indices = build_stencils()
+    return gd.stencil_average(grid, transfer, lat_indices, lon_indices)
+
+
 def read_monthly_grid(filename: List[Path], metadata: CombinedMetadata, **kwargs) -> gd.GridMonthly:
     df = xa.open_dataset(filename[0])
     df = df.rename({'tempanomaly': 'tas_mean',
@@ -112,19 +153,7 @@ def read_monthly_1x1_grid(filename: List[Path], metadata: CombinedMetadata, **kw
 
 def read_monthly_5x5_grid(filename: List[Path], metadata: CombinedMetadata, **kwargs) -> gd.GridMonthly:
     gistemp = xa.open_dataset(filename[0])
-    number_of_months = len(gistemp.time.data)
-    target_grid = np.zeros((number_of_months, 36, 72))
-
-    for m, xx, yy in itertools.product(range(number_of_months), range(72), range(36)):
-        transfer, lox, hix, loy, hiy = build_transfer(xx, yy)
-        selection = gistemp.tempanomaly.data[m, loy:hiy + 1, lox:hix + 1]
-        index = (~np.isnan(selection))
-        if np.count_nonzero(index) > 0:
-            weighted = transfer[index] * selection[index]
-            grid_mean = np.sum(weighted) / np.sum(transfer[index])
-        else:
-            grid_mean = np.nan
-        target_grid[m, yy, xx] = grid_mean
+    target_grid = regrid_to_5x5(gistemp.tempanomaly.data)
 
     latitudes = np.linspace(-87.5, 87.5, 36)
     longitudes = np.linspace(-177.5, 177.5, 72)
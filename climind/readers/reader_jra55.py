@@ -25,6 +25,7 @@ import climind.data_types.timeseries as ts
 import climind.data_types.grid as gd
 from climind.readers.generic_reader import get_last_modified_time
 from climind.data_manager.metadata import CombinedMetadata
+from climind.config.config import CACHE_DIR
 
 from climind.readers.generic_reader import read_ts
 
@@ -73,31 +74,9 @@ def read_monthly_5x5_grid(filename: List[Path], metadata: CombinedMetadata, **kw
     jra55_125 = ds.tas_mean
     number_of_months = jra55_125.shape[0]
 
-    target_grid = np.zeros((number_of_months, 36, 72))
-
-    transfer = np.zeros((5, 5)) + 1.0
-    transfer[0, :] = transfer[0, :] * 0.5
-    transfer[4, :] = transfer[4, :] * 0.5
-    transfer[:, 0] = transfer[:, 0] * 0.5
-    transfer[:, 4] = transfer[:, 4] * 0.5
-
-    transfer_sum = np.sum(transfer)
-
-    for month in range(number_of_months):
-
-        enlarged_array = np.zeros((145, 289))
-        enlarged_array[:, 0:288] = jra55_125[month, :, :]
-        enlarged_array[:, 288] = jra55_125[month, :, 0]
-
-        for xx, yy in itertools.product(range(72), range(36)):
-            lox = xx * 4
-            hix = (xx + 1) * 4
-            loy = yy * 4
-            hiy = (yy + 1) * 4
-
-            weighted = transfer * enlarged_array[loy:hiy + 1, lox:hix + 1]
-            grid_mean = np.sum(weighted) / transfer_sum
-            target_grid[month, yy, xx] = grid_mean
+    # regrid in blocks of 4 1.25 degree grid cells. The first grid cell centre is at the
+    # North Pole and the last is at the South Pole, so the edges of each block get half weight
+    target_grid = gd.block_regrid(jra55_125.data, 4)
 
     # flip and shift target_grid to match HadCRUT-like coords lat -90 to 90 and lon -180 to 180
     target_grid = np.flip(target_grid, 1)
@@ -126,16 +105,9 @@ def read_monthly_1x1_grid(filename: List[Path], metadata: CombinedMetadata, **kw
     jra55_125 = ds.tas_mean
     number_of_months = jra55_125.shape[0]
 
-    target_grid = np.zeros((number_of_months, 180, 360))
-
-    for month in range(number_of_months):
-        enlarged_array = np.zeros((145, 289))
-        enlarged_array[:, 0:288] = jra55_125[month, :, :]
-        enlarged_array[:, 288] = jra55_125[month, :, 0]
-
-        regridded = gd.simple_regrid(enlarged_array, -180. - 1.25 / 2., -90. - 1.25 / 2., 1.25, 1.0)
-
-        target_grid[month, :, :] = regridded[:, :]
+    # the weights depend only on the grids so they are calculated once and cached
+    regridder = gd.Regridder(-180. - 1.25 / 2., -90. - 1.25 / 2., 1.25, (145, 288), 1.0, cache_dir=CACHE_DIR)
+    target_grid = regridder.apply(jra55_125.data)
 
     # flip and shift target_grid to match HadCRUT-like coords lat -90 to 90 and lon -180 to 180
     target_grid = np.flip(target_grid, 1)
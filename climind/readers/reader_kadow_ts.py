@@ -92,13 +92,13 @@ def read_monthly_ts(filename: List[Path], metadata: CombinedMetadata) -> ts.Time
 
     ntimes = df.tas.data.shape[0]
 
-    years = df.time.dt.year.data.tolist()
-    months = df.time.dt.month.data.tolist()
-    anomalies = np.reshape(df.tas.data, (ntimes)).tolist()
+    years = df.time.dt.year.data
+    months = df.time.dt.month.data
+    anomalies = np.reshape(df.tas.data, (ntimes))
 
     metadata.creation_message()
 
-    return ts.TimeSeriesMonthly(years, months, anomalies, metadata=metadata)
+    return ts.TimeSeriesMonthly.from_arrays(years, months, anomalies, metadata=metadata)
 
 
 def read_annual_ts(filename: List[Path], metadata: CombinedMetadata) -> ts.TimeSeriesAnnual:
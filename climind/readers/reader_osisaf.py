@@ -55,11 +55,11 @@ def read_irregular_ts(filename: List[Path], metadata: CombinedMetadata) -> ts.Ti
 
     df = xa.open_dataset(filename[0])
 
-    years = df.time.dt.year.data.tolist()
-    months = df.time.dt.month.data.tolist()
-    days = df.time.dt.day.data.tolist()
-    anomalies = df.sie.data.tolist()
+    years = df.time.dt.year.data
+    months = df.time.dt.month.data
+    days = df.time.dt.day.data
+    anomalies = df.sie.data
 
     metadata.creation_message()
 
-    return ts.TimeSeriesIrregular(years, months, days, anomalies, metadata=metadata)
\ No newline at end of file
+    return ts.TimeSeriesIrregular.from_arrays(years, months, days, anomalies, metadata=metadata)
\ No newline at end of file
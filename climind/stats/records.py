@@ -0,0 +1,137 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Record statistics - running highs and lows, record flags, margins over the previous record and the
+number of time steps since the last record - calculated in a single pass using cumulative maxima and
+minima. Data can be a single series or an array of series sharing the same time axis, with time along
+the last axis. Missing data (NaN) are skipped.
+"""
+import numpy as np
+
+STATISTICS = ['running_max', 'running_min', 'high_margin', 'low_margin', 'is_high_record', 'is_low_record',
+              'record_margin', 'steps_since_high_record', 'steps_since_low_record']
+
+
+def _steps_since(flags: np.ndarray) -> np.ndarray:
+    """
+    Number of time steps since the most recent True value at or before each position.
+
+    Parameters
+    ----------
+    flags: np.ndarray
+        Boolean array, shape (n_series, n_times)
+
+    Returns
+    -------
+    np.ndarray
+        Number of time steps since the last True value, NaN if there is none
+    """
+    position = np.arange(flags.shape[-1])
+    last = np.maximum.accumulate(np.where(flags, position, -1), axis=-1)
+    return np.where(last >= 0, position - last, np.nan)
+
+
+def _record_statistics(data: np.ndarray) -> dict:
+    """
+    Calculate the record statistics along the last axis of a 2-d array
+
+    Parameters
+    ----------
+    data: np.ndarray
+        Data values, shape (n_series, n_times)
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays, each the same shape as data. See :func:`record_statistics`.
+    """
+    present = ~np.isnan(data)
+
+    # fmax and fmin ignore NaN, so missing values don't interrupt the running extremes
+    running_max = np.fmax.accumulate(data, axis=-1)
+    running_min = np.fmin.accumulate(data, axis=-1)
+
+    missing_column = np.full((data.shape[0], 1), np.nan)
+    previous_max = np.concatenate([missing_column, running_max[:, :-1]], axis=-1)
+    previous_min = np.concatenate([missing_column, running_min[:, :-1]], axis=-1)
+
+    high_margin = data - previous_max
+    low_margin = data - previous_min
+
+    first_value = present & np.isnan(previous_max)
+    is_high_record = (high_margin > 0) | first_value
+    is_low_record = (low_margin < 0) | first_value
+
+    record_margin = np.where(high_margin > 0, high_margin, np.where(low_margin < 0, low_margin, np.nan))
+
+    return {
+        'running_max': running_max,
+        'running_min': running_min,
+        'high_margin': high_margin,
+        'low_margin': low_margin,
+        'is_high_record': is_high_record,
+        'is_low_record': is_low_record,
+        'record_margin': record_margin,
+        'steps_since_high_record': _steps_since(is_high_record),
+        'steps_since_low_record': _steps_since(is_low_record),
+    }
+
+
+def record_statistics(data, groups=None) -> dict:
+    """
+    Calculate record statistics for one or more series. If groups are given, records are calculated
+    separately for each group, so that, for example, each calendar month of a monthly series is compared
+    only with the same month in other years.
+
+    Parameters
+    ----------
+    data: array-like
+        Data values, shape (n_times,) or (n_series, n_times). NaN marks missing data.
+    groups: Optional[array-like]
+        Label for each time step, shape (n_times,). Records are calculated separately for each label.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays, the same shape as data, giving at each point 'running_max' and
+        'running_min', the highest and lowest values up to and including that point, 'high_margin' and
+        'low_margin', the difference between the value and the highest and lowest preceding values,
+        'is_high_record' and 'is_low_record', True where the value exceeds all preceding values (the
+        first value is counted as a record), 'record_margin', the high margin for high records, the low
+        margin for low records and NaN otherwise, and 'steps_since_high_record' and
+        'steps_since_low_record', the number of time steps (in the group) since the last record.
+    """
+    data = np.asarray(data, dtype=float)
+    one_dimensional = data.ndim == 1
+    data = np.atleast_2d(data)
+
+    if groups is None:
+        statistics = _record_statistics(data)
+    else:
+        groups = np.asarray(groups)
+        statistics = {}
+        for group in np.unique(groups):
+            selection = groups == group
+            group_statistics = _record_statistics(data[:, selection])
+            for key in group_statistics:
+                if key not in statistics:
+                    statistics[key] = np.zeros(data.shape, dtype=group_statistics[key].dtype)
+                statistics[key][:, selection] = group_statistics[key]
+
+    if one_dimensional:
+        statistics = {key: statistics[key][0] for key in statistics}
+
+    return statistics
@@ -0,0 +1,192 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Lowess smoothing of the end points of an expanding window. This reproduces running the statsmodels lowess
+smoother on the first i points of a series and keeping the fit at the i'th point, for every i, but
+calculates the fits for many windows at once.
+"""
+import numpy as np
+
+# Maximum number of array elements used when calculating the fits for a block of windows
+MAX_BLOCK_ELEMENTS = 2_000_000
+
+
+def _neighbourhoods(x: np.ndarray, number_of_points: int, ends: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Find the indices of the nearest neighbours used by lowess to fit each point in each window.
+
+    Parameters
+    ----------
+    x: np.ndarray
+        Sorted x values of the whole series
+    number_of_points: int
+        Number of points in each neighbourhood
+    ends: np.ndarray
+        Index of the last point in each window, shape (n_windows,)
+    points: np.ndarray
+        Index of each point to be fitted in each window, shape (n_windows, n_points)
+
+    Returns
+    -------
+    np.ndarray
+        Indices of the neighbours, shape (n_windows, n_points, number_of_points)
+    """
+    # As in statsmodels, the neighbourhood is moved to the right while the point is beyond the
+    # middle of the neighbourhood and the neighbourhood is not at the end of the window
+    midpoints = (x[:len(x) - number_of_points] + x[number_of_points:]) / 2.
+    left = np.searchsorted(midpoints, x[points], side='left')
+    left = np.minimum(left, (ends + 1 - number_of_points)[:, np.newaxis])
+    return left[..., np.newaxis] + np.arange(number_of_points)
+
+
+def _local_fits(x: np.ndarray, y: np.ndarray, points: np.ndarray, neighbours: np.ndarray,
+                residual_weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted local linear fits, using tricube weights of distance multiplied by the residual weights.
+
+    Parameters
+    ----------
+    x: np.ndarray
+        Sorted x values of the whole series
+    y: np.ndarray
+        y values of the whole series
+    points: np.ndarray
+        Index of each point to be fitted, shape (n_windows, n_points)
+    neighbours: np.ndarray
+        Indices of the neighbours of each point, shape (n_windows, n_points, number_of_points)
+    residual_weights: np.ndarray
+        Weight of each neighbour based on its residual, shape (n_windows, n_points, number_of_points)
+
+    Returns
+    -------
+    np.ndarray
+        Fitted values, shape (n_windows, n_points)
+    """
+    x_point = x[points][..., np.newaxis]
+    x_neighbours = x[neighbours]
+
+    radius = np.maximum(x_point[..., 0] - x_neighbours[..., 0], x_neighbours[..., -1] - x_point[..., 0])
+    distance = np.abs(x_neighbours - x_point) / radius[..., np.newaxis]
+
+    weights = (1 - distance ** 3) ** 3 * residual_weights
+    sum_weights = np.sum(weights, axis=-1)
+    regression_ok = (sum_weights > 0) & (np.count_nonzero(weights, axis=-1) != 1)
+
+    weights = weights / np.where(regression_ok, sum_weights, 1.0)[..., np.newaxis]
+    mean_x = np.sum(weights * x_neighbours, axis=-1)[..., np.newaxis]
+    variance_x = np.sum(weights * (x_neighbours - mean_x) ** 2, axis=-1)[..., np.newaxis]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hat = weights * (1.0 + (x_point - mean_x) * (x_neighbours - mean_x) / variance_x)
+    fits = np.sum(hat * y[neighbours], axis=-1)
+
+    # where the fit can't be made, statsmodels uses the data value
+    return np.where(regression_ok, fits, y[points])
+
+
+def _robustness_weights(residuals: np.ndarray) -> np.ndarray:
+    """
+    Bisquare weights of the residuals scaled by six times the median absolute residual of each window.
+
+    Parameters
+    ----------
+    residuals: np.ndarray
+        Residuals, shape (n_windows, n_points), NaN for points outside the window
+
+    Returns
+    -------
+    np.ndarray
+        Weights, shape (n_windows, n_points)
+    """
+    residuals = np.abs(residuals)
+    median = np.nanmedian(residuals, axis=1)[:, np.newaxis]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scaled = np.where(median == 0, (residuals > 0).astype(float), residuals / (6.0 * median))
+    scaled = np.minimum(scaled, 1.0)
+
+    return (1 - scaled ** 2) ** 2
+
+
+def expanding_lowess(x, y, number_of_points: int, iterations: int = 3) -> np.ndarray:
+    """
+    For each i, lowess smooth the first i + 1 points of the series, using number_of_points points in
+    each local fit, and return the fitted value at point i. Uses the same tricube distance weights,
+    bisquare robustness weights and neighbourhoods as the statsmodels lowess smoother.
+
+    Parameters
+    ----------
+    x: array-like
+        x values, which must be sorted into increasing order
+    y: array-like
+        y values. Points with missing (NaN) values are not used.
+    number_of_points: int
+        Number of points used in each local fit
+    iterations: int
+        Number of robustifying iterations. If zero, only the fit at the end point of each window needs
+        to be calculated.
+
+    Returns
+    -------
+    np.ndarray
+        Fitted value at the end of each window. NaN for windows with fewer than number_of_points points
+        and for points with missing data.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    output = np.full(len(y), np.nan)
+
+    present = ~np.isnan(y) & ~np.isnan(x)
+    positions = np.nonzero(present)[0]
+    x = x[present]
+    y = y[present]
+    n = len(y)
+
+    if n < number_of_points or number_of_points < 2:
+        return output
+
+    all_ends = np.arange(number_of_points - 1, n)
+    fitted_ends = np.zeros(len(all_ends))
+
+    if iterations == 0:
+        # only the fit at the end point of each window is needed
+        neighbours = _neighbourhoods(x, number_of_points, all_ends, all_ends[:, np.newaxis])
+        fitted_ends = _local_fits(x, y, all_ends[:, np.newaxis], neighbours, np.ones(neighbours.shape))[:, 0]
+    else:
+        block_size = max(1, MAX_BLOCK_ELEMENTS // (n * number_of_points))
+        for block_start in range(0, len(all_ends), block_size):
+            ends = all_ends[block_start:block_start + block_size]
+            n_points = ends[-1] + 1
+
+            points = np.broadcast_to(np.arange(n_points), (len(ends), n_points))
+            inside = points <= ends[:, np.newaxis]
+            # points beyond the end of a window are fitted as if they were the last point, then ignored
+            points = np.where(inside, points, ends[:, np.newaxis])
+
+            neighbours = _neighbourhoods(x, number_of_points, ends, points)
+            residual_weights = np.ones(neighbours.shape)
+
+            for iteration in range(iterations + 1):
+                fits = _local_fits(x, y, points, neighbours, residual_weights)
+                if iteration < iterations:
+                    residuals = np.where(inside, y[points] - fits, np.nan)
+                    weights = _robustness_weights(residuals)
+                    residual_weights = weights[np.arange(len(ends))[:, np.newaxis, np.newaxis], neighbours]
+
+            fitted_ends[block_start:block_start + len(ends)] = fits[np.arange(len(ends)), ends]
+
+    output[positions[all_ends]] = fitted_ends
+    return output
@@ -0,0 +1,108 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Linear trends calculated over many windows, or for many data sets, at once. The least squares fits are
+calculated from running sums of t, y, t², ty and y², so the cost does not depend on the length of the
+window. Missing data (NaN) are left out of the sums.
+"""
+import numpy as np
+
+
+def rolling_ols(time, data, window: int, min_points: int = 2, standard_error: bool = False) -> dict:
+    """
+    Fit a straight line, by ordinary least squares, to the data in each window of length window. The
+    window ending at position i covers positions i - window + 1 to i. Data can be a single series or an
+    array of series sharing the same time axis, with time along the last axis.
+
+    Parameters
+    ----------
+    time: array-like
+        Times of the data points, shape (n_times,)
+    data: array-like
+        Data values, shape (n_times,) or (n_series, n_times). NaN marks missing data.
+    window: int
+        Number of time steps in each window
+    min_points: int
+        Minimum number of non-missing data points needed in a window for a fit to be made
+    standard_error: bool
+        Set to True to also calculate the standard error of the trend
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays, the same shape as data, giving for the window ending at each point
+        'trend', the slope of the line, 'intercept', the value of the line at time zero, 'end_value',
+        the value of the line at the end of the window, 'count', the number of data points used and,
+        if requested, 'standard_error', the standard error of the trend. Where there are fewer than
+        min_points data points, NaN is returned.
+    """
+    time = np.asarray(time, dtype=float)
+    data = np.asarray(data, dtype=float)
+    n_times = data.shape[-1]
+
+    # work relative to the mean time to reduce rounding errors in the sums
+    reference_time = np.nanmean(time) if n_times > 0 else 0.0
+    t = np.broadcast_to(time - reference_time, data.shape)
+
+    present = ~np.isnan(data) & ~np.isnan(t)
+    t = np.where(present, t, 0.0)
+    y = np.where(present, data, 0.0)
+
+    def window_sums(values):
+        cumulative = np.zeros(values.shape[:-1] + (n_times + 1,))
+        cumulative[..., 1:] = np.cumsum(values, axis=-1)
+        sums = np.full(values.shape, np.nan)
+        if window <= n_times:
+            sums[..., window - 1:] = cumulative[..., window:] - cumulative[..., :n_times - window + 1]
+        return sums
+
+    n = window_sums(present.astype(float))
+    st = window_sums(t)
+    sy = window_sums(y)
+    stt = window_sums(t * t)
+    sty = window_sums(t * y)
+
+    enough = n >= max(min_points, 2)
+    n_safe = np.where(enough, n, 1.0)
+
+    sxx = stt - st * st / n_safe
+    sxy = sty - st * sy / n_safe
+
+    # windows where all the times are the same have no trend
+    enough = enough & (sxx > 0)
+    sxx_safe = np.where(enough, sxx, 1.0)
+
+    trend = np.where(enough, sxy / sxx_safe, np.nan)
+    mean_t = st / n_safe
+    mean_y = sy / n_safe
+    centred_intercept = mean_y - trend * mean_t
+
+    end_time = np.broadcast_to(time - reference_time, data.shape)
+
+    result = {
+        'trend': trend,
+        'intercept': centred_intercept - trend * reference_time,
+        'end_value': centred_intercept + trend * end_time,
+        'count': np.where(np.isnan(n), 0, n).astype(int)
+    }
+
+    if standard_error:
+        syy = window_sums(y * y) - sy * sy / n_safe
+        degrees_of_freedom = np.where(enough & (n > 2), n - 2, np.nan)
+        residual_variance = np.maximum(syy - trend * sxy, 0.0) / degrees_of_freedom
+        result['standard_error'] = np.sqrt(residual_variance / sxx_safe)
+
+    return result
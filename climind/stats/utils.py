@@ -17,7 +17,8 @@
 from pathlib import Path
 import numpy as np
 from typing import List, Union
-from climind.data_types.timeseries import TimeSeriesMonthly, TimeSeriesAnnual
+from climind.data_types.timeseries import TimeSeriesMonthly, TimeSeriesAnnual, AlignedStack
+from climind.stats.records import record_statistics
 
 
 def table_by_year(datasets, match_year: int, years_to_show: int = 20) -> str:
@@ -39,25 +40,28 @@ def table_by_year(datasets, match_year: int, years_to_show: int = 20) -> str:
 
 
 def record_margin_table_by_year(datasets, match_year: int, years_to_show: int = 50) -> str:
+    stack = AlignedStack(datasets)
+    positions = {year: i for i, year in enumerate(stack.times['year'])}
+
+    # A year counts as a record if it equals or beats all previous years
+    statistics = record_statistics(stack.data)
+    margins = statistics['high_margin']
+    is_record = statistics['is_high_record'] | (margins == 0)
+
     out_text = ''
     for year in range(match_year - years_to_show, match_year + 1):
 
         out_line = f'{year} '
-        for ds in datasets:
-
+        for i, ds in enumerate(datasets):
             first_year, last_year = ds.get_first_and_last_year()
-            index = year - first_year
+            index = positions.get(year)
 
-            if year > last_year:
+            if year > last_year or year < first_year:
                 margin = "XXXXXXXXX"
+            elif index is not None and is_record[i, index]:
+                margin = f"{margins[i, index]:.2f}     "
             else:
-                subset = ds.df['data'][0: index + 1]
-                latest = ds.df['data'][index]
-                if np.max(subset) == latest:
-                    margin = latest - max(ds.df['data'][0:index])
-                    margin = f"{margin:.2f}     "
-                else:
-                    margin = "---------"
+                margin = "---------"
 
             out_line += f'{margin}  '
 
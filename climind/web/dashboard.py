@@ -14,11 +14,17 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import copy
 import json
 import hashlib
+import logging
+from collections import OrderedDict
 import pkg_resources
+from concurrent.futures import ProcessPoolExecutor, Future
 from datetime import datetime
-from typing import Union, List
+from tempfile import TemporaryDirectory
+from typing import Union, List, Optional, Tuple
 from pathlib import Path
 from zipfile import ZipFile
 from jinja2 import Environment, FileSystemLoader, select_autoescape
@@ -27,12 +33,17 @@ from climind.data_types.timeseries import TimeSeriesMonthly, TimeSeriesAnnual, T
     write_dataset_summary_file_with_metadata
 import climind.plotters.plot_types as pt
 import climind.stats.paragraphs as pa
-from climind.data_manager.processing import DataArchive
+from climind.data_manager.processing import DataArchive, DatasetCache, PersistentDatasetCache, \
+    DEFAULT_CACHE_SIZE, estimate_size
 from climind.definitions import ROOT_DIR
 from climind.config.config import DATA_DIR
 
 DATA_DIR = DATA_DIR / "ManagedData" / "Data"
 
+# Archive and pipeline cache used by the processes in a worker pool, set by _initialise_worker
+_worker_archive = None
+_worker_pipeline_cache = None
+
 
 def process_single_dataset(ds: Union[TimeSeriesAnnual, TimeSeriesMonthly, TimeSeriesIrregular],
                            processing_steps: List[dict]) -> Union[TimeSeriesAnnual, TimeSeriesMonthly, TimeSeriesIrregular]:
@@ -66,11 +77,561 @@ def process_single_dataset(ds: Union[TimeSeriesAnnual, TimeSeriesMonthly, TimeSe
     return ds
 
 
+class _PipelineNode:
+    """
+    Node in the trie of a :class:`PipelineCache`. A node stands for a data set with a particular
+    sequence of processing steps applied to it.
+    """
+    __slots__ = ('children', 'result', 'size')
+
+    def __init__(self):
+        self.children = {}
+        self.result = None
+        self.size = 0
+
+
+class PipelineCache:
+    """
+    A :class:`PipelineCache` runs the processing steps for data sets, keeping the data set produced by
+    each step. The results are held in a trie: the first level is keyed by the fingerprint of the data set
+    before processing and each following level by one processing step (method and arguments). When a data
+    set is processed with a list of steps that starts with steps that have already been run on the same
+    data set, for example by another card, the longest such prefix is taken from the cache and only the
+    remaining steps are run. When the results in the cache exceed the memory budget, the least recently
+    used are discarded. Data sets that cannot be fingerprinted, such as grids, are processed as normal
+    and not cached.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_SIZE):
+        """
+        Create an empty :class:`PipelineCache`
+
+        Parameters
+        ----------
+        max_bytes: int
+            Memory budget of the cache in bytes
+
+        Attributes
+        ----------
+        max_bytes: int
+            Memory budget of the cache in bytes
+        total_bytes: int
+            Estimated size in bytes of all the results in the cache
+        hits: int
+            Number of processing steps whose result was taken from the cache
+        misses: int
+            Number of processing steps that were run
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._roots = {}
+        self._stored = OrderedDict()
+
+    def __len__(self):
+        return len(self._stored)
+
+    @staticmethod
+    def step_key(step: dict) -> str:
+        """
+        Make the key that identifies a processing step
+
+        Parameters
+        ----------
+        step: dict
+            Processing step containing a 'method' and an 'args' entry
+
+        Returns
+        -------
+        str
+            Key of the step
+        """
+        return json.dumps([step['method'], step['args']], default=str)
+
+    def process(self, ds, processing_steps: List[dict]):
+        """
+        Process a data set with a list of processing steps, as :func:`process_single_dataset`, reusing
+        the results of any of the steps that have already been run on the same data set.
+
+        Parameters
+        ----------
+        ds: Union[TimeSeriesAnnual, TimeSeriesMonthly, TimeSeriesIrregular]
+            Data set to be processed
+        processing_steps: List[dict]
+            List of steps. Each step must be a dictionary containing a 'method' and an 'args' entry
+
+        Returns
+        -------
+        Union[TimeSeriesAnnual, TimeSeriesMonthly, TimeSeriesIrregular]
+        """
+        if not hasattr(ds, 'fingerprint') or len(processing_steps) == 0:
+            return process_single_dataset(ds, processing_steps)
+
+        node = self._roots.setdefault(ds.fingerprint(), _PipelineNode())
+
+        # Find the longest sequence of steps whose result is in the cache
+        path = [node]
+        for step in processing_steps:
+            node = node.children.get(self.step_key(step))
+            if node is None:
+                break
+            path.append(node)
+
+        n_done = 0
+        for depth in range(len(path) - 1, 0, -1):
+            if path[depth].result is not None:
+                n_done = depth
+                self._stored.move_to_end(id(path[depth]))
+                ds = copy.deepcopy(path[depth].result)
+                break
+
+        self.hits += n_done
+        node = path[n_done]
+
+        for step in processing_steps[n_done:]:
+            ds = process_single_dataset(ds, [step])
+            self.misses += 1
+            node = node.children.setdefault(self.step_key(step), _PipelineNode())
+            self._store(node, ds)
+
+        return ds
+
+    def _store(self, node: _PipelineNode, ds) -> None:
+        """
+        Keep a copy of a processed data set in a node, discarding the least recently used results if the
+        memory budget is exceeded. Data sets larger than the whole memory budget are not kept.
+        """
+        size = estimate_size(ds)
+        if size > self.max_bytes:
+            return
+
+        if node.result is not None:
+            self.total_bytes -= node.size
+            del self._stored[id(node)]
+
+        node.result = copy.deepcopy(ds)
+        node.size = size
+        self._stored[id(node)] = node
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes:
+            _, removed = self._stored.popitem(last=False)
+            self.total_bytes -= removed.size
+            removed.result = None
+            removed.size = 0
+
+    def statistics(self) -> dict:
+        """
+        Get the numbers of processing steps taken from the cache and run
+
+        Returns
+        -------
+        dict
+            Dictionary containing 'hits', 'misses' and 'stored', the number of results in the cache
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'stored': len(self._stored)}
+
+
+class BuildManifest:
+    """
+    A :class:`BuildManifest` records what went into each card and paragraph built in a build directory
+    so that on the next build, cards and paragraphs whose inputs have not changed are not built again.
+    The inputs of a component are summarised in a fingerprint which covers the keys identifying the
+    selected data sets (which include the modification times and sizes of their files), the processing
+    steps, the plotting or writing function and its arguments and the climind version. For each
+    fingerprint, the manifest keeps the outputs written into the component metadata, such as the figure
+    name, caption and zip file checksum. The manifest is written to the build directory as json.
+    """
+
+    FINGERPRINT_KEYS = ['title', 'format', 'selecting', 'processing', 'plotting', 'writing']
+    CARD_OUTPUTS = ['figure_name', 'caption', 'csv_name', 'csv_checksum', 'dataset_metadata']
+    PARAGRAPH_OUTPUTS = ['text', 'updated', 'dataset_metadata']
+    FIGURE_SUFFIXES = ['.png', '.pdf', '.svg']
+
+    def __init__(self, build_dir: Path, version: str = None):
+        """
+        Create a :class:`BuildManifest` for a build directory, reading the manifest of the previous build
+        if there is one.
+
+        Parameters
+        ----------
+        build_dir: Path
+            Path of the directory to which the html, figures and data are written
+        version: str
+            Version string included in the fingerprints. Defaults to the installed climind version.
+
+        Attributes
+        ----------
+        path: Path
+            Path of the manifest file
+        entries: dict
+            Outputs of the previous build, keyed by fingerprint
+        reused: int
+            Number of components whose outputs were taken from the manifest in this build
+        rebuilt: int
+            Number of components that were built in this build
+        """
+        self.build_dir = build_dir
+        self.path = build_dir / 'build_manifest.json'
+        if version is None:
+            version = pkg_resources.get_distribution("climind").version
+        self.version = version
+        self.reused = 0
+        self.rebuilt = 0
+        self._current = {}
+
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def clear(self) -> None:
+        """
+        Forget the outputs of the previous build, so that every component is built again
+
+        Returns
+        -------
+        None
+        """
+        self.entries = {}
+
+    def fingerprint(self, component: 'WebComponent', data_dir: Path, archive: DataArchive,
+                    **extra) -> Optional[str]:
+        """
+        Make the fingerprint of the inputs of a card or paragraph.
+
+        Parameters
+        ----------
+        component: WebComponent
+            Card or paragraph
+        data_dir: Path
+            Path of the directory containing the data
+        archive: DataArchive
+            Archive which contains all the metadata for this selection
+        extra
+            Any other inputs, such as the focus year of a paragraph
+
+        Returns
+        -------
+        Optional[str]
+            Hexadecimal digest of the inputs, or None if the selected data sets could not be found
+        """
+        try:
+            dataset_keys = archive.select(component['selecting']).dataset_keys(data_dir)
+        except Exception:
+            return None
+
+        description = {
+            'component': type(component).__name__,
+            'metadata': {key: component.metadata[key] for key in self.FINGERPRINT_KEYS if key in component.metadata},
+            'datasets': dataset_keys,
+            'extra': extra,
+            'version': self.version
+        }
+        description = json.dumps(description, sort_keys=True, default=str)
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def restore(self, component: 'WebComponent', data_dir: Path, archive: DataArchive, **extra) -> bool:
+        """
+        Work out the fingerprint of a card or paragraph and, if it matches one from the previous build
+        whose files are still in the build directory, copy the outputs from that build into the component
+        metadata. The fingerprint is kept in the 'input_fingerprint' entry of the component metadata
+        so that the outputs can be recorded once the component is built.
+
+        Parameters
+        ----------
+        component: WebComponent
+            Card or paragraph
+        data_dir: Path
+            Path of the directory containing the data
+        archive: DataArchive
+            Archive which contains all the metadata for this selection
+        extra
+            Any other inputs, such as the focus year of a paragraph
+
+        Returns
+        -------
+        bool
+            True if the outputs of the previous build were used, False if the component needs to be built
+        """
+        fingerprint = self.fingerprint(component, data_dir, archive, **extra)
+        component['input_fingerprint'] = fingerprint
+
+        entry = self._current.get(fingerprint, self.entries.get(fingerprint))
+        if entry is None:
+            return False
+
+        for filename, checksum in entry['files'].items():
+            path = self.build_dir / filename
+            if not path.exists():
+                return False
+            if checksum is not None and file_checksum(path) != checksum:
+                return False
+
+        component.metadata.update(copy.deepcopy(entry['outputs']))
+        self._current[fingerprint] = entry
+        self.reused += 1
+        return True
+
+    def record(self, component: 'WebComponent') -> None:
+        """
+        Record the outputs of a card or paragraph that has been built, so that they can be used in
+        the next build if its inputs do not change.
+
+        Parameters
+        ----------
+        component: WebComponent
+            Card or paragraph which has been built, after a call to :meth:`restore`
+
+        Returns
+        -------
+        None
+        """
+        fingerprint = component.metadata.get('input_fingerprint')
+        if fingerprint is None or fingerprint in self._current:
+            return
+
+        files = {}
+        if isinstance(component, Card):
+            output_keys = self.CARD_OUTPUTS
+            # the plotters write pdf and svg versions of the png figure alongside it
+            figure = Path('figures') / component['figure_name']
+            for suffix in self.FIGURE_SUFFIXES:
+                filename = figure.with_suffix(suffix)
+                if (self.build_dir / filename).exists():
+                    files[filename.as_posix()] = file_checksum(self.build_dir / filename)
+            files[f"formatted_data/{component['csv_name']}"] = component['csv_checksum']
+        else:
+            output_keys = self.PARAGRAPH_OUTPUTS
+
+        outputs = {}
+        for key in output_keys:
+            value = component.metadata.get(key)
+            if hasattr(value, 'to_dict'):
+                value = value.to_dict()
+            outputs[key] = value
+
+        self._current[fingerprint] = {'outputs': outputs, 'files': files}
+        self.rebuilt += 1
+
+    def save(self) -> None:
+        """
+        Write out the manifest with the outputs of all the components used in this build. Components
+        from earlier builds that were not used in this one are dropped.
+
+        Returns
+        -------
+        None
+        """
+        temporary_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        with open(temporary_path, 'w') as f:
+            json.dump(self._current, f, indent=2, default=str)
+        temporary_path.replace(self.path)
+
+
+def file_checksum(filename: Path) -> str:
+    """
+    Calculate the md5 checksum of a file, as given for the zip files on the dashboard
+
+    Parameters
+    ----------
+    filename: Path
+        Path of the file
+
+    Returns
+    -------
+    str
+        Hexadecimal md5 checksum
+    """
+    with open(filename, "rb") as f:
+        gobbled_bytes = f.read()  # read file as bytes
+        return hashlib.md5(gobbled_bytes).hexdigest()
+
+
+def build_card(card_metadata: dict, data_dir: Path, figure_dir: Path, formatted_data_dir: Path,
+               archive: DataArchive, pipeline_cache: 'PipelineCache' = None,
+               manifest: BuildManifest = None) -> Optional['Card']:
+    """
+    Build a :class:`Card` from its metadata and process it. If processing fails, the error is reported
+    and None is returned so that one broken card does not stop the rest of the page from being built.
+    If a manifest is given and the inputs of the card have not changed since the previous build, the
+    outputs of that build are used instead.
+
+    Parameters
+    ----------
+    card_metadata: dict
+        Dictionary containing the metadata for the card
+    data_dir: Path
+        Path of the directory containing the data
+    figure_dir: Path
+        Path of directory to which figures will be written
+    formatted_data_dir: Path
+        Path of directory to which formatted data will be written
+    archive: DataArchive
+        Archive which contains all the metadata for this selection
+    pipeline_cache: PipelineCache
+        Optional cache of processed data sets shared between cards and paragraphs
+    manifest: BuildManifest
+        Optional manifest of the previous build
+
+    Returns
+    -------
+    Optional[Card]
+        The processed card or None if processing failed
+    """
+    this_card = Card(card_metadata)
+    this_card.pipeline_cache = pipeline_cache
+    if manifest is not None and manifest.restore(this_card, data_dir, archive):
+        return this_card
+    try:
+        this_card.process_card(data_dir, figure_dir, formatted_data_dir, archive)
+    except Exception as e:
+        print(f"Card processing failed {this_card['title']} with error {e}")
+        return None
+    if manifest is not None:
+        manifest.record(this_card)
+    return this_card
+
+
+def build_paragraph(paragraph_metadata: dict, data_dir: Path, archive: DataArchive,
+                    focus_year: int = 2021, pipeline_cache: 'PipelineCache' = None,
+                    manifest: BuildManifest = None) -> Optional['Paragraph']:
+    """
+    Build a :class:`Paragraph` from its metadata and process it. If processing fails, the error is
+    reported and None is returned. If a manifest is given and the inputs of the paragraph have not
+    changed since the previous build, the text from that build is used instead.
+
+    Parameters
+    ----------
+    paragraph_metadata: dict
+        Dictionary containing the metadata for the paragraph
+    data_dir: Path
+        Path of the directory containing the data
+    archive: DataArchive
+        Archive which contains all the metadata for this selection
+    focus_year: int
+        Year to focus on
+    pipeline_cache: PipelineCache
+        Optional cache of processed data sets shared between cards and paragraphs
+    manifest: BuildManifest
+        Optional manifest of the previous build
+
+    Returns
+    -------
+    Optional[Paragraph]
+        The processed paragraph or None if processing failed
+    """
+    this_paragraph = Paragraph(paragraph_metadata)
+    this_paragraph.pipeline_cache = pipeline_cache
+    if manifest is not None and manifest.restore(this_paragraph, data_dir, archive, focus_year=focus_year):
+        return this_paragraph
+    try:
+        this_paragraph.process_paragraph(data_dir, archive, focus_year=focus_year)
+    except Exception as e:
+        print(f"Paragraph processing failed with error {e}.")
+        return None
+    if manifest is not None:
+        manifest.record(this_paragraph)
+    return this_paragraph
+
+
+def _initialise_worker(archive: DataArchive, pipeline_cache_size: int) -> None:
+    """
+    Set up a process in a worker pool. Figures are drawn with the non-interactive Agg backend and the
+    archive is kept for all the tasks run by the process rather than being sent with each one. Each
+    process has its own pipeline cache.
+    """
+    global _worker_archive, _worker_pipeline_cache
+    import matplotlib
+    matplotlib.use('Agg')
+    _worker_archive = archive
+    _worker_pipeline_cache = PipelineCache(pipeline_cache_size) if pipeline_cache_size > 0 else None
+
+
+def _worker_statistics() -> Tuple[int, Optional[dict]]:
+    """
+    Get the process id and the pipeline cache statistics of a worker process
+    """
+    if _worker_pipeline_cache is None:
+        return os.getpid(), None
+    return os.getpid(), _worker_pipeline_cache.statistics()
+
+
+def _build_card_in_worker(card_metadata: dict, data_dir: Path, figure_dir: Path,
+                          formatted_data_dir: Path) -> Tuple[Optional['Card'], Tuple[int, Optional[dict]]]:
+    """
+    Build a card in a worker process. The data sets are dropped before the card is sent back
+    because only the metadata are needed to render the page. The pipeline cache statistics of the
+    worker are sent back with the card.
+    """
+    this_card = build_card(card_metadata, data_dir, figure_dir, formatted_data_dir, _worker_archive,
+                           pipeline_cache=_worker_pipeline_cache)
+    if this_card is not None:
+        this_card.datasets = []
+        this_card.pipeline_cache = None
+    return this_card, _worker_statistics()
+
+
+def _build_paragraph_in_worker(paragraph_metadata: dict, data_dir: Path,
+                               focus_year: int) -> Tuple[Optional['Paragraph'], Tuple[int, Optional[dict]]]:
+    """
+    Build a paragraph in a worker process. The data sets are dropped before the paragraph is sent back.
+    """
+    this_paragraph = build_paragraph(paragraph_metadata, data_dir, _worker_archive, focus_year=focus_year,
+                                     pipeline_cache=_worker_pipeline_cache)
+    if this_paragraph is not None:
+        this_paragraph.datasets = []
+        this_paragraph.pipeline_cache = None
+    return this_paragraph, _worker_statistics()
+
+
+def _collect_results(futures: List[Future], all_metadata: List[dict], component: str,
+                     worker_statistics: dict = None, manifest: BuildManifest = None) -> list:
+    """
+    Collect the results of building cards or paragraphs in a worker pool in the order they were
+    submitted. The metadata of each processed component is copied back into the page metadata, as
+    happens when they are built in this process, and recorded in the manifest if there is one. If a
+    worker fails outright, the error is reported and the component is dropped. The latest pipeline
+    cache statistics from each worker are put in worker_statistics, keyed by process id.
+    """
+    processed = []
+    for future, metadata in zip(futures, all_metadata):
+        try:
+            result, (pid, statistics) = future.result()
+        except Exception as e:
+            print(f"{component} processing failed with error {e}")
+            continue
+        if worker_statistics is not None and statistics is not None:
+            worker_statistics[pid] = statistics
+        if result is not None:
+            metadata.update(result.metadata)
+            result.metadata = metadata
+            if manifest is not None:
+                manifest.record(result)
+            processed.append(result)
+    return processed
+
+
+def _completed(result) -> Future:
+    """
+    Wrap a result in a Future that is already done, so that components which did not need to be
+    built can be collected along with those built in a worker pool.
+    """
+    future = Future()
+    future.set_result(result)
+    return future
+
+
 class WebComponent:
 
     def __init__(self, component_metadata: dict):
         self.metadata = component_metadata
         self.datasets = []
+        self.pipeline_cache = None
 
     def __getitem__(self, key):
         return self.metadata[key]
@@ -101,7 +662,8 @@ class WebComponent:
     def process_datasets(self):
         """
         Apply the processing steps specified in the 'processing' section of the metadata file to
-        all the data sets.
+        all the data sets. If the component has a pipeline cache, steps that have already been applied
+        to the same data set are not run again.
 
         Returns
         -------
@@ -115,7 +677,10 @@ class WebComponent:
         processed_datasets = []
         for ds in self.datasets:
             try:
-                ds = process_single_dataset(ds, self['processing'])
+                if self.pipeline_cache is None:
+                    ds = process_single_dataset(ds, self['processing'])
+                else:
+                    ds = self.pipeline_cache.process(ds, self['processing'])
             except Exception as e:
                 raise RuntimeError(f"Failed to process {ds.metadata['name']} with error {e}")
             else:
@@ -250,7 +815,7 @@ class Card(WebComponent):
                     'data_citation': ds.metadata['data_citation'],
                     'acknowledgement': ds.metadata['acknowledgement'],
                     'notes': ds.metadata['notes'],
-                    'history': ds.metadata['history']
+                    'history': list(ds.metadata['history'])
                 }
             )
 
@@ -332,20 +897,20 @@ class Card(WebComponent):
         -------
         None
         """
-        csv_paths = self.make_csv_files(formatted_data_dir)
-
         zipfile_name = f"{self['title']}_data_files.zip".replace(" ", "_")
-        with ZipFile(formatted_data_dir / zipfile_name, 'w') as zip_archive:
-            for csv_path in csv_paths:
-                csv_filename = csv_path.name
-                zip_archive.write(csv_path, arcname=csv_filename)
-                csv_path.unlink()
 
-        with open(formatted_data_dir / zipfile_name, "rb") as f:
-            gobbled_bytes = f.read()  # read file as bytes
-            checksum = hashlib.md5(gobbled_bytes).hexdigest()
+        # csv files are written to a directory of their own so that cards built at the same time
+        # which share data sets do not overwrite each other's files
+        with TemporaryDirectory(dir=formatted_data_dir) as csv_dir:
+            csv_paths = self.make_csv_files(Path(csv_dir))
+
+            with ZipFile(formatted_data_dir / zipfile_name, 'w') as zip_archive:
+                for csv_path in csv_paths:
+                    csv_filename = csv_path.name
+                    zip_archive.write(csv_path, arcname=csv_filename)
+                    csv_path.unlink()
 
-        self['csv_checksum'] = checksum
+        self['csv_checksum'] = file_checksum(formatted_data_dir / zipfile_name)
         self['csv_name'] = zipfile_name
 
 
@@ -369,7 +934,8 @@ class Page:
         self.metadata[key] = value
 
     def _process_cards(self, data_dir: Path, figure_dir: Path,
-                       formatted_data_dir: Path, archive: DataArchive) -> List[Card]:
+                       formatted_data_dir: Path, archive: DataArchive,
+                       pipeline_cache: PipelineCache = None, manifest: BuildManifest = None) -> List[Card]:
         """
         Process each of the cards on the page
 
@@ -383,6 +949,10 @@ class Page:
             Path of directory to which formatted data will be written
         archive: DataArchive
             Archive which contains all the metadata for this selection
+        pipeline_cache: PipelineCache
+            Optional cache of processed data sets
+        manifest: BuildManifest
+            Optional manifest of the previous build
 
         Returns
         -------
@@ -391,18 +961,16 @@ class Page:
         """
         processed_cards = []
         for card_metadata in self['cards']:
-            this_card = Card(card_metadata)
-            try:
-                this_card.process_card(data_dir, figure_dir, formatted_data_dir, archive)
-            except Exception as e:
-                print(f"Card processing failed {this_card['title']} with error {e}")
-            else:
-                if 'hidden' not in card_metadata:
-                    processed_cards.append(this_card)
+            this_card = build_card(card_metadata, data_dir, figure_dir, formatted_data_dir, archive,
+                                   pipeline_cache=pipeline_cache, manifest=manifest)
+            if this_card is not None and 'hidden' not in card_metadata:
+                processed_cards.append(this_card)
 
         return processed_cards
 
-    def _process_paragraphs(self, data_dir: Path, archive: DataArchive, focus_year: int = 2021) -> List[Paragraph]:
+    def _process_paragraphs(self, data_dir: Path, archive: DataArchive, focus_year: int = 2021,
+                            pipeline_cache: PipelineCache = None,
+                            manifest: BuildManifest = None) -> List[Paragraph]:
         """
         Process each of the paragraphs on the page
 
@@ -414,6 +982,10 @@ class Page:
             Archive which contains all the metadata for this selection
         focus_year: int
             Year to focus on
+        pipeline_cache: PipelineCache
+            Optional cache of processed data sets
+        manifest: BuildManifest
+            Optional manifest of the previous build
 
         Returns
         -------
@@ -422,18 +994,119 @@ class Page:
         """
         processed_paragraphs = []
         for paragraph_metadata in self['paragraphs']:
-            this_paragraph = Paragraph(paragraph_metadata)
-            try:
-                this_paragraph.process_paragraph(data_dir, archive, focus_year=focus_year)
-            except Exception as e:
-                print(f"Paragraph processing failed with error {e}.")
-            else:
+            this_paragraph = build_paragraph(paragraph_metadata, data_dir, archive, focus_year=focus_year,
+                                             pipeline_cache=pipeline_cache, manifest=manifest)
+            if this_paragraph is not None:
                 processed_paragraphs.append(this_paragraph)
 
         return processed_paragraphs
 
+    def _submit(self, pool: ProcessPoolExecutor, build_dir: Path, data_dir: Path,
+                focus_year: int = 2021, archive: DataArchive = None,
+                manifest: BuildManifest = None) -> Tuple[List[Future], List[Future]]:
+        """
+        Submit all the cards and paragraphs on the page to a pool of worker processes, which must have
+        been initialised with :func:`_initialise_worker`. If there is a manifest, cards and paragraphs whose
+        inputs have not changed since the previous build are not submitted and their outputs are taken
+        from the manifest.
+
+        Parameters
+        ----------
+        pool: ProcessPoolExecutor
+            Pool of worker processes
+        build_dir: Path
+            Path of the directory to which the html, figures and data will be written
+        data_dir: Path
+            Path of the directory containing the data
+        focus_year: int
+            Year to focus on
+        archive: DataArchive
+            Archive which contains all the metadata, needed only if there is a manifest
+        manifest: BuildManifest
+            Optional manifest of the previous build
+
+        Returns
+        -------
+        Tuple[List[Future], List[Future]]
+            Futures for the cards and for the paragraphs, in the order they appear in the page metadata
+        """
+        figure_dir, formatted_data_dir = self._make_directories(build_dir)
+
+        card_futures = []
+        for card_metadata in self['cards']:
+            this_card = Card(card_metadata)
+            if manifest is not None and manifest.restore(this_card, data_dir, archive):
+                card_futures.append(_completed((this_card, (os.getpid(), None))))
+            else:
+                card_futures.append(pool.submit(_build_card_in_worker, card_metadata, data_dir,
+                                                figure_dir, formatted_data_dir))
+
+        paragraph_futures = []
+        for paragraph_metadata in self['paragraphs']:
+            this_paragraph = Paragraph(paragraph_metadata)
+            if manifest is not None and manifest.restore(this_paragraph, data_dir, archive, focus_year=focus_year):
+                paragraph_futures.append(_completed((this_paragraph, (os.getpid(), None))))
+            else:
+                paragraph_futures.append(pool.submit(_build_paragraph_in_worker, paragraph_metadata,
+                                                     data_dir, focus_year))
+
+        return card_futures, paragraph_futures
+
+    def _gather(self, card_futures: List[Future], paragraph_futures: List[Future],
+                worker_statistics: dict = None,
+                manifest: BuildManifest = None) -> Tuple[List[Card], List[Paragraph]]:
+        """
+        Wait for the cards and paragraphs submitted by :meth:`_submit` and collect them in order
+
+        Parameters
+        ----------
+        card_futures: List[Future]
+            Futures for the cards
+        paragraph_futures: List[Future]
+            Futures for the paragraphs
+        worker_statistics: dict
+            Optional dictionary in which the latest pipeline cache statistics from each worker are
+            put, keyed by process id
+        manifest: BuildManifest
+            Optional manifest in which the outputs of the cards and paragraphs are recorded
+
+        Returns
+        -------
+        Tuple[List[Card], List[Paragraph]]
+            The processed cards and paragraphs, leaving out any that failed and any hidden cards
+        """
+        processed_cards = _collect_results(card_futures, self['cards'], 'Card', worker_statistics, manifest)
+        processed_cards = [card for card in processed_cards if 'hidden' not in card.metadata]
+        processed_paragraphs = _collect_results(paragraph_futures, self['paragraphs'], 'Paragraph',
+                                                worker_statistics, manifest)
+        return processed_cards, processed_paragraphs
+
+    @staticmethod
+    def _make_directories(build_dir: Path) -> Tuple[Path, Path]:
+        """
+        Make the directories for the figures and formatted data
+
+        Parameters
+        ----------
+        build_dir: Path
+            Path of the directory to which the html, figures and data will be written
+
+        Returns
+        -------
+        Tuple[Path, Path]
+            Paths of the figure directory and the formatted data directory
+        """
+        figure_dir = build_dir / 'figures'
+        figure_dir.mkdir(exist_ok=True)
+
+        formatted_data_dir = build_dir / 'formatted_data'
+        formatted_data_dir.mkdir(exist_ok=True)
+
+        return figure_dir, formatted_data_dir
+
     def build(self, build_dir: Path, data_dir: Path, archive: DataArchive,
-              focus_year: int = 2021, menu_items: List[List[str]] = []):
+              focus_year: int = 2021, menu_items: List[List[str]] = [], pipeline_cache: PipelineCache = None,
+              manifest: BuildManifest = None):
         """
         Build the Page, processing all the Card and Paragraph objects, then populating the template
         to generate a webpage, figures and formatted data.
@@ -452,22 +1125,47 @@ class Page:
             List of items to display in the menu. Each item is a two element list, with the name of the webpage as
             the first element (which gets a .html extension) and the title of the page as the second elements. The
             title is used to generate the menu items so should be human readable.
+        pipeline_cache: PipelineCache
+            Optional cache of processed data sets, which can be shared between pages
+        manifest: BuildManifest
+            Optional manifest of the previous build. Cards and paragraphs whose inputs have not changed
+            are not built again.
 
         Returns
         -------
         None
         """
-        figure_dir = build_dir / 'figures'
-        figure_dir.mkdir(exist_ok=True)
-
-        formatted_data_dir = build_dir / 'formatted_data'
-        formatted_data_dir.mkdir(exist_ok=True)
+        figure_dir, formatted_data_dir = self._make_directories(build_dir)
 
         print(f"Building {self.metadata['id']} using template {self.metadata['template']}")
 
-        processed_cards = self._process_cards(data_dir, figure_dir, formatted_data_dir, archive)
-        processed_paragraphs = self._process_paragraphs(data_dir, archive, focus_year=focus_year)
+        processed_cards = self._process_cards(data_dir, figure_dir, formatted_data_dir, archive,
+                                              pipeline_cache=pipeline_cache, manifest=manifest)
+        processed_paragraphs = self._process_paragraphs(data_dir, archive, focus_year=focus_year,
+                                                        pipeline_cache=pipeline_cache, manifest=manifest)
 
+        self.render(build_dir, processed_cards, processed_paragraphs, menu_items=menu_items)
+
+    def render(self, build_dir: Path, processed_cards: List[Card], processed_paragraphs: List[Paragraph],
+               menu_items: List[List[str]] = []) -> None:
+        """
+        Populate the template with processed cards and paragraphs to make the webpage
+
+        Parameters
+        ----------
+        build_dir: Path
+            Path of the directory to which the html will be written
+        processed_cards: List[Card]
+            Cards to show on the page
+        processed_paragraphs: List[Paragraph]
+            Paragraphs to show on the page
+        menu_items: List[List[str]]
+            List of items to display in the menu, see :meth:`build`
+
+        Returns
+        -------
+        None
+        """
         now = datetime.today()
         climind_version = pkg_resources.get_distribution("climind").version
 
@@ -510,7 +1208,7 @@ class Dashboard:
             self.pages.append(Page(page_metadata))
 
     @staticmethod
-    def from_json(json_file: Path, archive_dir: Union[Path, List[Path]]):
+    def from_json(json_file: Path, archive_dir: Union[Path, List[Path]], index_file: Path = None):
         """
         Create a Dashboard from a json file and directory containing dataset metadata
 
@@ -520,6 +1218,9 @@ class Dashboard:
             Path to the json file
         archive_dir: Path
             Path of the directory which contains the dataset metadata
+        index_file: Path
+            Optional path of the persistent index of the dataset metadata, see
+            :meth:`.DataArchive.from_directory`
 
         Returns
         -------
@@ -527,13 +1228,17 @@ class Dashboard:
         """
         with open(json_file) as f:
             metadata = json.load(f)
-        archive = DataArchive.from_directory(archive_dir)
+        archive = DataArchive.from_directory(archive_dir, index_file=index_file)
         return Dashboard(metadata, archive)
 
-    def build(self, build_dir: Path, focus_year: int = 2021):
+    def build(self, build_dir: Path, focus_year: int = 2021, cache_size: int = DEFAULT_CACHE_SIZE,
+              cache_dir: Path = None, workers: int = 1, force: bool = False, pipeline_cache_size: int = None):
         """
         Build all the pages in the dashboard. This will create the html, the images,
-        the formatted data in a chosen directory
+        the formatted data in a chosen directory. The inputs and outputs of every card and paragraph
+        are recorded in a :class:`BuildManifest` in the build directory and, on the next build, cards
+        and paragraphs whose inputs have not changed are not built again. The html pages are always
+        rendered.
 
         Parameters
         ----------
@@ -541,15 +1246,86 @@ class Dashboard:
             Path of the directory to build the web pages in
         focus_year: int
             Year to focus on. Usually, this will be the latest year
+        cache_size: int
+            Total memory budget in bytes for the data sets kept in memory by all the processes building
+            the dashboard. Data sets that have been read are cached so that data sets used on several
+            pages are only read once, and processed data sets are cached so that processing steps shared
+            by several cards are only run once, see :class:`PipelineCache`. Set to zero to turn off both.
+        cache_dir: Path
+            Optional directory in which data sets are cached between builds, so that data sets whose
+            files have not changed do not have to be parsed again.
+        workers: int
+            Number of processes used to build the cards and paragraphs. With more than one, the cards
+            and paragraphs on all pages are built in a pool of worker processes, each with its own
+            in-memory cache, and the pages are rendered once they are all done.
+        force: bool
+            Set to True to build every card and paragraph, even if its inputs have not changed.
+        pipeline_cache_size: int
+            Memory budget in bytes of the pipeline cache in each process, which is taken out of cache_size.
+            Defaults to a quarter of cache_size when there is one process and to zero, which turns the
+            pipeline cache off, when there are several. What is left of cache_size is shared equally between
+            the caches of data sets that have been read in each process.
         Returns
         -------
         None
         """
+        workers = max(workers, 1)
+        if pipeline_cache_size is None:
+            pipeline_cache_size = cache_size // 4 if workers == 1 else 0
+        dataset_cache_size = max(cache_size - workers * pipeline_cache_size, 0) // workers
+
+        if self.archive.dataset_cache is None:
+            persistent_cache = None
+            if cache_dir is not None:
+                persistent_cache = PersistentDatasetCache(cache_dir)
+            if dataset_cache_size > 0 or persistent_cache is not None:
+                self.archive.dataset_cache = DatasetCache(dataset_cache_size, persistent_cache=persistent_cache)
+
         page_ids = []
         for page in self.pages:
             page_ids.append([page['id'], page['name']])
 
-        for page in self.pages:
-            page.build(build_dir, self.data_dir, self.archive,
-                       focus_year=focus_year,
-                       menu_items=page_ids)
+        manifest = BuildManifest(build_dir)
+        if force:
+            manifest.clear()
+
+        pipeline_statistics = []
+
+        if workers > 1:
+            worker_statistics = {}
+            with ProcessPoolExecutor(max_workers=workers, initializer=_initialise_worker,
+                                     initargs=(self.archive, pipeline_cache_size)) as pool:
+                all_futures = []
+                for page in self.pages:
+                    print(f"Building {page['id']} using template {page['template']}")
+                    all_futures.append(page._submit(pool, build_dir, self.data_dir, focus_year=focus_year,
+                                                    archive=self.archive, manifest=manifest))
+
+                for page, (card_futures, paragraph_futures) in zip(self.pages, all_futures):
+                    processed_cards, processed_paragraphs = page._gather(card_futures, paragraph_futures,
+                                                                         worker_statistics, manifest)
+                    page.render(build_dir, processed_cards, processed_paragraphs, menu_items=page_ids)
+            pipeline_statistics = list(worker_statistics.values())
+        else:
+            pipeline_cache = PipelineCache(pipeline_cache_size) if pipeline_cache_size > 0 else None
+            for page in self.pages:
+                page.build(build_dir, self.data_dir, self.archive,
+                           focus_year=focus_year,
+                           menu_items=page_ids,
+                           pipeline_cache=pipeline_cache,
+                           manifest=manifest)
+            if pipeline_cache is not None:
+                pipeline_statistics = [pipeline_cache.statistics()]
+
+        manifest.save()
+        logging.info(f"Cards and paragraphs reused from the previous build: {manifest.reused}, "
+                     f"built: {manifest.rebuilt}")
+
+        if len(pipeline_statistics) > 0:
+            hits = sum(statistics['hits'] for statistics in pipeline_statistics)
+            misses = sum(statistics['misses'] for statistics in pipeline_statistics)
+            logging.info(f"Processing steps reused from the pipeline cache: {hits}, run: {misses}")
+
+        for metadata_to_match, n_selected, elapsed in self.archive.slowest_queries():
+            logging.info(f"Slow selection: {n_selected} data sets in {elapsed:.6f}s "
+                         f"matching {metadata_to_match}")
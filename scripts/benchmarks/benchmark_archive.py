@@ -0,0 +1,61 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Time the start up of a :class:`DataArchive` built from the metadata directory, which every
+script does before anything else, and a typical selection from it.
+"""
+import time
+import tempfile
+from pathlib import Path
+
+from climind.definitions import METADATA_DIR
+import climind.data_manager.processing as dm
+
+if __name__ == "__main__":
+    number_of_repeats = 5
+
+    start = time.perf_counter()
+    archive = dm.DataArchive.from_directory(METADATA_DIR)
+    first_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(number_of_repeats):
+        archive = dm.DataArchive.from_directory(METADATA_DIR)
+    repeat_time = (time.perf_counter() - start) / number_of_repeats
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_file = Path(tmp_dir) / 'metadata_index.pkl'
+        _ = dm.DataArchive.from_directory(METADATA_DIR, index_file=index_file)
+
+        start = time.perf_counter()
+        for _ in range(number_of_repeats):
+            archive = dm.DataArchive.from_directory(METADATA_DIR, index_file=index_file)
+        indexed_time = (time.perf_counter() - start) / number_of_repeats
+
+    start = time.perf_counter()
+    _ = archive.get_index()
+    index_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(number_of_repeats):
+        selection = archive.select({'variable': 'tas', 'type': 'timeseries', 'time_resolution': 'monthly'})
+    select_time = (time.perf_counter() - start) / number_of_repeats
+
+    print(f"DataArchive.from_directory: {len(archive.collections)} collections, "
+          f"first build {first_time:.3f}s, subsequent builds {repeat_time:.3f}s, "
+          f"builds from index {indexed_time:.3f}s")
+    print(f"DataArchive.select: index built in {index_time:.4f}s, "
+          f"{len(selection.collections)} collections selected in {select_time:.6f}s")
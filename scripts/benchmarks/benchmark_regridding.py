@@ -0,0 +1,111 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compare the speed of the block regridding of an ERA5-like quarter degree grid to 5x5 and 1x1
+using the vectorised engine with the cell-by-cell loop it replaced, and the speed of the sparse
+regridding of a JRA-like 1.25 degree grid to 1x1 with the cell-by-cell simple regridding.
+"""
+import itertools
+import time
+import numpy as np
+
+import climind.data_types.grid as gd
+
+
+def loop_regrid(ingrid: np.ndarray, block_size: int) -> np.ndarray:
+    transfer = np.zeros((block_size + 1, block_size + 1)) + 1
+    transfer[0, :] = transfer[0, :] * 0.5
+    transfer[block_size, :] = transfer[block_size, :] * 0.5
+    transfer[:, 0] = transfer[:, 0] * 0.5
+    transfer[:, block_size] = transfer[:, block_size] * 0.5
+    transfer_sum = np.sum(transfer)
+
+    number_of_months, number_of_lats, number_of_lons = ingrid.shape
+    nlat = (number_of_lats - 1) // block_size
+    nlon = number_of_lons // block_size
+
+    enlarged_array = np.zeros((number_of_lats, number_of_lons + 1))
+    target_grid = np.zeros((number_of_months, nlat, nlon))
+
+    for m in range(number_of_months):
+        enlarged_array[:, 0:number_of_lons] = ingrid[m, :, :]
+        enlarged_array[:, number_of_lons] = ingrid[m, :, 0]
+
+        for xx, yy in itertools.product(range(nlon), range(nlat)):
+            lox = xx * block_size
+            hix = (xx + 1) * block_size
+            loy = yy * block_size
+            hiy = (yy + 1) * block_size
+            weighted = transfer * enlarged_array[loy:hiy + 1, lox:hix + 1]
+            target_grid[m, yy, xx] = np.sum(weighted) / transfer_sum
+
+    return target_grid
+
+
+def loop_simple_regrid(ingrid: np.ndarray, lon0: float, lat0: float, dx: float, target_dy: float) -> np.ndarray:
+    nlat = int(180 / target_dy)
+    nlon = int(360 / target_dy)
+    outgrid = np.zeros((nlat, nlon))
+
+    for xlon, ylat in itertools.product(range(nlon), range(nlat)):
+        transfer_lon, nlonsteps, lolon, hilon = gd.get_1d_transfer(lon0, dx, -180.0, target_dy, xlon)
+        transfer_lat, nlatsteps, lolat, hilat = gd.get_1d_transfer(lat0, dx, -90.0, target_dy, ylat)
+        transfer = np.outer(transfer_lat, transfer_lon)
+        outgrid[ylat, xlon] = np.sum(ingrid[lolat:hilat + 1, lolon:hilon + 1] * transfer) / np.sum(transfer)
+
+    return outgrid
+
+
+if __name__ == "__main__":
+    number_of_months = 6
+    era5_like = np.random.default_rng(0).normal(size=(number_of_months, 721, 1440)).astype(np.float32)
+
+    for block_size, label in [(20, '5x5'), (4, '1x1')]:
+        start = time.perf_counter()
+        old = loop_regrid(era5_like, block_size)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = gd.block_regrid(era5_like, block_size)
+        vector_time = time.perf_counter() - start
+
+        print(f"{label}: loop {loop_time:.2f}s, vectorised {vector_time:.3f}s, "
+              f"speedup {loop_time / vector_time:.0f}x, "
+              f"max difference {np.max(np.abs(old - new)):.2e} ({number_of_months} months)")
+
+    number_of_months = 960
+    jra_like = np.random.default_rng(0).normal(size=(number_of_months, 145, 288))
+    lon0 = -180. - 1.25 / 2.
+    lat0 = -90. - 1.25 / 2.
+
+    start = time.perf_counter()
+    enlarged_array = np.zeros((145, 289))
+    enlarged_array[:, 0:288] = jra_like[0, :, :]
+    enlarged_array[:, 288] = jra_like[0, :, 0]
+    old = loop_simple_regrid(enlarged_array, lon0, lat0, 1.25, 1.0)
+    loop_time = (time.perf_counter() - start) * number_of_months
+
+    start = time.perf_counter()
+    regridder = gd.Regridder(lon0, lat0, 1.25, (145, 288), 1.0)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = regridder.apply(jra_like)
+    apply_time = time.perf_counter() - start
+
+    print(f"JRA 1x1: loop {loop_time:.0f}s (estimated from one month), sparse {build_time:.2f}s to build "
+          f"+ {apply_time:.2f}s to apply, max difference {np.max(np.abs(old - new[0])):.2e} "
+          f"({number_of_months} months)")
@@ -0,0 +1,62 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Construct and transform many small monthly series, as in an ensemble, with the series held in numpy
+arrays, and again with the dataframe built straight after construction, which is how all series used
+to be held.
+"""
+import time
+import tracemalloc
+import numpy as np
+
+from climind.data_manager.metadata import CombinedMetadata, DatasetMetadata, CollectionMetadata
+import climind.data_types.timeseries as ts
+
+
+def make_ensemble(number_of_members: int, number_of_months: int, use_dataframe: bool):
+    years = np.array([1981 + i // 12 for i in range(number_of_months)])
+    months = np.array([1 + i % 12 for i in range(number_of_months)])
+
+    members = []
+    for _ in range(number_of_members):
+        metadata = CombinedMetadata(DatasetMetadata({'name': 'member', 'history': [], 'derived': False}, validate=False),
+                                    CollectionMetadata({'name': 'ensemble'}, validate=False))
+        series = ts.TimeSeriesMonthly(years, months, np.random.randn(number_of_months), metadata=metadata)
+        if use_dataframe:
+            _ = series.df
+        series.select_year_range(1991, 2020)
+        series.add_offset(0.5)
+        members.append(series)
+
+    return members
+
+
+if __name__ == "__main__":
+    number_of_members = 2000
+    number_of_months = 50 * 12
+
+    for use_dataframe in [True, False]:
+        start = time.perf_counter()
+        _ = make_ensemble(number_of_members, number_of_months, use_dataframe)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        ensemble = make_ensemble(number_of_members, number_of_months, use_dataframe)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        label = 'dataframes' if use_dataframe else 'arrays'
+        print(f"{number_of_members} series held as {label}: {elapsed:.2f}s, {memory / 1024 ** 2:.1f} MB")
@@ -0,0 +1,61 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compare looking up values in a :class:`.TimeSeriesMonthly` by scanning the dataframe, which is how it
+used to be done, with the lookups that use the time index, on a 2000-month series.
+"""
+import time
+import numpy as np
+
+from climind.data_manager.metadata import CombinedMetadata, DatasetMetadata, CollectionMetadata
+import climind.data_types.timeseries as ts
+
+
+def scan_lookup(series: ts.TimeSeriesMonthly, year: int, month: int):
+    df = series.df
+    selection = df[(df['year'] == year) & (df['month'] == month)]
+    if len(selection) == 0:
+        return None
+    return selection['data'].values[0]
+
+
+if __name__ == "__main__":
+    number_of_months = 2000
+
+    metadata = CombinedMetadata(DatasetMetadata({'name': 'test', 'history': []}, validate=False),
+                                CollectionMetadata({'name': 'test'}, validate=False))
+
+    years = [1850 + i // 12 for i in range(number_of_months)]
+    months = [1 + i % 12 for i in range(number_of_months)]
+    series = ts.TimeSeriesMonthly(years, months, np.random.randn(number_of_months).tolist(), metadata=metadata)
+
+    start = time.perf_counter()
+    old_values = [scan_lookup(series, year, month) for year, month in zip(years, months)]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_values = [series.get_value(year, month) for year, month in zip(years, months)]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_values = series.get_values(years, months)
+    batch_time = time.perf_counter() - start
+
+    assert np.array_equal(old_values, new_values)
+    assert np.array_equal(old_values, batch_values)
+
+    print(f"{number_of_months} lookups: dataframe scan {scan_time:.3f}s, "
+          f"indexed get_value {scalar_time:.3f}s, get_values {batch_time:.5f}s")
@@ -30,7 +30,7 @@
 from pathlib import Path
 import os
 from climind.definitions import ROOT_DIR, METADATA_DIR
-from climind.config.config import DATA_DIR
+from climind.config.config import DATA_DIR, CACHE_DIR, METADATA_INDEX_FILE
 from climind.web.dashboard import Dashboard
 
 if __name__ == "__main__":
@@ -65,126 +65,139 @@ if __name__ == "__main__":
 
     run_all = False
 
+    # Set to True to keep the data sets read in between builds
+    use_dataset_cache = False
+    dataset_cache_dir = CACHE_DIR / 'Datasets' if use_dataset_cache else None
+
+    # Number of processes used to build the cards and paragraphs
+    workers = 1
+
+    # Set to True to build every card and paragraph even if its inputs have not changed since the last build
+    force_rebuild = False
+
     if hub:
         json_file = ROOT_DIR / "climind" / "web" / "dashboard_metadata" / "hub_dashboard.json"
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / "ManagedData" / "Hub"
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2025)
+        dash.build(Path(dash_dir), focus_year=2025, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if justmaps:
         json_file = ROOT_DIR / "climind" / "web" / "dashboard_metadata" / "maps.json"
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / "ManagedData" / "Maps"
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2025)
+        dash.build(Path(dash_dir), focus_year=2025, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if interactive:
         json_file = ROOT_DIR / "climind" / "web" / "dashboard_metadata" / "interactive_dashboard.json"
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / "ManagedData" / "Interactive"
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2025)
+        dash.build(Path(dash_dir), focus_year=2025, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if minimal:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'Minimal_2024.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'Minimal'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2024)
+        dash.build(Path(dash_dir), focus_year=2024, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if halloween:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'Halloween.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'Halloween'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2024)
+        dash.build(Path(dash_dir), focus_year=2024, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if comprehensive or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'key_indicators_2023_comprehensive.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'ComprehensiveDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2023)
+        dash.build(Path(dash_dir), focus_year=2023, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if monthly or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'monthly.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'MonthlyDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2025)
+        dash.build(Path(dash_dir), focus_year=2025, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if dash2025 or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'key_indicators_2025.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'Dashboard2025'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2025)
+        dash.build(Path(dash_dir), focus_year=2025, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if dash2024 or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'key_indicators_2024.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'Dashboard2024'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2024)
+        dash.build(Path(dash_dir), focus_year=2024, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if dash2023 or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'key_indicators_2023.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'Dashboard2023'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2023)
+        dash.build(Path(dash_dir), focus_year=2023, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if dash2022 or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'key_indicators_2022.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'Dashboard2022'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2022)
+        dash.build(Path(dash_dir), focus_year=2022, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if decadal or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'decadal.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'DecadalDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir))
+        dash.build(Path(dash_dir), cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if ocean or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'ocean_indicators.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'OceanDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir))
+        dash.build(Path(dash_dir), cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if cryosphere or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'cryosphere_indicators.json'
-        dash = Dashboard.from_json(json_file, METADATA_DIR)
+        dash = Dashboard.from_json(json_file, METADATA_DIR, index_file=METADATA_INDEX_FILE)
         dash_dir = DATA_DIR / 'ManagedData' / 'CryoDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir))
+        dash.build(Path(dash_dir), cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if regional or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'regional.json'
 
-        dash = Dashboard.from_json(json_file, [DATA_DIR / 'ManagedData' / 'RegionalMetadata', METADATA_DIR])
+        dash = Dashboard.from_json(json_file, [DATA_DIR / 'ManagedData' / 'RegionalMetadata', METADATA_DIR],
+                                   index_file=METADATA_INDEX_FILE)
         dash.data_dir = [DATA_DIR / 'ManagedData' / 'RegionalData', DATA_DIR / "ManagedData" / "Data"]
 
         dash_dir = DATA_DIR / 'ManagedData' / 'RegionalDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2025)
+        dash.build(Path(dash_dir), focus_year=2025, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if regional_multiyear or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'regional_multiyear.json'
-        dash = Dashboard.from_json(json_file, DATA_DIR / 'ManagedData' / 'RegionalMetadata')
+        dash = Dashboard.from_json(json_file, DATA_DIR / 'ManagedData' / 'RegionalMetadata',
+                                   index_file=METADATA_INDEX_FILE)
         dash.data_dir = DATA_DIR / 'ManagedData' / 'RegionalData'
         dash_dir = DATA_DIR / 'ManagedData' / 'RegionalMultiyearDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2022)
+        dash.build(Path(dash_dir), focus_year=2022, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
 
     if regional_test or run_all:
         json_file = ROOT_DIR / 'climind' / 'web' / 'dashboard_metadata' / 'regional_test.json'
-        dash = Dashboard.from_json(json_file, DATA_DIR / 'ManagedData' / 'RegionalTestMetadata')
+        dash = Dashboard.from_json(json_file, DATA_DIR / 'ManagedData' / 'RegionalTestMetadata',
+                                   index_file=METADATA_INDEX_FILE)
         dash.data_dir = DATA_DIR / 'ManagedData' / 'RegionalTestData'
         dash_dir = DATA_DIR / 'ManagedData' / 'RegionalTestDashboard'
         dash_dir.mkdir(exist_ok=True)
-        dash.build(Path(dash_dir), focus_year=2022)
+        dash.build(Path(dash_dir), focus_year=2022, cache_dir=dataset_cache_dir, workers=workers, force=force_rebuild)
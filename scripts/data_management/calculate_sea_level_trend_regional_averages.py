@@ -22,7 +22,7 @@ import geopandas as gp
 import climind.data_manager.processing as dm
 import climind.plotters.plot_types as pt
 
-from climind.config.config import DATA_DIR, CLIMATOLOGY
+from climind.config.config import DATA_DIR, CLIMATOLOGY, CACHE_DIR
 from climind.definitions import METADATA_DIR
 
 
@@ -37,7 +37,7 @@ def process_regions(region_names, region_shapes, regional_data_dir, ds, stub, lo
 
     for region in range(n_regions):
         monthly_time_series = ds.calculate_regional_average_missing(region_shapes, region, land_only=False,
-                                                                    ocean_only=False)
+                                                                    ocean_only=False, cache_dir=CACHE_DIR / 'Masks')
         wmo_ra = region + 1
         monthly_time_series.metadata['name'] = f"{stub}_{wmo_ra}_{monthly_time_series.metadata['name']}"
         dataset_name = monthly_time_series.metadata['name']
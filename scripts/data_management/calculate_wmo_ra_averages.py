@@ -21,8 +21,9 @@ import geopandas as gp
 
 import climind.data_manager.processing as dm
 import climind.plotters.plot_types as pt
+from climind.data_types.grid import RegionalAverager
 
-from climind.config.config import DATA_DIR, CLIMATOLOGY
+from climind.config.config import DATA_DIR, CLIMATOLOGY, CACHE_DIR, METADATA_INDEX_FILE
 from climind.definitions import METADATA_DIR
 
 
@@ -65,8 +66,13 @@ def process_regions(region_names, region_shapes, regional_data_dir, ds, stub, st
                     land_only=True) -> None:
     n_regions = len(region_names)
 
+    # Rasterise all the regions once and average over them together
+    averager = RegionalAverager(region_shapes.loc[list(range(n_regions))], ds.df.latitude, ds.df.longitude,
+                                land_only=land_only, cache_dir=CACHE_DIR / 'Masks')
+    all_monthly_time_series = ds.calculate_regional_averages(averager)
+
     for region in range(n_regions):
-        monthly_time_series = ds.calculate_regional_average_missing(region_shapes, region, land_only=land_only)
+        monthly_time_series = all_monthly_time_series[region]
         annual_time_series = monthly_time_series.make_annual()
 
         if region_names[region] == "Europe" and ds.metadata["name"] == "ERA5":
@@ -166,7 +172,7 @@ if __name__ == "__main__":
     print(arab_subregions)
 
     # Read in the whole archive then select the various subsets needed here
-    archive = dm.DataArchive.from_directory(metadata_dir)
+    archive = dm.DataArchive.from_directory(metadata_dir, index_file=METADATA_INDEX_FILE)
 
     ts_archive = archive.select(
         {
@@ -23,7 +23,7 @@ import climind.plotters.plot_types as pt
 import climind.stats.utils as utils
 from climind.data_types.timeseries import make_combined_series
 
-from climind.config.config import DATA_DIR
+from climind.config.config import DATA_DIR, METADATA_INDEX_FILE
 from climind.definitions import METADATA_DIR
 import seaborn as sns
 import pandas as pd
@@ -85,7 +85,7 @@ if __name__ == "__main__":
                         filemode='w', level=logging.INFO)
 
     # Read in the whole archive then select the various subsets needed here
-    archive = dm.DataArchive.from_directory(metadata_dir)
+    archive = dm.DataArchive.from_directory(metadata_dir, index_file=METADATA_INDEX_FILE)
 
     # some global temperature data sets are annual only, others are monthly so need to read these separately
     ann_archive = archive.select(
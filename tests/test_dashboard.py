@@ -14,14 +14,17 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import copy
+import multiprocessing
 import pytest
-from unittest.mock import call
+from unittest.mock import call, ANY
 
 from pathlib import Path
 from zipfile import is_zipfile
 from climind.definitions import ROOT_DIR, METADATA_DIR
 import climind.data_manager.processing as dm
 import climind.web.dashboard as db
+from climind.data_manager.metadata import DatasetMetadata, CollectionMetadata, CombinedMetadata
 from climind.data_types.timeseries import TimeSeriesMonthly
 
 
@@ -523,11 +526,12 @@ def test_dashboard_build(mocker, tmpdir):
     page3 = {'id': '2', 'name': '2'}
     page4 = {'id': '3', 'name': '3'}
 
-    dash = db.Dashboard({'pages': [page1, page2, page3, page4]}, 'archive')
+    archive = dm.DataArchive()
+    dash = db.Dashboard({'pages': [page1, page2, page3, page4]}, archive)
     assert len(dash.pages) == 4
 
     dash.data_dir = 'data_dir'
-    dash.build(tmpdir)
+    dash.build(Path(tmpdir))
 
     assert m.call_count == 4
 
@@ -539,10 +543,258 @@ def test_dashboard_build(mocker, tmpdir):
     ]
 
     calls = [
-        call(tmpdir, 'data_dir', 'archive', focus_year=2021, menu_items=expected_menu_items),
-        call(tmpdir, 'data_dir', 'archive', focus_year=2021, menu_items=expected_menu_items),
-        call(tmpdir, 'data_dir', 'archive', focus_year=2021, menu_items=expected_menu_items),
-        call(tmpdir, 'data_dir', 'archive', focus_year=2021, menu_items=expected_menu_items)
+        call(Path(tmpdir), 'data_dir', archive, focus_year=2021, menu_items=expected_menu_items,
+             pipeline_cache=ANY, manifest=ANY),
+        call(Path(tmpdir), 'data_dir', archive, focus_year=2021, menu_items=expected_menu_items,
+             pipeline_cache=ANY, manifest=ANY),
+        call(Path(tmpdir), 'data_dir', archive, focus_year=2021, menu_items=expected_menu_items,
+             pipeline_cache=ANY, manifest=ANY),
+        call(Path(tmpdir), 'data_dir', archive, focus_year=2021, menu_items=expected_menu_items,
+             pipeline_cache=ANY, manifest=ANY)
     ]
 
     m.assert_has_calls(calls, any_order=True)
+
+
+# Parallel builds
+
+def fake_process_card(self, data_dir, figure_dir, formatted_data_dir, archive):
+    if self['title'] == 'Broken':
+        raise ValueError('broken card')
+    self['figure_name'] = f"{self['title']}.png"
+
+
+def fake_process_paragraph(self, data_dir, archive, focus_year=2021):
+    self['text'] = f'Paragraph about {focus_year}'
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason='patched methods are only seen by worker processes that are forked')
+def test_dashboard_build_with_workers(mocker, tmpdir):
+    mocker.patch('climind.web.dashboard.Card.process_card', fake_process_card)
+    mocker.patch('climind.web.dashboard.Paragraph.process_paragraph', fake_process_paragraph)
+    mock_render = mocker.patch('climind.web.dashboard.Page.render')
+
+    pages = []
+    for page_number in range(2):
+        pages.append({
+            'id': f'page{page_number}', 'name': f'Page {page_number}', 'template': 'front_page',
+            'cards': [{'title': f'Card {page_number} {i}'} for i in range(5)] + [{'title': 'Broken'}],
+            'paragraphs': [{'writing': {}}]
+        })
+    pages[1]['cards'][0]['hidden'] = True
+
+    dash = db.Dashboard({'pages': pages}, archive=dm.DataArchive())
+    dash.build(Path(tmpdir), focus_year=2024, cache_size=0, workers=3)
+
+    assert mock_render.call_count == 2
+    for page_number, render_call in enumerate(mock_render.call_args_list):
+        _, processed_cards, processed_paragraphs = render_call.args
+        expected_titles = [f'Card {page_number} {i}' for i in range(5)]
+        if page_number == 1:
+            expected_titles = expected_titles[1:]
+        assert [card['title'] for card in processed_cards] == expected_titles
+        assert [card['figure_name'] for card in processed_cards] == [f'{t}.png' for t in expected_titles]
+        assert processed_paragraphs[0]['text'] == 'Paragraph about 2024'
+
+    # results are copied back into the page metadata as they are in a serial build
+    assert pages[0]['cards'][2]['figure_name'] == 'Card 0 2.png'
+    assert 'figure_name' not in pages[0]['cards'][5]
+
+
+def test_dashboard_build_shares_cache_budget_between_workers(mocker, tmpdir):
+    mocker.patch('climind.web.dashboard.ProcessPoolExecutor')
+    archive = dm.DataArchive()
+    dash = db.Dashboard({'pages': []}, archive)
+    dash.build(Path(tmpdir), cache_size=1000, workers=4)
+    assert archive.dataset_cache.max_bytes == 250
+    # the pipeline cache is off by default in parallel builds
+    assert db.ProcessPoolExecutor.call_args.kwargs['initargs'][1] == 0
+
+
+def test_dashboard_build_pipeline_cache_budget(mocker, tmpdir):
+    m = mocker.patch('climind.web.dashboard.Page.build')
+    archive = dm.DataArchive()
+    dash = db.Dashboard({'pages': [{'id': '0', 'name': '0'}]}, archive)
+    dash.build(Path(tmpdir), cache_size=1000)
+    assert m.call_args.kwargs['pipeline_cache'].max_bytes == 250
+    assert archive.dataset_cache.max_bytes == 750
+
+    archive = dm.DataArchive()
+    dash = db.Dashboard({'pages': [{'id': '0', 'name': '0'}]}, archive)
+    dash.build(Path(tmpdir), cache_size=1000, pipeline_cache_size=0)
+    assert m.call_args.kwargs['pipeline_cache'] is None
+    assert archive.dataset_cache.max_bytes == 1000
+
+
+# Pipeline cache
+
+@pytest.fixture
+def pipeline_series():
+    dataset_metadata = DatasetMetadata({'url': [''], 'filename': [''], 'type': 'timeseries',
+                                        'long_name': '', 'time_resolution': 'monthly',
+                                        'space_resolution': 999, 'climatology_start': 1961,
+                                        'climatology_end': 1990, 'actual': False, 'derived': False,
+                                        'history': [], 'reader': '', 'fetcher': ''})
+    collection_metadata = CollectionMetadata({'name': 'test', 'display_name': 'Test', 'version': '',
+                                              'variable': 'tas', 'units': 'degC', 'citation': [''],
+                                              'citation_url': [''], 'data_citation': [''], 'colour': '',
+                                              'zpos': 99})
+    years = [y for y in range(1950, 2023) for _ in range(12)]
+    months = list(range(1, 13)) * 73
+    data = [0.01 * i for i in range(len(years))]
+    return TimeSeriesMonthly(years, months, data,
+                             metadata=CombinedMetadata(dataset_metadata, collection_metadata))
+
+
+def test_pipeline_cache_reuses_shared_prefix(pipeline_series):
+    steps = [{'method': 'rebaseline', 'args': [1981, 2010]},
+             {'method': 'make_annual', 'args': []},
+             {'method': 'select_year_range', 'args': [1960, 2020]}]
+    other_steps = steps[:2] + [{'method': 'add_offset', 'args': [0.5]}]
+
+    expected = db.process_single_dataset(copy.deepcopy(pipeline_series), steps)
+
+    cache = db.PipelineCache()
+    first = cache.process(copy.deepcopy(pipeline_series), steps)
+    assert cache.hits == 0
+    assert cache.misses == 3
+
+    second = cache.process(copy.deepcopy(pipeline_series), other_steps)
+    assert cache.hits == 2
+    assert cache.misses == 4
+
+    third = cache.process(copy.deepcopy(pipeline_series), steps)
+    assert cache.hits == 5
+    assert cache.misses == 4
+
+    for result in [first, third]:
+        assert result.df.equals(expected.df)
+        assert list(result.metadata['history']) == list(expected.metadata['history'])
+    assert second.df.equals(db.process_single_dataset(copy.deepcopy(pipeline_series), other_steps).df)
+
+    # results handed out are copies so changing them does not change the cache
+    third.add_offset(10.0)
+    fourth = cache.process(copy.deepcopy(pipeline_series), steps)
+    assert fourth.df.equals(expected.df)
+
+
+def test_pipeline_cache_evicts_within_budget(pipeline_series):
+    steps = [{'method': 'rebaseline', 'args': [1981, 2010]},
+             {'method': 'make_annual', 'args': []}]
+
+    cache = db.PipelineCache(max_bytes=dm.estimate_size(pipeline_series) + 1)
+    cache.process(copy.deepcopy(pipeline_series), steps)
+    assert cache.total_bytes <= cache.max_bytes
+    assert len(cache) == 1
+
+    # only the annual series is left so the rebaselining is run again
+    cache.process(copy.deepcopy(pipeline_series), steps[:1])
+    assert cache.statistics() == {'hits': 0, 'misses': 3, 'stored': 1}
+
+
+def test_pipeline_cache_passes_through_without_fingerprint():
+    steps = [{'method': 'sum', 'args': [3]}]
+    cache = db.PipelineCache()
+    result = cache.process(SimpleWidget(1), steps)
+    assert result.value == 4
+    assert len(cache) == 0
+
+
+# Incremental builds
+
+@pytest.fixture
+def manifest_archive(mocker):
+    archive = mocker.MagicMock()
+    archive.select.return_value.dataset_keys.return_value = ['key1', 'key2']
+    return archive
+
+
+def fake_built_card(card_metadata, build_dir):
+    card = db.Card(card_metadata)
+    figure_dir, formatted_data_dir = db.Page._make_directories(build_dir)
+    for suffix in ['png', 'pdf', 'svg']:
+        (figure_dir / f'Card_one.{suffix}').write_text('figure')
+    (formatted_data_dir / 'Card_one_data_files.zip').write_text('zip')
+    card['figure_name'] = 'Card_one.png'
+    card['caption'] = 'A caption'
+    card['csv_name'] = 'Card_one_data_files.zip'
+    card['csv_checksum'] = db.file_checksum(formatted_data_dir / 'Card_one_data_files.zip')
+    card['dataset_metadata'] = [{'name': 'dataset'}]
+    return card
+
+
+def test_build_manifest_restores_unchanged_card(tmp_path, card_metadata, manifest_archive):
+    manifest = db.BuildManifest(tmp_path, version='1.0.0')
+    card = fake_built_card(copy.deepcopy(card_metadata), tmp_path)
+    assert not manifest.restore(card, 'data_dir', manifest_archive)
+    manifest.record(card)
+    manifest.save()
+    assert manifest.rebuilt == 1
+
+    manifest = db.BuildManifest(tmp_path, version='1.0.0')
+    restored = db.Card(copy.deepcopy(card_metadata))
+    assert manifest.restore(restored, 'data_dir', manifest_archive)
+    assert manifest.reused == 1
+    for key in ['figure_name', 'caption', 'csv_name', 'csv_checksum', 'dataset_metadata']:
+        assert restored[key] == card[key]
+
+    # a different version of climind, changed data or changed plotting all need a new build
+    assert not db.BuildManifest(tmp_path, version='2.0.0').restore(db.Card(copy.deepcopy(card_metadata)),
+                                                                    'data_dir', manifest_archive)
+    changed = db.Card(copy.deepcopy(card_metadata))
+    changed['plotting']['title'] = 'Changed'
+    assert not db.BuildManifest(tmp_path, version='1.0.0').restore(changed, 'data_dir', manifest_archive)
+
+    manifest_archive.select.return_value.dataset_keys.return_value = ['key1', 'changed']
+    assert not db.BuildManifest(tmp_path, version='1.0.0').restore(db.Card(copy.deepcopy(card_metadata)),
+                                                                    'data_dir', manifest_archive)
+
+
+def test_build_manifest_needs_output_files(tmp_path, card_metadata, manifest_archive):
+    manifest = db.BuildManifest(tmp_path, version='1.0.0')
+    card = fake_built_card(copy.deepcopy(card_metadata), tmp_path)
+    manifest.restore(card, 'data_dir', manifest_archive)
+    manifest.record(card)
+    manifest.save()
+
+    (tmp_path / 'formatted_data' / 'Card_one_data_files.zip').write_text('a different zip')
+    manifest = db.BuildManifest(tmp_path, version='1.0.0')
+    assert not manifest.restore(db.Card(copy.deepcopy(card_metadata)), 'data_dir', manifest_archive)
+
+    (tmp_path / 'formatted_data' / 'Card_one_data_files.zip').write_text('zip')
+    (tmp_path / 'figures' / 'Card_one.png').write_text('a different figure')
+    assert not manifest.restore(db.Card(copy.deepcopy(card_metadata)), 'data_dir', manifest_archive)
+
+    (tmp_path / 'figures' / 'Card_one.png').write_text('figure')
+    assert manifest.restore(db.Card(copy.deepcopy(card_metadata)), 'data_dir', manifest_archive)
+
+    for suffix in ['png', 'pdf', 'svg']:
+        (tmp_path / 'figures' / f'Card_one.{suffix}').unlink()
+        assert not db.BuildManifest(tmp_path, version='1.0.0').restore(db.Card(copy.deepcopy(card_metadata)),
+                                                                        'data_dir', manifest_archive)
+        (tmp_path / 'figures' / f'Card_one.{suffix}').write_text('figure')
+
+
+def test_build_card_with_manifest(mocker, tmp_path, card_metadata, manifest_archive):
+    def fake_process_card_with_outputs(self, data_dir, figure_dir, formatted_data_dir, archive):
+        self.metadata.update(fake_built_card(self.metadata, tmp_path).metadata)
+
+    m = mocker.patch('climind.web.dashboard.Card.process_card', autospec=True,
+                     side_effect=fake_process_card_with_outputs)
+
+    manifest = db.BuildManifest(tmp_path, version='1.0.0')
+    db.build_card(copy.deepcopy(card_metadata), 'data_dir', None, None, manifest_archive, manifest=manifest)
+    manifest.save()
+    assert m.call_count == 1
+
+    manifest = db.BuildManifest(tmp_path, version='1.0.0')
+    card = db.build_card(copy.deepcopy(card_metadata), 'data_dir', None, None, manifest_archive, manifest=manifest)
+    assert m.call_count == 1
+    assert card['figure_name'] == 'Card_one.png'
+
+    # forcing a rebuild ignores the previous build
+    manifest = db.BuildManifest(tmp_path, version='1.0.0')
+    manifest.clear()
+    db.build_card(copy.deepcopy(card_metadata), 'data_dir', None, None, manifest_archive, manifest=manifest)
+    assert m.call_count == 2
@@ -298,6 +298,48 @@ def test_range_of_datasets(annual_grid, annual_grid_2):
     assert test_median.get_end_year() == 1862
 
 
+def test_percentile_of_datasets(annual_grid, annual_grid_2):
+    all_datasets = [annual_grid, annual_grid_2]
+    test_percentile = gd.percentile_of_datasets(all_datasets, 75)
+
+    assert test_percentile.df['tas_mean'].data[0, 0, 0] == 0.0
+    for i in range(1, 12):
+        assert test_percentile.df['tas_mean'].data[i, 0, 0] == 0.75
+    assert test_percentile.df['tas_mean'].data[12, 0, 0] == 1.0
+
+
+def test_process_datasets_bad_grid_type(annual_grid, annual_grid_2):
+    with pytest.raises(ValueError):
+        gd.process_datasets([annual_grid, annual_grid_2], 'mode')
+    with pytest.raises(ValueError):
+        gd.process_datasets([annual_grid, annual_grid_2], 'percentile')
+
+
+def test_median_of_datasets_1x1(test_combo):
+    lats = np.arange(-89.5, 90.0, 1.0)
+    lons = np.arange(-179.5, 180.0, 1.0)
+
+    all_datasets = []
+    for i, start_year in enumerate([1850, 1851, 1852]):
+        test_grid = np.zeros((3, 180, 360)) + i
+        test_grid[:, 10, 20] = np.nan
+        times = pd.date_range(start=f'{start_year}-01-01', freq='1YS', periods=3)
+        test_ds = gd.make_xarray(test_grid, times, lats, lons)
+        test_ds = test_ds.groupby('time.year').mean(dim='time')
+        all_datasets.append(gd.GridAnnual(test_ds, test_combo))
+
+    test_median = gd.median_of_datasets(all_datasets)
+    test_range = gd.range_of_datasets(all_datasets)
+
+    assert test_median.df['tas_mean'].data.shape == (5, 180, 360)
+    assert test_median.df['tas_mean'].data[0, 0, 0] == 0.0
+    assert test_median.df['tas_mean'].data[2, 0, 0] == 1.0
+    assert test_median.df['tas_mean'].data[4, 0, 0] == 2.0
+    assert np.isnan(test_median.df['tas_mean'].data[2, 10, 20])
+    assert test_range.df['tas_mean'].data[2, 0, 0] == 1.0
+    assert np.all(test_median.df.latitude.data == lats)
+
+
 def test_get_first_year_and_last_years(annual_grid):
     test_start_date = annual_grid.get_start_year()
     test_end_date = annual_grid.get_end_year()
@@ -564,6 +606,40 @@ def test_rank_annual_with_missing():
     assert test_ranked.df['tas_mean'].data[9, 9, 7] == 10
 
 
+def test_rank_annual_with_missing_does_not_change_input():
+    test_grid = np.zeros((4, 180, 360))
+    lats = np.arange(-89.5, 90.0, 1.0)
+    lons = np.arange(-179.5, 180.0, 1.0)
+    times = np.arange(1., 5., 1.0)
+
+    test_grid[:, 0, 0] = [1.0, np.nan, 3.0, 2.0]
+
+    test_ds = gd.make_xarray(test_grid, times, lats, lons)
+    test_grid_annual = gd.GridAnnual(test_ds, {})
+
+    test_ranked = test_grid_annual.rank()
+
+    assert np.isnan(test_grid_annual.df['tas_mean'].data[1, 0, 0])
+    assert np.isnan(test_ranked.df['tas_mean'].data[1, 0, 0])
+    assert test_ranked.df['tas_mean'].data[2, 0, 0] == 1
+    assert test_ranked.df['tas_mean'].data[3, 0, 0] == 2
+    assert test_ranked.df['tas_mean'].data[0, 0, 0] == 3
+
+    test_ranked = test_grid_annual.rank(ascending=True)
+    assert test_ranked.df['tas_mean'].data[0, 0, 0] == 1
+    assert test_ranked.df['tas_mean'].data[2, 0, 0] == 3
+
+
+def test_rank_array_ties():
+    test_array = np.array([1.0, 3.0, 3.0, 2.0])
+
+    assert np.all(gd.rank_array(test_array) == [4, 1, 1, 3])
+    assert np.all(gd.rank_array(test_array, method='max') == [4, 2, 2, 3])
+    assert np.all(gd.rank_array(test_array, method='average') == [4, 1.5, 1.5, 3])
+    assert np.all(gd.rank_array(test_array, method='dense') == [3, 1, 1, 2])
+    assert np.all(gd.rank_array(test_array, method='min', ascending=True) == [1, 3, 3, 2])
+
+
 @pytest.fixture
 def shapes():
     data_dictionary = {
@@ -674,6 +750,70 @@ def test_calculate_regional_average_missing(shapes, test_combo):
         assert ts.df['data'][i] == pytest.approx(1.0, 0.000001)
 
 
+def test_regional_averager_bad_options(shapes):
+    lats = np.arange(-87.5, 90.0, 5.0)
+    lons = np.arange(-177.5, 180.0, 5.0)
+    with pytest.raises(RuntimeError):
+        gd.RegionalAverager(shapes, lats, lons, land_only=True, ocean_only=True)
+
+
+def test_regional_averager_weights(shapes):
+    lats = np.arange(-87.5, 90.0, 5.0)
+    lons = np.arange(-177.5, 180.0, 5.0)
+    averager = gd.RegionalAverager(shapes, lats, lons, land_only=False)
+
+    assert averager.weights.shape == (len(shapes), 36, 72)
+    assert np.all(averager.region_numbers == shapes.index.values)
+
+    with pytest.raises(ValueError):
+        averager.apply(np.zeros((12, 72, 144)))
+
+
+def test_region_masks_are_cached(shapes, tmpdir):
+    lats = np.arange(-87.5, 90.0, 5.0)
+    lons = np.arange(-177.5, 180.0, 5.0)
+
+    numbers, mask = gd.region_masks(shapes, lats, lons)
+    cached_numbers, cached_mask = gd.region_masks(shapes, lats, lons, cache_dir=Path(tmpdir))
+    assert len(list(Path(tmpdir).glob('regions_*.npy'))) == 1
+
+    numbers_from_file, mask_from_file = gd.region_masks(shapes, lats, lons, cache_dir=Path(tmpdir))
+    assert isinstance(mask_from_file, np.memmap)
+    assert np.all(numbers_from_file == numbers)
+    assert np.all(mask_from_file == mask)
+    assert np.all(cached_mask == mask)
+
+    # a different grid or different shapes need a new mask
+    _ = gd.region_masks(shapes, lats[0:18], lons, cache_dir=Path(tmpdir))
+    _ = gd.region_masks(shapes.iloc[[1, 2]], lats, lons, cache_dir=Path(tmpdir))
+    assert len(list(Path(tmpdir).glob('regions_*.npy'))) == 3
+
+
+def test_calculate_regional_averages_matches_single_regions(shapes, test_combo):
+    rng = np.random.default_rng(42)
+    test_grid = rng.normal(size=(12, 36, 72))
+    test_grid[rng.random(test_grid.shape) < 0.5] = np.nan
+    test_grid[3, 0:18, :] = np.nan
+
+    lats = np.arange(-87.5, 90.0, 5.0)
+    lons = np.arange(-177.5, 180.0, 5.0)
+    times = pd.date_range(start='1850-01-01', freq='1MS', periods=12)
+    test_grid_monthly = gd.GridMonthly(gd.make_xarray(test_grid, times, lats, lons), test_combo)
+
+    averager = gd.RegionalAverager(shapes, lats, lons, land_only=False)
+    all_series = test_grid_monthly.calculate_regional_averages(averager)
+    assert len(all_series) == len(shapes)
+
+    for region in range(len(shapes)):
+        single = test_grid_monthly.calculate_regional_average_missing(shapes, region, land_only=False)
+        assert np.allclose(all_series[region].df['data'], single.df['data'], equal_nan=True)
+        assert all_series[region].metadata['history'][-1] == 'Calculated area-average'
+
+    # the southern hemisphere is missing in month 4 so only the northern hemisphere average survives
+    assert np.isnan(all_series[2].df['data'][3])
+    assert not np.isnan(all_series[1].df['data'][3])
+
+
 def test_calculate_non_uniform_regional_average(shapes, test_combo):
     test_grid = np.zeros((12, 36, 72))
     lats = np.arange(-87.5, 90.0, 5.0)
@@ -700,3 +840,122 @@ def test_calculate_non_uniform_regional_average(shapes, test_combo):
     ts = test_grid_monthly.calculate_regional_average(shapes, 2, land_only=False)
     for i in range(12):
         assert ts.df['data'][i] == pytest.approx(36. / sum_of_weights, 0.000001)
+
+
+def loop_block_regrid(ingrid, block_size):
+    # reference implementation of the block regridding, one grid cell at a time
+    transfer = np.zeros((block_size + 1, block_size + 1)) + 1
+    transfer[0, :] = transfer[0, :] * 0.5
+    transfer[block_size, :] = transfer[block_size, :] * 0.5
+    transfer[:, 0] = transfer[:, 0] * 0.5
+    transfer[:, block_size] = transfer[:, block_size] * 0.5
+    transfer_sum = np.sum(transfer)
+
+    number_of_times, number_of_lats, number_of_lons = ingrid.shape
+    nlat = (number_of_lats - 1) // block_size
+    nlon = number_of_lons // block_size
+
+    target_grid = np.zeros((number_of_times, nlat, nlon))
+    enlarged_array = np.zeros((number_of_lats, number_of_lons + 1))
+
+    for m in range(number_of_times):
+        enlarged_array[:, 0:number_of_lons] = ingrid[m, :, :]
+        enlarged_array[:, number_of_lons] = ingrid[m, :, 0]
+        for xx in range(nlon):
+            for yy in range(nlat):
+                selection = enlarged_array[yy * block_size:(yy + 1) * block_size + 1,
+                                           xx * block_size:(xx + 1) * block_size + 1]
+                target_grid[m, yy, xx] = np.sum(transfer * selection) / transfer_sum
+
+    return target_grid
+
+
+def test_block_transfer_weights():
+    weights = gd.block_transfer_weights(4)
+    assert len(weights) == 5
+    assert weights[0] == 0.5
+    assert weights[4] == 0.5
+    assert np.all(weights[1:4] == 1.0)
+
+
+def test_block_regrid_matches_loop():
+    rng = np.random.default_rng(42)
+    test_grid = rng.normal(size=(3, 37, 72))
+    test_grid[1, 10, 17] = np.nan
+
+    result = gd.block_regrid(test_grid, 4, time_chunk=2)
+    expected = loop_block_regrid(test_grid, 4)
+
+    assert result.shape == (3, 9, 18)
+    assert np.array_equal(np.isnan(result), np.isnan(expected))
+    assert np.allclose(result[~np.isnan(result)], expected[~np.isnan(expected)], atol=1e-12)
+    assert np.isnan(result[1, 2, 4])
+
+
+def test_block_regrid_wraps_longitude():
+    test_grid = np.zeros((1, 5, 8))
+    test_grid[:, :, 0] = 8.0
+
+    result = gd.block_regrid(test_grid, 4)
+
+    # the first column contributes to the first grid cell and, with half weight, to the last
+    assert result.shape == (1, 1, 2)
+    assert result[0, 0, 0] == pytest.approx(8.0 * 0.5 / 4.)
+    assert result[0, 0, 1] == pytest.approx(8.0 * 0.5 / 4.)
+
+
+def test_block_regrid_bad_shape():
+    with pytest.raises(ValueError):
+        gd.block_regrid(np.zeros((1, 36, 72)), 4)
+
+
+def test_regridder_matches_simple_regrid_with_wrapped_longitude():
+    rng = np.random.default_rng(1)
+    test_grid = rng.normal(size=(2, 145, 288))
+
+    enlarged_array = np.zeros((145, 289))
+    enlarged_array[:, 0:288] = test_grid[1, :, :]
+    enlarged_array[:, 288] = test_grid[1, :, 0]
+    expected = gd.simple_regrid(enlarged_array, -180. - 1.25 / 2., -90. - 1.25 / 2., 1.25, 5.0)
+
+    regridder = gd.Regridder(-180. - 1.25 / 2., -90. - 1.25 / 2., 1.25, (145, 288), 5.0)
+    result = regridder.apply(test_grid)
+
+    assert result.shape == (2, 36, 72)
+    assert np.allclose(result[1, :, :], expected, atol=1e-12)
+
+
+def test_regridder_missing_data():
+    test_grid = np.zeros((1, 180, 360)) + 2.0
+    test_grid[0, 0:5, 0:5] = np.nan
+    test_grid[0, 5:10, 0:4] = np.nan
+
+    regridder = gd.Regridder(-180.0, -90.0, 1.0, (180, 360), 5.0)
+
+    result = regridder.apply(test_grid)
+    assert np.isnan(result[0, 0, 0])
+    assert np.isnan(result[0, 1, 0])
+    assert result[0, 2, 0] == 2.0
+
+    result = regridder.apply(test_grid, skipna=True)
+    assert np.isnan(result[0, 0, 0])
+    assert result[0, 1, 0] == pytest.approx(2.0)
+    assert result[0, 2, 0] == 2.0
+
+
+def test_regridder_cache(tmpdir):
+    regridder = gd.Regridder(-180.0, -90.0, 1.0, (180, 360), 5.0, cache_dir=Path(tmpdir))
+    cache_file = Path(tmpdir) / f'regridder_{regridder.get_signature()}.npz'
+    assert cache_file.exists()
+
+    cached_regridder = gd.Regridder(-180.0, -90.0, 1.0, (180, 360), 5.0, cache_dir=Path(tmpdir))
+    assert (cached_regridder.weights != regridder.weights).nnz == 0
+
+    other_regridder = gd.Regridder(-180.0, -90.0, 1.0, (180, 360), 1.0, cache_dir=Path(tmpdir))
+    assert other_regridder.get_signature() != regridder.get_signature()
+
+
+def test_regridder_wrong_shape():
+    regridder = gd.Regridder(-180.0, -90.0, 1.0, (180, 360), 5.0)
+    with pytest.raises(ValueError):
+        regridder.apply(np.zeros((1, 36, 72)))
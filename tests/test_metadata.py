@@ -23,7 +23,7 @@ from jsonschema import ValidationError, validate, RefResolver
 
 from climind.definitions import ROOT_DIR
 from climind.data_manager.metadata import DatasetMetadata, CollectionMetadata, BaseMetadata, CombinedMetadata, \
-    list_match
+    list_match, get_validator, validate_metadata, History
 
 schema_path = Path(ROOT_DIR) / 'climind' / 'data_manager' / 'dataset_schema.json'
 with open(schema_path) as f:
@@ -149,6 +149,15 @@ def test_missing_standard_attribute_in_dataset():
         _ = DatasetMetadata(attributes)
 
 
+def test_missing_standard_attribute_in_dataset_without_validation():
+    attributes = {'url': 'test_url',
+                  'reader': 'test_reader',
+                  'fetcher': 'test_fetcher'}
+
+    ds = DatasetMetadata(attributes, validate=False)
+    assert ds['reader'] == 'test_reader'
+
+
 def test_match(test_dataset_attributes):
     ds = DatasetMetadata(test_dataset_attributes)
 
@@ -206,6 +215,26 @@ def test_collection_validation_fail(test_collection_attributes):
         _ = CollectionMetadata(test_collection_attributes)
 
 
+def test_collection_validation_skipped(test_collection_attributes):
+    test_collection_attributes['zpos'] = ''
+    ds = CollectionMetadata(test_collection_attributes, validate=False)
+    assert ds['zpos'] == ''
+
+
+def test_validator_is_cached():
+    assert get_validator('metadata_schema.json') is get_validator('metadata_schema.json')
+    assert get_validator('dataset_schema.json') is not get_validator('metadata_schema.json')
+
+
+def test_validate_metadata(test_collection_attributes, test_dataset_attributes):
+    validate_metadata(test_collection_attributes, 'metadata_schema.json')
+    validate_metadata(test_dataset_attributes, 'dataset_schema.json')
+
+    test_collection_attributes['datasets'] = [{'url': 'test_url'}]
+    with pytest.raises(ValidationError):
+        validate_metadata(test_collection_attributes, 'metadata_schema.json')
+
+
 def test_combined(test_dataset_attributes, test_collection_attributes):
     ds = DatasetMetadata(test_dataset_attributes)
     col = CollectionMetadata(test_collection_attributes)
@@ -307,3 +336,114 @@ def test_combined_creation_message(test_dataset_attributes, test_collection_attr
     assert datestamp in combo['acknowledgement']
     assert combo['history'][0] == datestamp
     assert combo['acknowledgement'] == filled_acknowledgement
+
+
+def test_history_behaves_like_list():
+    history = History(['a', 'b'])
+    history.append('c')
+    history.extend(['d'])
+
+    assert len(history) == 4
+    assert history == ['a', 'b', 'c', 'd']
+    assert history[0] == 'a'
+    assert history[-1] == 'd'
+    assert history[1:3] == ['b', 'c']
+    assert 'c' in history
+    with pytest.raises(IndexError):
+        _ = history[4]
+
+
+def test_history_fork_is_independent():
+    history = History(['a', 'b'])
+    fork = history.fork()
+    fork.append('fork')
+    history.append('original')
+
+    assert fork == ['a', 'b', 'fork']
+    assert history == ['a', 'b', 'original']
+    assert fork[1] == 'b'
+    assert fork[2] == 'fork'
+
+    fork_of_fork = fork.fork()
+    fork_of_fork.append('again')
+    assert fork_of_fork == ['a', 'b', 'fork', 'again']
+    assert fork == ['a', 'b', 'fork']
+
+
+def test_combined_fork_copy_on_write(test_dataset_attributes, test_collection_attributes):
+    ds = DatasetMetadata(test_dataset_attributes)
+    col = CollectionMetadata(test_collection_attributes)
+    combo = CombinedMetadata(ds, col)
+
+    fork = combo.fork()
+    assert fork.dataset._metadata is combo.dataset._metadata
+    assert fork.collection._metadata is combo.collection._metadata
+
+    fork['reader'] = 'different_reader'
+    fork['history'].append('forked')
+    fork['url'].append('another_url')
+
+    assert combo['reader'] == 'test_reader'
+    assert combo['history'] == ['AAAA', 'AAAB', 'BBBB']
+    assert combo['url'] == ['test_url']
+    assert fork['history'] == ['AAAA', 'AAAB', 'BBBB', 'forked']
+    assert fork.collection._metadata is combo.collection._metadata
+
+    combo['history'].append('original')
+    assert fork['history'] == ['AAAA', 'AAAB', 'BBBB', 'forked']
+
+
+def test_combined_deepcopy_forks(test_dataset_attributes, test_collection_attributes):
+    combo = CombinedMetadata(DatasetMetadata(test_dataset_attributes), CollectionMetadata(test_collection_attributes))
+
+    duplicate = copy.deepcopy(combo)
+    duplicate['colour'] = '#000000'
+    duplicate['history'].append('copied')
+
+    assert combo['colour'] == '#444444'
+    assert len(combo['history']) == 3
+
+
+def test_forked_combined_write(test_dataset_attributes, test_collection_attributes, tmpdir):
+    combo = CombinedMetadata(DatasetMetadata(test_dataset_attributes), CollectionMetadata(test_collection_attributes))
+    fork = combo.fork()
+    fork['history'].append('forked')
+
+    json_file = Path(tmpdir) / 'test.json'
+    fork.write_metadata(json_file)
+
+    with open(json_file, 'r') as test_file:
+        read_in_json = json.load(test_file)
+
+    assert read_in_json['datasets'][0]['history'] == ['AAAA', 'AAAB', 'BBBB', 'forked']
+    assert 'datasets' not in combo.collection.metadata
+
+
+def test_deepcopy_copies_nested_values(test_dataset_attributes):
+    test_dataset_attributes['nested'] = {'x': [1]}
+    original = DatasetMetadata(test_dataset_attributes, validate=False)
+    duplicate = copy.deepcopy(original)
+
+    duplicate['nested']['x'].append(2)
+    assert original['nested'] == {'x': [1]}
+
+    duplicate.metadata['reader'] = 'another_reader'
+    duplicate.metadata['url'].append('another_url')
+    assert original['reader'] == 'test_reader'
+    assert original['url'] == ['test_url']
+
+
+def test_history_behaves_like_a_list(test_dataset_attributes):
+    original = DatasetMetadata(test_dataset_attributes)
+    fork = original.fork()
+    fork['history'].append('forked')
+
+    assert fork['history'] + ['more'] == ['AAAA', 'AAAB', 'BBBB', 'forked', 'more']
+    assert ['first'] + fork['history'] == ['first', 'AAAA', 'AAAB', 'BBBB', 'forked']
+    history = fork['history']
+    history += ['extra']
+    assert fork['history'][-1] == 'extra'
+    assert original['history'] == ['AAAA', 'AAAB', 'BBBB']
+
+    # the dictionary holds plain python types, so it can be written out as it is
+    assert json.loads(json.dumps(fork.metadata))['history'] == ['AAAA', 'AAAB', 'BBBB', 'forked', 'extra']
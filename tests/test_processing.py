@@ -15,10 +15,18 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import pytest
+import os
+import pickle
+import shutil
+import types
 import json
+import numpy as np
+import pandas as pd
 from pathlib import Path
 from climind.data_manager.metadata import DatasetMetadata, CollectionMetadata
 import climind.data_manager.processing as dm
+import climind.data_types.timeseries as ts
+import climind.data_types.grid as gd
 
 HADCRUT5_PATH = 'test_data/hadcrut5.json'
 
@@ -214,6 +222,183 @@ def test_read_error_handler(mocker, test_dataset, test_attributes):
         _, _ = ds.read_dataset(Path(''))
 
 
+def test_read_with_cache(mocker, test_dataset, tmp_path):
+    ds = test_dataset
+    (tmp_path / 'test_filename').write_text('1')
+
+    reader = mocker.MagicMock(side_effect=lambda out_dir, metadata, **kwargs: [1, 2, 3])
+    _ = mocker.patch('climind.data_manager.processing.DataSet._get_reader', return_value=reader)
+
+    cache = dm.DatasetCache()
+    first = ds.read_dataset(tmp_path, dataset_cache=cache)
+    first.append(4)
+    second = ds.read_dataset(tmp_path, dataset_cache=cache)
+
+    assert reader.call_count == 1
+    assert second == [1, 2, 3]
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    # different reader arguments and changed files mean the data set has to be read again
+    _ = ds.read_dataset(tmp_path, dataset_cache=cache, grid_resolution=5)
+    assert reader.call_count == 2
+
+    (tmp_path / 'test_filename').write_text('12')
+    _ = ds.read_dataset(tmp_path, dataset_cache=cache)
+    assert reader.call_count == 3
+
+
+def test_dataset_cache_eviction():
+    small = pd.DataFrame({'data': np.zeros(10)})
+    size = dm.estimate_size(types.SimpleNamespace(df=small))
+
+    cache = dm.DatasetCache(max_bytes=2 * size)
+    cache.put('a', types.SimpleNamespace(df=small))
+    cache.put('b', types.SimpleNamespace(df=small))
+    assert cache.get('a') is not None
+
+    # adding a third data set removes the least recently used one
+    cache.put('c', types.SimpleNamespace(df=small))
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.total_bytes == 2 * size
+
+    # data sets bigger than the budget are not cached
+    cache.put('d', types.SimpleNamespace(df=pd.DataFrame({'data': np.zeros(100)})))
+    assert cache.get('d') is None
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.total_bytes == 0
+
+
+def test_persistent_cache_time_series(test_dataset, tmp_path):
+    cache = dm.PersistentDatasetCache(tmp_path / 'cache', version='1.0.0')
+    series = ts.TimeSeriesAnnual([2000, 2001, 2002], [0.1, 0.2, 0.3], metadata=test_dataset.metadata)
+
+    key = cache.make_key('test_reader', tmp_path, test_dataset.metadata, {})
+    assert cache.get(key) is None
+
+    cache.put(key, series)
+    cached_series = cache.get(key)
+    assert cached_series.df['data'].tolist() == [0.1, 0.2, 0.3]
+    assert cached_series.metadata['type'] == 'gridded'
+
+    # a different version of climind does not use the same entries
+    other_version = dm.PersistentDatasetCache(tmp_path / 'cache', version='2.0.0')
+    assert other_version.make_key('test_reader', tmp_path, test_dataset.metadata, {}) != key
+
+    cache.clear()
+    assert cache.get(key) is None
+
+
+def test_persistent_cache_grid(test_dataset, tmp_path):
+    cache = dm.PersistentDatasetCache(tmp_path, version='1.0.0')
+
+    times = pd.date_range(start='2000-01-01', freq='1MS', periods=3)
+    lats = np.arange(-87.5, 90.0, 5.0)
+    lons = np.arange(-177.5, 180.0, 5.0)
+    grid = gd.GridMonthly(gd.make_xarray(np.ones((3, 36, 72)), times, lats, lons), test_dataset.metadata)
+
+    cache.put('grid', grid)
+    assert (tmp_path / 'grid.nc').exists()
+    assert grid.df is not None
+
+    cached_grid = cache.get('grid')
+    assert isinstance(cached_grid, gd.GridMonthly)
+    np.testing.assert_array_equal(cached_grid.df.tas_mean.values, grid.df.tas_mean.values)
+
+    # files that cannot be read are treated as missing
+    (tmp_path / 'grid.pkl').write_text('not a pickle')
+    assert cache.get('grid') is None
+
+
+def test_persistent_cache_pruned_to_budget(tmp_path):
+    cache = dm.PersistentDatasetCache(tmp_path, version='1.0.0')
+    cache.put('a', list(range(1000)))
+    size = (tmp_path / 'a.pkl').stat().st_size
+
+    cache.max_bytes = 2 * size
+    cache.put('b', list(range(1000)))
+    os.utime(tmp_path / 'a.pkl', (0, 0))
+    os.utime(tmp_path / 'b.pkl', (1, 1))
+    assert cache.get('a') is not None
+
+    # reading 'a' made 'b' the least recently used data set
+    cache.put('c', list(range(1000)))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+def test_persistent_cache_failed_put_cleaned_up(mocker, test_dataset, tmp_path):
+    cache = dm.PersistentDatasetCache(tmp_path, version='1.0.0')
+
+    times = pd.date_range(start='2000-01-01', freq='1MS', periods=3)
+    lats = np.arange(-87.5, 90.0, 5.0)
+    lons = np.arange(-177.5, 180.0, 5.0)
+    grid = gd.GridMonthly(gd.make_xarray(np.ones((3, 36, 72)), times, lats, lons), test_dataset.metadata)
+
+    _ = mocker.patch('climind.data_manager.processing.pickle.dump', side_effect=RuntimeError('disk full'))
+    with pytest.raises(RuntimeError):
+        cache.put('grid', grid)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_dataset_cache_with_persistent_cache(mocker, test_dataset, tmp_path):
+    reader = mocker.MagicMock(side_effect=lambda out_dir, metadata, **kwargs: [1, 2, 3])
+    _ = mocker.patch('climind.data_manager.processing.DataSet._get_reader', return_value=reader)
+
+    persistent_cache = dm.PersistentDatasetCache(tmp_path / 'cache', version='1.0.0')
+    _ = test_dataset.read_dataset(tmp_path / 'data', dataset_cache=dm.DatasetCache(persistent_cache=persistent_cache))
+    assert reader.call_count == 1
+
+    # a new in-memory cache, as in a later run, finds the data set on disk
+    dataset_cache = dm.DatasetCache(persistent_cache=persistent_cache)
+    data = test_dataset.read_dataset(tmp_path / 'data', dataset_cache=dataset_cache)
+    assert reader.call_count == 1
+    assert data == [1, 2, 3]
+    assert len(dataset_cache) == 1
+    assert dataset_cache.disk_hits == 1
+    assert dataset_cache.memory_hits == 0
+    assert dataset_cache.misses == 0
+
+    _ = test_dataset.read_dataset(tmp_path / 'data', dataset_cache=dataset_cache)
+    assert dataset_cache.memory_hits == 1
+    assert dataset_cache.hits == 2
+
+
+def test_dataset_cache_shares_arrays(test_dataset):
+    years = np.array([2000, 2001, 2002])
+    values = np.array([0.1, 0.2, 0.3])
+    series = ts.TimeSeriesAnnual.from_arrays(years, values, metadata=test_dataset.metadata)
+
+    cache = dm.DatasetCache()
+    cache.put('series', series)
+    cached = cache.get('series')
+
+    # the arrays are shared, but the metadata and the data set itself are not
+    assert cached is not series
+    assert cached._column('data') is values
+    cached.metadata['name'] = 'changed'
+    cached.df['data'] = cached.df['data'] + 1
+    assert cache.get('series').metadata['name'] == test_dataset.metadata['name']
+    assert cache.get('series').df['data'].tolist() == [0.1, 0.2, 0.3]
+
+    times = pd.date_range(start='2000-01-01', freq='1MS', periods=3)
+    lats = np.arange(-87.5, 90.0, 5.0)
+    lons = np.arange(-177.5, 180.0, 5.0)
+    grid = gd.GridMonthly(gd.make_xarray(np.ones((3, 36, 72)), times, lats, lons), test_dataset.metadata)
+
+    cache.put('grid', grid)
+    cached_grid = cache.get('grid')
+    assert cached_grid.df is not grid.df
+    assert np.shares_memory(cached_grid.df.tas_mean.values, grid.df.tas_mean.values)
+    assert cached_grid.metadata is not grid.metadata
+
+
 # DataCollection tests
 
 def test_creation_from_file():
@@ -331,6 +516,19 @@ def test_get_collection_dir(tmp_path):
     assert test_dir.exists()
 
 
+def test_dataset_keys_change_with_files(tmp_path):
+    dc = dm.DataCollection.from_file(Path(HADCRUT5_PATH))
+    data_file = dc.get_collection_dir(tmp_path) / 'data.csv'
+    data_file.write_text('1850,0.1')
+
+    keys = dc.dataset_keys(tmp_path)
+    assert len(keys) == len(dc.datasets)
+    assert dc.dataset_keys(tmp_path) == keys
+
+    data_file.write_text('1850,0.1\n1851,0.2')
+    assert dc.dataset_keys(tmp_path) != keys
+
+
 def test_to_file(tmp_path):
     dc = dm.DataCollection.from_file(Path(HADCRUT5_PATH))
     dc.to_file(tmp_path / 'test.json')
@@ -418,6 +616,158 @@ def test_select_from_archive_with_list():
     assert len(selected_da.collections['GISTEMP'].datasets) == 1
 
 
+def test_select_from_archive_multiple_keys():
+    metadata_dir = [Path('test_data'), Path('test_data_2')]
+    da = dm.DataArchive.from_directory(metadata_dir)
+
+    for metadata_to_match in [{'type': 'gridded', 'name': 'HadCRUT5'},
+                              {'type': ['gridded', 'timeseries'], 'time_resolution': 'monthly'},
+                              {'name': 'not a name'},
+                              {'colour': 'not a colour'},
+                              {}]:
+        selected_da = da.select(metadata_to_match)
+
+        for name in da.collections:
+            expected = da.collections[name].match_metadata(metadata_to_match)
+            if expected is None:
+                assert name not in selected_da.collections
+            else:
+                assert selected_da.collections[name].datasets == expected.datasets
+
+
+def test_select_returns_views():
+    da = dm.DataArchive.from_directory(Path('test_data'))
+    da.dataset_cache = dm.DatasetCache()
+    selected_da = da.select({'type': 'gridded'})
+
+    assert selected_da.dataset_cache is da.dataset_cache
+
+    original = da.collections['HadCRUT5']
+    view = selected_da.collections['HadCRUT5']
+    assert view.global_attributes is not original.global_attributes
+    assert view.global_attributes['name'] == original.global_attributes['name']
+    assert view.datasets[0] is original.datasets[0]
+
+
+def test_view_does_not_change_collection(tmp_path):
+    dc = dm.DataCollection.from_file(Path(HADCRUT5_PATH))
+    view = dc.view(dc.datasets[:1])
+
+    view.global_attributes['name'] = 'Changed'
+    view.to_file(tmp_path / 'view.json')
+
+    assert dc.global_attributes['name'] == 'HadCRUT5'
+    assert 'datasets' not in dc.global_attributes
+
+
+def test_select_is_logged():
+    da = dm.DataArchive.from_directory(Path('test_data'))
+    _ = da.select({'type': 'gridded'})
+    _ = da.select({'type': 'timeseries', 'time_resolution': 'monthly'})
+
+    assert len(da.query_log) == 2
+    assert da.query_log[0][0] == {'type': 'gridded'}
+    assert da.query_log[0][1] == 2
+    assert len(da.slowest_queries(1)) == 1
+
+
+def test_index_updated_when_collection_added():
+    da = dm.DataArchive.from_directory(Path('test_data'))
+    assert 'CMEMS' not in da.select({'type': 'timeseries'}).collections
+
+    for collection in dm.DataArchive.from_directory(Path('test_data_2')).collections.values():
+        da.add_collection(collection)
+    assert 'CMEMS' in da.select({'type': 'timeseries'}).collections
+
+
+def test_metadata_index_query(test_dataset, test_collection_metadata):
+    collection = dm.DataCollection(test_collection_metadata.metadata)
+    collection.add_dataset(test_dataset)
+
+    index = dm.MetadataIndex()
+    index.add_collection('test', collection)
+
+    matches, to_check = index.query({'type': ['gridded', 'timeseries'], 'not a key': 'meh'})
+    assert matches == {0}
+    assert to_check == set()
+
+    matches, to_check = index.query({'type': 'timeseries'})
+    assert matches == set()
+
+    # lists cannot be indexed so data sets with list values have to be checked
+    matches, to_check = index.query({'filename': 'test_filename'})
+    assert matches == {0}
+    assert to_check == {0}
+
+
+def test_index_created_and_reused(mocker, tmp_path):
+    metadata_dir = tmp_path / 'metadata'
+    shutil.copytree(Path('test_data'), metadata_dir)
+    index_file = tmp_path / 'cache' / 'index.pkl'
+
+    da = dm.DataArchive.from_directory(metadata_dir, index_file=index_file)
+    assert index_file.exists()
+    assert len(da.collections) == 2
+
+    m = mocker.patch("climind.data_manager.processing.validate_metadata")
+    da = dm.DataArchive.from_directory(metadata_dir, index_file=index_file)
+    assert m.call_count == 0
+    assert len(da.collections) == 2
+    assert len(da.select({'type': 'gridded'}).collections['HadCRUT5'].datasets) == 1
+
+
+def test_index_rereads_changed_file(tmp_path):
+    metadata_dir = tmp_path / 'metadata'
+    shutil.copytree(Path('test_data'), metadata_dir)
+    index_file = tmp_path / 'index.pkl'
+
+    _ = dm.DataArchive.from_directory(metadata_dir, index_file=index_file)
+
+    json_file = metadata_dir / 'hadcrut5.json'
+    with open(json_file, 'r') as f:
+        metadata = json.load(f)
+    metadata['name'] = 'HadCRUT6'
+    with open(json_file, 'w') as f:
+        json.dump(metadata, f)
+
+    da = dm.DataArchive.from_directory(metadata_dir, index_file=index_file)
+    assert 'HadCRUT6' in da.collections
+    assert 'HadCRUT5' not in da.collections
+
+    json_file.unlink()
+    da = dm.DataArchive.from_directory(metadata_dir, index_file=index_file)
+    assert len(da.collections) == 1
+
+
+def test_index_shared_between_directory_sets(mocker, tmp_path):
+    first_dir = tmp_path / 'first'
+    second_dir = tmp_path / 'second'
+    shutil.copytree(Path('test_data'), first_dir)
+    shutil.copytree(Path('test_data_2'), second_dir)
+    index_file = tmp_path / 'index.pkl'
+
+    _ = dm.DataArchive.from_directory(first_dir, index_file=index_file)
+    _ = dm.DataArchive.from_directory(second_dir, index_file=index_file)
+
+    # both sets of files are in the index, so neither is parsed again
+    m = mocker.patch("climind.data_manager.processing.validate_metadata")
+    _ = dm.DataArchive.from_directory(first_dir, index_file=index_file)
+    _ = dm.DataArchive.from_directory([first_dir, second_dir], index_file=index_file)
+    assert m.call_count == 0
+    assert len(dm.DataArchive.load_index(index_file)) == len(list(first_dir.rglob('*.json'))) + \
+        len(list(second_dir.rglob('*.json')))
+
+
+def test_index_from_different_version_is_ignored(tmp_path):
+    index_file = tmp_path / 'index.pkl'
+    dm.DataArchive.save_index(index_file, {'not a file': {}})
+    assert dm.DataArchive.load_index(index_file) == {'not a file': {}}
+
+    with open(index_file, 'wb') as f:
+        pickle.dump({'version': -1, 'files': {'not a file': {}}}, f)
+    assert dm.DataArchive.load_index(index_file) == {}
+
+
 def test_archive_read(mocker):
     # The test_data directory contains two metadata files which are used to create the archive
     metadata_dir = Path('test_data')
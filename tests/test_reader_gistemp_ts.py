@@ -0,0 +1,68 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import itertools
+import numpy as np
+
+import climind.readers.reader_gistemp_ts as gistemp
+
+
+def loop_regrid_to_5x5(grid):
+    # the cell-by-cell regridding which regrid_to_5x5 replaces
+    number_of_months = grid.shape[0]
+    target_grid = np.zeros((number_of_months, 36, 72))
+
+    for m, xx, yy in itertools.product(range(number_of_months), range(72), range(36)):
+        transfer, lox, hix, loy, hiy = gistemp.build_transfer(xx, yy)
+        selection = grid[m, loy:hiy + 1, lox:hix + 1]
+        index = (~np.isnan(selection))
+        if np.count_nonzero(index) > 0:
+            weighted = transfer[index] * selection[index]
+            grid_mean = np.sum(weighted) / np.sum(transfer[index])
+        else:
+            grid_mean = np.nan
+        target_grid[m, yy, xx] = grid_mean
+
+    return target_grid
+
+
+def test_build_stencils():
+    transfer, lat_indices, lon_indices = gistemp.build_stencils()
+
+    assert transfer.shape == (36, 72, 3, 3)
+    assert lat_indices[0] == 0
+    assert lat_indices[1] == 2
+    assert lat_indices[35] == 87
+    assert lon_indices[71] == 177
+    assert transfer[0, 0, 0, 0] == 1.0
+    assert transfer[0, 0, 2, 2] == 0.25
+    assert transfer[1, 1, 0, 0] == 0.25
+
+
+def test_regrid_to_5x5_matches_loop():
+    rng = np.random.default_rng(7)
+    grid = rng.normal(size=(3, 90, 180))
+    grid[rng.random(size=grid.shape) < 0.3] = np.nan
+    grid[1, 0:3, 0:3] = np.nan
+
+    result = gistemp.regrid_to_5x5(grid)
+    expected = loop_regrid_to_5x5(grid)
+
+    assert result.shape == (3, 36, 72)
+    assert np.isnan(result[1, 0, 0])
+    assert np.array_equal(np.isnan(result), np.isnan(expected))
+    assert np.allclose(result[~np.isnan(result)], expected[~np.isnan(expected)], atol=1e-12)
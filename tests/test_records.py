@@ -0,0 +1,66 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2024 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pytest
+import numpy as np
+
+from climind.stats.records import record_statistics
+
+
+def test_record_statistics_simple():
+    data = [1.0, 3.0, 2.0, 4.0, 0.5, np.nan, 5.0]
+    stats = record_statistics(data)
+
+    assert stats['running_max'].tolist() == [1.0, 3.0, 3.0, 4.0, 4.0, 4.0, 5.0]
+    assert stats['running_min'].tolist() == [1.0, 1.0, 1.0, 1.0, 0.5, 0.5, 0.5]
+    assert stats['is_high_record'].tolist() == [True, True, False, True, False, False, True]
+    assert stats['is_low_record'].tolist() == [True, False, False, False, True, False, False]
+    assert stats['high_margin'][3] == pytest.approx(1.0)
+    assert stats['high_margin'][6] == pytest.approx(1.0)
+    assert stats['low_margin'][4] == pytest.approx(-0.5)
+    assert np.isnan(stats['record_margin'][0])
+    assert np.isnan(stats['record_margin'][2])
+    assert stats['record_margin'][4] == pytest.approx(-0.5)
+    assert stats['steps_since_high_record'].tolist() == [0, 0, 1, 0, 1, 2, 0]
+    assert stats['steps_since_low_record'].tolist() == [0, 1, 2, 3, 0, 1, 2]
+
+
+def test_record_statistics_leading_missing():
+    stats = record_statistics([np.nan, 2.0, 1.0])
+    assert not stats['is_high_record'][0]
+    assert np.isnan(stats['steps_since_high_record'][0])
+    assert stats['is_high_record'][1]
+    assert stats['is_low_record'][2]
+
+
+def test_record_statistics_many_series():
+    rng = np.random.default_rng(3)
+    data = rng.normal(size=(5, 100))
+    stats = record_statistics(data)
+    for i in range(5):
+        single = record_statistics(data[i])
+        for key in stats:
+            np.testing.assert_array_equal(stats[key][i], single[key])
+
+
+def test_record_statistics_groups():
+    # two interleaved groups, records are only compared within each group
+    data = np.array([10.0, 1.0, 9.0, 2.0, 11.0, 0.0])
+    groups = np.array([1, 2, 1, 2, 1, 2])
+    stats = record_statistics(data, groups=groups)
+
+    assert stats['is_high_record'].tolist() == [True, True, False, True, True, False]
+    assert stats['is_low_record'].tolist() == [True, True, True, False, False, True]
+    assert stats['steps_since_high_record'].tolist() == [0, 0, 1, 0, 0, 1]
@@ -0,0 +1,58 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2024 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pytest
+import numpy as np
+from statsmodels.nonparametric.smoothers_lowess import lowess
+
+from climind.stats.smoothing import expanding_lowess
+
+
+@pytest.fixture
+def noisy_series():
+    rng = np.random.default_rng(42)
+    time = np.arange(1850, 2024).astype(float)
+    data = 0.01 * (time - 1850) + rng.normal(0, 0.1, len(time))
+    data[40] += 2.0
+    return time, data
+
+
+@pytest.mark.parametrize("iterations", [0, 1, 3])
+def test_expanding_lowess_matches_statsmodels(noisy_series, iterations):
+    time, data = noisy_series
+    fit = expanding_lowess(time, data, 10, iterations=iterations)
+
+    assert np.all(np.isnan(fit[0:9]))
+    for i in range(9, len(time)):
+        expected = lowess(data[0:i + 1], time[0:i + 1], 10 / (i + 1), it=iterations)
+        assert fit[i] == pytest.approx(expected[i, 1], abs=1e-10)
+
+
+def test_expanding_lowess_with_missing_data(noisy_series):
+    time, data = noisy_series
+    data[100] = np.nan
+
+    fit = expanding_lowess(time, data, 10)
+    assert np.isnan(fit[100])
+
+    selection = ~np.isnan(data[0:121])
+    expected = lowess(data[0:121][selection], time[0:121][selection], 10 / 120)
+    assert fit[120] == pytest.approx(expected[-1, 1], abs=1e-10)
+
+
+def test_expanding_lowess_short_series(noisy_series):
+    time, data = noisy_series
+    fit = expanding_lowess(time[0:5], data[0:5], 10)
+    assert np.all(np.isnan(fit))
@@ -0,0 +1,73 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2022 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pytest
+import numpy as np
+import pandas as pd
+import cftime as cf
+
+from climind.data_types.time_axis import make_datetimes, encode_times
+
+
+def test_make_datetimes_years_only():
+    dates = make_datetimes([1850, 1999, 2024])
+    expected = pd.to_datetime(['1850-01-01', '1999-01-01', '2024-01-01']).values
+    assert np.all(dates == expected)
+    assert dates.dtype == np.dtype('datetime64[ns]')
+
+
+def test_make_datetimes_months():
+    years = np.repeat(np.arange(1850, 2030), 12)
+    months = np.tile(np.arange(1, 13), 180)
+    dates = make_datetimes(years, months)
+    expected = pd.to_datetime(dict(year=years, month=months, day=np.ones(len(years)))).values
+    assert np.all(dates == expected)
+
+
+def test_make_datetimes_days():
+    expected = pd.date_range('1979-01-01', '2024-12-31', freq='D')
+    dates = make_datetimes(expected.year, expected.month, expected.day)
+    assert np.all(dates == expected.values)
+
+
+def test_make_datetimes_invalid_day_raises():
+    with pytest.raises(ValueError):
+        make_datetimes([2023, 2023], [2, 2], [28, 29])
+
+
+@pytest.mark.parametrize("time_units", ['days since 1800-01-01 00:00:00.0',
+                                        'hours since 1900-01-01',
+                                        'seconds since 1970-01-01 00:00:00'])
+def test_encode_times_matches_cftime(time_units):
+    dates = pd.date_range('1850-01-01', '2024-12-01', freq='MS')
+    expected = cf.date2num(dates.to_pydatetime().tolist(), units=time_units,
+                           has_year_zero=False, calendar='standard')
+    times = encode_times(dates.values, time_units)
+    assert np.all(times == expected)
+    assert np.issubdtype(times.dtype, np.integer)
+
+
+def test_encode_times_fractional_units():
+    times = encode_times(make_datetimes([2000], [1], [2]) + np.timedelta64(12, 'h'), 'days since 2000-01-01')
+    assert np.issubdtype(times.dtype, np.floating)
+    assert times[0] == 1.5
+
+
+def test_encode_times_before_gregorian_uses_cftime():
+    dates = make_datetimes([1500, 1600])
+    time_units = 'days since 1400-01-01'
+    expected = cf.date2num([d.to_pydatetime() for d in pd.DatetimeIndex(dates)], units=time_units,
+                           has_year_zero=False, calendar='standard')
+    assert np.all(encode_times(dates, time_units) == expected)
@@ -424,6 +424,46 @@ def test_make_combined_series(annual_datalist):
             assert test_result.df['year'][i] == 1850 + i
 
 
+def test_make_combined_series_with_uncertainties(simple_annual):
+    datasets = []
+    for i in range(4):
+        ds = copy.deepcopy(simple_annual)
+        ds.metadata['name'] = f'test{i}'
+        ds.df['data'] = ds.df['data'] + i
+        ds.df['uncertainty'] = 0.1 * (i + 1)
+        datasets.append(ds)
+
+    test_result = ts.make_combined_series(datasets, augmented_uncertainty=False)
+    assert test_result.df['data'][0] == pytest.approx(1.850 + 1.5)
+    expected_spread = np.std([0, 1, 2, 3], ddof=1) * 1.645
+    assert test_result.df['uncertainty'][0] == pytest.approx(np.sqrt(expected_spread ** 2 + 0.4 ** 2))
+
+
+def test_aligned_stack(simple_annual, simple_annual_time_shifted):
+    simple_annual.metadata['name'] = 'one'
+    simple_annual_time_shifted.metadata['name'] = 'two'
+
+    stack = ts.AlignedStack([simple_annual, simple_annual_time_shifted])
+
+    assert stack.names == ['one', 'two']
+    assert stack.data.shape == (2, 2032 - 1850 + 1)
+    assert stack.times['year'].tolist() == list(range(1850, 2033))
+    assert np.isnan(stack.data[1, 0])
+    assert np.isnan(stack.data[0, -1])
+    assert np.all(np.isnan(stack.uncertainty))
+
+    count = stack.count()
+    assert count[0] == 1
+    assert count[-1] == 1
+    assert np.max(count) == 2
+
+    mean = stack.mean()
+    assert mean[0] == pytest.approx(1.850)
+
+    df = stack.to_dataframe(uncertainty=True)
+    assert list(df.columns) == ['year', 'one', 'one_uncertainty', 'two', 'two_uncertainty']
+
+
 def test_get_list_of_unique_variables(annual_datalist):
     test_list = ts.get_list_of_unique_variables(annual_datalist)
 
@@ -501,6 +541,35 @@ def test_generate_dates_irregular(simple_irregular):
     assert dates[1] - dates[0] == 7
 
 
+def test_generate_dates_cached_until_series_changes(simple_monthly):
+    time_units = 'days since 1800-01-01 00:00:00.0'
+    dates = simple_monthly.generate_dates(time_units)
+    dates[0] = -999
+    assert simple_monthly.generate_dates(time_units)[0] != -999
+
+    first = simple_monthly._get_index(f'dates {time_units}', lambda: None)
+    assert simple_monthly._get_index(f'dates {time_units}', lambda: None) is first
+
+    simple_monthly.select_year_range(1851, 1852)
+    dates = simple_monthly.generate_dates(time_units)
+    assert len(dates) == 24
+    assert dates[0] == 18627
+
+
+def test_fingerprint_identifies_data_and_metadata(simple_monthly):
+    duplicate = copy.deepcopy(simple_monthly)
+    assert duplicate.fingerprint() == simple_monthly.fingerprint()
+
+    duplicate.df.loc[0, 'data'] = -999.
+    assert duplicate.fingerprint() != simple_monthly.fingerprint()
+
+    duplicate = copy.deepcopy(simple_monthly)
+    duplicate.metadata['name'] = 'renamed'
+    assert duplicate.fingerprint() != simple_monthly.fingerprint()
+
+    assert simple_monthly.nbytes > 0
+
+
 def test_write_csv_irregular(simple_irregular, tmpdir):
     test_filename = Path(tmpdir) / 'test_irregular.csv'
     test_metadata_filename = Path(tmpdir) / 'test_irregular_metadata.csv'
@@ -583,6 +652,69 @@ def test_make_annual_cumulative(test_metadata):
     assert 'Calculated annual value' in a.metadata['history'][-1]
 
 
+def test_make_annual_from_arrays_matches_dataframe(uncertainty_monthly):
+    uncertainty_monthly.df.loc[5, 'data'] = np.nan
+    uncertainty_monthly.df.loc[0:11, 'uncertainty'] = np.nan
+    from_dataframe = uncertainty_monthly.make_annual()
+
+    fresh = ts.TimeSeriesMonthly.make_from_df(uncertainty_monthly.df, uncertainty_monthly.metadata)
+    from_arrays = fresh.make_annual()
+
+    pd.testing.assert_frame_equal(from_arrays.df, from_dataframe.df[['year', 'data', 'uncertainty']])
+
+
+def test_dataframe_built_when_needed(test_metadata):
+    f = ts.TimeSeriesMonthly(np.array([1999, 1999]), np.array([1, 2]), np.array([2.0, 3.0]), metadata=test_metadata)
+
+    assert list(f.df.columns) == ['year', 'month', 'data', 'time']
+    assert f.df['year'].dtype == np.int64
+    assert f.df['time'][1] == pd.Timestamp('1999-02-01')
+
+    # once built, changes to the dataframe are kept
+    f.df.loc[0, 'data'] = 9.0
+    assert f.get_value(1999, 1) == 9.0
+
+
+def test_from_arrays_does_not_copy(test_metadata):
+    years = np.array([1999, 1999, 2000])
+    months = np.array([11, 12, 1])
+    data = np.array([1.0, 2.0, 3.0])
+
+    f = ts.TimeSeriesMonthly.from_arrays(years, months, data, metadata=test_metadata)
+
+    assert isinstance(f, ts.TimeSeriesMonthly)
+    assert f._column('year') is years
+    assert f._column('data') is data
+    assert f.get_value(2000, 1) == 3.0
+
+
+def test_from_frame(uncertainty_monthly):
+    df = uncertainty_monthly.df
+
+    shared = ts.TimeSeriesMonthly.from_frame(df, uncertainty_monthly.metadata, copy=False)
+    copied = ts.TimeSeriesMonthly.from_frame(df, uncertainty_monthly.metadata)
+
+    assert np.shares_memory(shared._column('data'), df['data'].to_numpy())
+    assert not np.shares_memory(copied._column('data'), df['data'].to_numpy())
+    pd.testing.assert_frame_equal(shared.df, copied.df)
+    assert shared.df['uncertainty'][0] == 0.3
+
+    annual = ts.TimeSeriesAnnual.from_frame(pd.DataFrame({'year': [2000, 2001], 'data': [1.0, 2.0]}))
+    assert annual.get_value_from_year(2001) == 2.0
+
+def test_time_series_has_no_instance_dictionary(simple_annual):
+    with pytest.raises(AttributeError):
+        simple_annual.not_an_attribute = 1
+
+
+def test_select_year_range_takes_view(simple_monthly):
+    original = simple_monthly._column('data')
+    simple_monthly.select_year_range(1903, 1981)
+
+    assert np.shares_memory(original, simple_monthly._column('data'))
+    assert simple_monthly.get_first_and_last_year() == (1903, 1981)
+    assert len(simple_monthly.df) == 12 * (1981 - 1903 + 1)
+
 def test_make_annual_by_selecting_month(monthly_data_is_month):
     a = monthly_data_is_month.make_annual_by_selecting_month(1)
 
@@ -654,6 +786,19 @@ def test_get_value_monthly_non_existent_month(simple_monthly, uncertainty_monthl
     assert uncertainty_monthly.get_uncertainty(2072, 3) is None
 
 
+def test_get_values_monthly(simple_monthly):
+    values = simple_monthly.get_values([1850, 2022, 2072, 1849], [1, 12, 3, 12])
+    assert isinstance(values, np.ndarray)
+    np.testing.assert_array_equal(values, [1850., 2022., np.nan, np.nan])
+
+
+def test_get_values_monthly_after_selection(simple_monthly):
+    assert simple_monthly.get_value(1850, 1) == 1850.
+    simple_monthly.select_year_range(1900, 1910)
+    assert simple_monthly.get_value(1850, 1) is None
+    np.testing.assert_array_equal(simple_monthly.get_values([1900, 1910], [1, 12]), [1900., 1910.])
+
+
 def test_get_value_monthly_with_duplicate_raises_key_error(simple_monthly, uncertainty_monthly):
     simple_monthly.df['month'][1] = 1
     with pytest.raises(KeyError):
@@ -852,6 +997,25 @@ def test_record_margins_with_nonrecord(simple_annual):
             assert pytest.approx(1 / 1000, 0.0001) == margins.df.data[i]
 
 
+def test_record_statistics_annual(simple_annual):
+    stats = simple_annual.record_statistics()
+    assert stats['year'].tolist() == simple_annual.df['year'].tolist()
+    assert stats['is_high_record'].all()
+    assert stats['steps_since_low_record'].iloc[-1] == len(simple_annual.df) - 1
+
+
+def test_record_statistics_monthly_by_calendar_month(simple_monthly):
+    simple_monthly.df.loc[(simple_monthly.df['year'] == 2000) & (simple_monthly.df['month'] == 3), 'data'] = 5000.
+    stats = simple_monthly.record_statistics()
+
+    assert stats['month'].tolist() == simple_monthly.df['month'].tolist()
+    # each month is a record compared with the same month in previous years, but not after the March outlier
+    march = stats[stats['month'] == 3]
+    assert not march[march['year'] > 2000]['is_high_record'].any()
+    assert march[march['year'] == 2022]['steps_since_high_record'].iloc[0] == 22
+    assert stats[stats['month'] == 4]['is_high_record'].all()
+
+
 def test_make_from_df(uncertainty_annual):
     annual = ts.TimeSeriesAnnual.make_from_df(uncertainty_annual.df, uncertainty_annual.metadata)
     assert isinstance(annual, ts.TimeSeriesAnnual)
@@ -902,6 +1066,14 @@ def test_get_uncertainty_from_ts_with_no_uncertainty(simple_annual):
     assert val is None
 
 
+def test_get_values_annual(simple_annual):
+    values = simple_annual.get_values(np.array([2022, 1850, 2029]))
+    np.testing.assert_array_equal(values, [2022. / 1000., 1850. / 1000., np.nan])
+
+    values = simple_annual.get_values([])
+    assert len(values) == 0
+
+
 def test_get_value_from_year_no_match(simple_annual):
     val = simple_annual.get_value_from_year(2055)
     assert val is None
@@ -912,6 +1084,14 @@ def test_get_uncertainty_from_year_no_match(uncertainty_annual):
     assert val is None
 
 
+def test_ranking_monthly_ascending(simple_monthly):
+    assert simple_monthly.get_rank_from_year_and_month(1850, 12, ascending=True) == 1
+    assert simple_monthly.get_rank_from_year_and_month(2022, 12, ascending=True) == 2022 - 1850 + 1
+    # all months in a year have the same value so they tie
+    assert simple_monthly.get_rank_from_year_and_month(1851, 6, versus_all_months=True, ascending=True) == 13
+    assert simple_monthly.get_rank_from_year_and_month(1851, 6, versus_all_months=True) == (2022 - 1851) * 12 + 1
+
+
 def test_ranking_annual(simple_annual):
     rank = simple_annual.get_rank_from_year(2022)
     assert rank == 1
@@ -946,6 +1126,101 @@ def test_get_year_from_rank_annual(simple_annual):
     assert year[0] == 2020
 
 
+def test_ranking_annual_ascending(simple_annual):
+    assert simple_annual.get_rank_from_year(1850, ascending=True) == 1
+    assert simple_annual.get_rank_from_year(2022, ascending=True) == 2022 - 1850 + 1
+
+
+def test_ranking_annual_updated_when_data_change(simple_annual):
+    assert simple_annual.get_rank_from_year(1850) == 2022 - 1850 + 1
+    assert simple_annual.get_year_from_rank(1) == [2022]
+
+    # change the data in place and by replacing the column
+    simple_annual.df.loc[0, 'data'] = 99.
+    assert simple_annual.get_rank_from_year(1850) == 1
+    assert simple_annual.get_year_from_rank(1) == [1850]
+
+    simple_annual.df['data'] = -1 * simple_annual.df['data']
+    assert simple_annual.get_rank_from_year(1850) == 2022 - 1850 + 1
+    assert simple_annual.get_year_from_rank(1) == [1851]
+
+
+def test_ranking_monthly_updated_when_data_change(simple_monthly):
+    assert simple_monthly.get_rank_from_year_and_month(2022, 12) == 1
+    simple_monthly.add_offset(1.0)
+    simple_monthly.df.loc[simple_monthly.df.year == 1850, 'data'] = 9999.
+    assert simple_monthly.get_rank_from_year_and_month(2022, 12) == 2
+    assert simple_monthly.get_rank_from_year_and_month(1850, 12) == 1
+
+
+def test_indices_follow_version(simple_annual):
+    simple_annual.get_rank_from_year(1850)
+    version = simple_annual._version
+    assert 'rank' in simple_annual._indices
+
+    # lookups reuse the index without changing the version
+    simple_annual.get_rank_from_year(1900)
+    assert simple_annual._version == version
+    assert 'rank' in simple_annual._indices
+
+    # reading the dataframe keeps the indices, replacing the data drops them
+    _ = simple_annual.df
+    assert simple_annual._version == version
+    assert 'rank' in simple_annual._indices
+
+    simple_annual.df = simple_annual.df.copy()
+    assert simple_annual._version > version
+    assert simple_annual._indices == {}
+
+    simple_annual.get_rank_from_year(1850)
+    simple_annual.select_year_range(1900, 1910)
+    assert simple_annual._indices == {}
+    assert simple_annual.get_rank_from_year(1910) == 1
+
+
+def test_reading_df_does_not_rebuild_rank_index(mocker, simple_monthly):
+    spy = mocker.spy(ts.TimeSeriesMonthly, '_build_rank_index')
+    for i in range(10):
+        year = simple_monthly.df['year'][i]
+        month = simple_monthly.df['month'][i]
+        simple_monthly.get_rank_from_year_and_month(year, month)
+    assert spy.call_count == 1
+
+    # changing the data, through a method or in the dataframe, rebuilds the index
+    simple_monthly.add_offset(1.0)
+    simple_monthly.get_rank_from_year_and_month(1850, 1)
+    assert spy.call_count == 2
+
+    simple_monthly.df.loc[0, 'data'] = 9999.
+    assert simple_monthly.get_rank_from_year_and_month(1850, 1) == 1
+    assert spy.call_count == 3
+
+
+def test_lookups_do_not_build_dataframe(simple_monthly, simple_annual):
+    simple_monthly.get_value(1900, 6)
+    simple_monthly.get_uncertainty(1900, 6)
+    simple_annual.get_value_from_year(1900)
+    simple_annual.get_uncertainty_from_year(1900)
+    assert simple_monthly._df is None
+    assert simple_annual._df is None
+
+    simple_annual.get_rank_from_year(1850)
+    version = simple_annual._version
+    simple_annual.get_value_from_year(1900)
+    assert simple_annual._version == version
+
+
+def test_irregular_lookup_by_date(simple_irregular):
+    first_year, first_month, first_day = [int(simple_irregular._column(column)[1])
+                                          for column in ['year', 'month', 'day']]
+    assert simple_irregular.get_value(first_year, first_month, first_day) == simple_irregular._column('data')[1]
+    assert simple_irregular.get_value(1850, 1, 1) is None
+
+    values = simple_irregular.get_values([first_year, 1850], [first_month, 1], [first_day, 1])
+    assert values[0] == simple_irregular._column('data')[1]
+    assert np.isnan(values[1])
+
+
 def test_get_year_range_annual(simple_annual):
     first_year, last_year = simple_annual.get_first_and_last_year()
     assert first_year == 1850
@@ -971,6 +1246,46 @@ def test_rolling_average_centre(simple_annual):
     assert ma.df['year'][2022 - 1850] == np.mean(np.arange(2022 - 9, 2023))
 
 
+def test_rolling_average_centre_lookups_are_exact(simple_annual):
+    # an even run length gives years ending in .5, which do not match any whole year
+    ma = simple_annual.running_mean(4, centred=True)
+    assert ma.get_value_from_year(1851) is None
+    assert ma.get_rank_from_year(1851) is None
+    assert ma.get_value_from_year(1851.5) == pytest.approx(1851.5 / 1000.)
+
+    ma = simple_annual.running_mean(5, centred=True)
+    assert ma.get_value_from_year(1852) == pytest.approx(1852. / 1000.)
+    assert ma.get_rank_from_year(2020) == 1
+
+
+def test_share(simple_monthly):
+    shared = simple_monthly.share()
+    assert isinstance(shared, ts.TimeSeriesMonthly)
+    assert shared._column('data') is simple_monthly._column('data')
+
+    shared.metadata['name'] = 'changed'
+    assert simple_monthly.metadata['name'] != 'changed'
+
+    # a dataframe can be changed in place, so it is not shared
+    shared = simple_monthly.share()
+    simple_monthly.df.loc[0, 'data'] = 99.
+    assert shared.get_value(1850, 1) == 1850.
+
+
+def test_derived_series_share_times(simple_annual):
+    ma = simple_annual.running_mean(10)
+    assert ma._column('year') is simple_annual._column('year')
+    assert ma._df is None
+
+    # the metadata are forked, and a series holding a dataframe does not share it
+    assert simple_annual.metadata['history'] != ma.metadata['history']
+    assert not simple_annual.metadata['derived']
+    _ = simple_annual.df
+    smoothed = simple_annual.lowess()
+    simple_annual.df.loc[0, 'year'] = 1000
+    assert smoothed.df['year'][0] == 1850
+
+
 def test_rolling_average_stdev(simple_annual):
     ma = simple_annual.running_stdev(10)
 
@@ -1107,6 +1422,23 @@ def test_running_trend(simple_annual):
         assert np.isnan(test_moving_average.df.data[i])
     assert test_moving_average.df.data[9] == pytest.approx(1859.0/1000.0, 0.00001)
 
+
+def test_running_trend_monthly(simple_monthly):
+    test_moving_average = simple_monthly.running_trend(24)
+    assert isinstance(test_moving_average, ts.TimeSeriesMonthly)
+    assert np.all(np.isnan(test_moving_average.df.data[0:23]))
+    assert not np.isnan(test_moving_average.df.data[23])
+    assert test_moving_average.metadata['derived']
+
+
+def test_running_ols(simple_annual):
+    fit = simple_annual.running_ols(10, standard_error=True)
+    assert len(fit) == len(simple_annual.df)
+    assert fit['year'].tolist() == simple_annual.df['year'].tolist()
+    assert fit['trend'][9] == pytest.approx(1.0 / 1000.0)
+    assert fit['standard_error'][9] == pytest.approx(0.0, abs=1e-10)
+    assert fit['count'][9] == 10
+
 def test_running_lowess(simple_annual):
     test_moving_average = simple_annual.running_lowess()
     for i in range(10):
@@ -0,0 +1,76 @@
+#  Climate indicator manager - a package for managing and building climate indicator dashboards.
+#  Copyright (c) 2024 John Kennedy
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+import numpy as np
+from scipy.stats import linregress
+
+from climind.stats.trends import rolling_ols
+
+
+@pytest.fixture
+def noisy_series():
+    rng = np.random.default_rng(42)
+    time = np.arange(1850, 2024) + 0.5
+    data = 0.01 * (time - 1850) + rng.normal(0, 0.1, len(time))
+    return time, data
+
+
+def test_rolling_ols_matches_linregress(noisy_series):
+    time, data = noisy_series
+    fit = rolling_ols(time, data, 30, standard_error=True)
+
+    assert np.all(np.isnan(fit['trend'][0:29]))
+    assert np.all(fit['count'][29:] == 30)
+
+    for i in [29, 100, len(time) - 1]:
+        expected = linregress(time[i - 29:i + 1], data[i - 29:i + 1])
+        assert fit['trend'][i] == pytest.approx(expected.slope, abs=1e-10)
+        assert fit['intercept'][i] == pytest.approx(expected.intercept, abs=1e-8)
+        assert fit['standard_error'][i] == pytest.approx(expected.stderr, abs=1e-10)
+        assert fit['end_value'][i] == pytest.approx(expected.intercept + expected.slope * time[i], abs=1e-10)
+
+
+def test_rolling_ols_with_missing_data(noisy_series):
+    time, data = noisy_series
+    data[50] = np.nan
+
+    fit = rolling_ols(time, data, 30, min_points=30)
+    assert np.all(np.isnan(fit['trend'][50:80]))
+    assert not np.isnan(fit['trend'][80])
+
+    fit = rolling_ols(time, data, 30)
+    assert fit['count'][60] == 29
+    selection = ~np.isnan(data[31:61])
+    expected = np.polyfit(time[31:61][selection], data[31:61][selection], 1)
+    assert fit['trend'][60] == pytest.approx(expected[0], abs=1e-10)
+
+
+def test_rolling_ols_many_series(noisy_series):
+    time, data = noisy_series
+    all_data = np.vstack([data, 2 * data, np.full(len(data), np.nan)])
+
+    fit = rolling_ols(time, all_data, 20)
+    assert fit['trend'].shape == (3, len(time))
+    np.testing.assert_allclose(fit['trend'][1], 2 * fit['trend'][0])
+    assert np.all(np.isnan(fit['trend'][2]))
+    assert np.all(fit['count'][2] == 0)
+
+
+def test_rolling_ols_window_longer_than_series(noisy_series):
+    time, data = noisy_series
+    fit = rolling_ols(time[0:5], data[0:5], 10)
+    assert np.all(np.isnan(fit['trend']))